@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+startup cost of the command-line scripts, measured with python -X importtime
+
+These scripts are run thousands of times in pipelines, so the time spent
+importing modules before any work is done adds up. Each case runs one
+command line and reports the import time on top of a bare interpreter
+(python -c pass). With --check the run fails when
+* a case imports a module it must not, for example networkx for --help
+* a case spends more than its budget importing
+
+    python3 benchmark_startup.py
+    python3 benchmark_startup.py --check
+
+https://docs.python.org/3/using/cmdline.html#cmdoption-X
+"""
+import argparse  # https://docs.python.org/3.3/library/argparse.html
+import os
+import subprocess  # https://docs.python.org/3/library/subprocess.html
+import sys
+import tempfile
+from typing import Dict, List, NamedTuple, Tuple
+
+SCRIPT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# heavy third-party packages; each costs 50 ms to 300 ms to import
+HEAVY_MODULES = ("numpy", "networkx", "matplotlib", "jsonschema")
+
+
+class StartupCase(NamedTuple):
+    """a command line and what its startup may cost"""
+
+    arguments: List[str]
+    # top-level packages that must not be imported
+    forbidden: Tuple[str, ...]
+    # import time in milliseconds beyond a bare interpreter; generous, so
+    # only a new heavy import fails it, not noise
+    budget_ms: float
+
+
+STARTUP_CASES = (
+    StartupCase(["produce_output.py", "0"], HEAVY_MODULES, 75),
+    StartupCase(["produce_output.py", "10", "--seed", "1"], HEAVY_MODULES, 75),
+    StartupCase(["validate_graph.py", "--help"], HEAVY_MODULES, 75),
+    StartupCase(
+        ["validate_graph.py", "--numNodes", "10", "--connectivityOnly"],
+        ("networkx", "matplotlib", "jsonschema"),
+        250,
+    ),
+    StartupCase(
+        ["validate_graph.py", "--numNodes", "10", "--degreesOnly"],
+        ("networkx", "matplotlib", "jsonschema"),
+        250,
+    ),
+)
+
+
+def import_times(arguments: List[str]) -> Dict[str, Tuple[int, int]]:
+    """run python -X importtime with the given arguments
+
+    The command runs in a temporary directory so files it writes, such as
+    logs/, do not land in the working directory.
+
+    Args:
+        arguments: a script in this directory and its arguments, or
+            options for the interpreter such as ["-c", "pass"]
+
+    Returns:
+        dictionary from module name to (self, cumulative) microseconds; only
+        top-level imports have their own nested imports in cumulative
+    """
+    if arguments[0].endswith(".py"):
+        arguments = [os.path.join(SCRIPT_DIRECTORY, arguments[0])] + arguments[1:]
+    with tempfile.TemporaryDirectory() as scratch:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime"] + arguments,
+            cwd=scratch,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    times = {}
+    # import time: self [us] | cumulative | imported package
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def startup_ms(arguments: List[str]) -> float:
+    """total import time in milliseconds, nested imports counted once"""
+    return sum(self_us for self_us, _ in import_times(arguments).values()) / 1000
+
+
+def forbidden_imports(case: StartupCase) -> List[str]:
+    """the forbidden top-level packages that the case imports"""
+    imported = {name.split(".")[0] for name in import_times(case.arguments)}
+    return sorted(imported.intersection(case.forbidden))
+
+
+if __name__ == "__main__":
+
+    theparser = argparse.ArgumentParser(
+        description="measure import time of the command-line scripts",
+        allow_abbrev=False,
+    )
+    theparser.add_argument(
+        "--check",
+        action="store_true",
+        default=False,
+        help="exit with status 1 if a case imports a forbidden module or is over budget",
+    )
+    theparser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="runs per case; the median is reported. Default is 5",
+    )
+    args = theparser.parse_args()
+
+    def median_ms(arguments):
+        runs = sorted(startup_ms(arguments) for _ in range(args.repeat))
+        return runs[len(runs) // 2]
+
+    interpreter_ms = median_ms(["-c", "pass"])
+    print("bare interpreter: %.1f ms of imports" % interpreter_ms)
+    failures = []
+    for case in STARTUP_CASES:
+        extra_ms = median_ms(case.arguments) - interpreter_ms
+        forbidden = forbidden_imports(case)
+        print(
+            "%-60s %6.1f ms (budget %g ms)%s"
+            % (
+                " ".join(case.arguments),
+                extra_ms,
+                case.budget_ms,
+                "; imports " + ", ".join(forbidden) if forbidden else "",
+            )
+        )
+        if forbidden or extra_ms > case.budget_ms:
+            failures.append(" ".join(case.arguments))
+
+    if args.check and failures:
+        print("startup regression: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+# EOF
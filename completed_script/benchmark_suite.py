@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+time and peak memory of every generator, output format, parser and
+validation step across a sweep of graph sizes
+
+replaces the hand-run loops in BENCHMARKING.md:
+
+    python3 benchmark_suite.py --output results.json
+    python3 benchmark_suite.py --compare benchmark_baseline.json --threshold 0.5
+    python3 benchmark_suite.py --filter parse --sizes 1000
+
+Each case first runs once under tracemalloc for the peak memory of the
+Python and numpy allocations it makes (its input is prepared beforehand and
+not counted), which also warms it up; then it is timed --repeat times
+without instrumentation and the fastest run is kept.
+https://docs.python.org/3/library/tracemalloc.html
+
+With --compare the run fails (exit status 1) when a case is slower, or
+uses more memory, than the baseline by more than the threshold. Timings
+depend on the machine, so a baseline is only meaningful on the machine that
+recorded it; make benchmark_baseline records a new one.
+"""
+import argparse  # https://docs.python.org/3.3/library/argparse.html
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import io
+import json  # https://docs.python.org/3/library/json.html
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, NamedTuple, Optional
+
+import degree_stats
+import graph_cache
+import graph_algorithms
+import graph_io
+import implicit_graphs
+import memory_profile
+import pipeline
+import produce_output
+import render_graph
+import sparse_graphs
+import validate_json_schema
+from csr_graph import CSRGraph, MappedGraph, write_csr_file
+from dense_graphs import BitsetGraph
+
+# number of nodes; a random graph has about nodes^2/2 edges
+DEFAULT_SIZES = (300, 1000, 3000)
+
+# this fraction slower, or larger, than the baseline fails --compare;
+# timings on a shared machine vary by 30% from run to run
+DEFAULT_THRESHOLD = 0.5
+
+# timed runs per case; the fastest is recorded
+DEFAULT_REPEAT = 5
+
+RESULTS_VERSION = 1
+
+# differences below these are noise, whatever the ratio
+MIN_COMPARED_SECONDS = 0.005
+MIN_COMPARED_BYTES = 2**20
+
+
+class BenchmarkCase(NamedTuple):
+    """one measured operation"""
+
+    name: str
+    # number of nodes -> the argument of run; not measured
+    setup: Callable
+    run: Callable
+    # larger sizes are skipped; for the slow pure-Python paths
+    max_size: Optional[int] = None
+
+
+# ********** inputs shared by several cases; built once per size **********
+
+
+@functools.lru_cache(maxsize=None)
+def random_graph(number_of_nodes: int) -> dict:
+    if graph_cache.open_cache() is not None:
+        return random_csr(number_of_nodes).to_dict()
+    return produce_output.create_random_graph(number_of_nodes, "numpy", seed=1)
+
+
+@functools.lru_cache(maxsize=None)
+def random_csr(number_of_nodes: int):
+    # each case runs in a new process, so without $GRAPH_CACHE_DIR (see
+    # --cacheDir) every case generates its input again
+    graph = graph_cache.cached_random_graph(
+        number_of_nodes, "numpy", seed=1, cache=graph_cache.open_cache()
+    )
+    if isinstance(graph, MappedGraph):
+        import numpy as np
+
+        # read into memory, so the cases do not time page faults of the file
+        graph = CSRGraph(np.array(graph.offsets), np.array(graph.indices))
+    return graph
+
+
+@functools.lru_cache(maxsize=None)
+def random_bitset(number_of_nodes: int):
+    return BitsetGraph.from_csr(random_csr(number_of_nodes))
+
+
+@functools.lru_cache(maxsize=None)
+def edge_text(number_of_nodes: int) -> bytes:
+    out = io.BytesIO()
+    graph_io.write_neighbor_lists(random_graph(number_of_nodes).items(), out)
+    return out.getvalue()
+
+
+@functools.lru_cache(maxsize=None)
+def edge_binary(number_of_nodes: int) -> bytes:
+    out = io.BytesIO()
+    graph_io.write_binary_edges(
+        random_graph(number_of_nodes).items(), number_of_nodes, out
+    )
+    return out.getvalue()
+
+
+@functools.lru_cache(maxsize=None)
+def adjacency_json(number_of_nodes: int) -> str:
+    out = io.BytesIO()
+    graph_io.write_json_adjacency(random_graph(number_of_nodes).items(), out)
+    return out.getvalue().decode("ascii")
+
+
+def _consume(iterable) -> None:
+    deque(iterable, maxlen=0)
+
+
+def _write_to_devnull(writer, *args):
+    with open(os.devnull, "wb") as out:
+        return writer(*args, out=out)
+
+
+def _write_csr_to_temporary_file(the_graph):
+    with tempfile.TemporaryDirectory() as scratch:
+        return write_csr_file(
+            the_graph.items(), len(the_graph), os.path.join(scratch, "graph.csr")
+        )
+
+
+# ********** the cases **********
+
+BENCHMARK_CASES = (
+    # generators
+    BenchmarkCase(
+        "generate.python.dict",
+        lambda n: n,
+        lambda n: produce_output.create_random_graph(n, "python", seed=1),
+        max_size=1000,
+    ),
+    BenchmarkCase(
+        "generate.numpy.dict",
+        lambda n: n,
+        lambda n: produce_output.create_random_graph(n, "numpy", seed=1),
+    ),
+    BenchmarkCase(
+        "generate.numpy.csr",
+        lambda n: n,
+        lambda n: produce_output.create_random_graph(n, "numpy", seed=1, fmt="csr"),
+    ),
+    BenchmarkCase(
+        "generate.numpy.bitset",
+        lambda n: n,
+        lambda n: produce_output.create_random_graph(n, "numpy", seed=1, fmt="bitset"),
+    ),
+    BenchmarkCase(
+        "generate.parallel.csr",
+        lambda n: n,
+        lambda n: produce_output.create_random_graph_parallel(n, 2, seed=1, fmt="csr"),
+    ),
+    BenchmarkCase(
+        "generate.stream.edges",
+        lambda n: n,
+        lambda n: _consume(
+            produce_output.next_edge_from_graph_of_size(n, "numpy", seed=1)
+        ),
+        max_size=1000,
+    ),
+    BenchmarkCase(
+        "generate.complete.csr",
+        lambda n: n,
+        lambda n: implicit_graphs.CompleteGraph(n).to_csr(),
+    ),
+    BenchmarkCase(
+        "generate.grid.csr",
+        lambda n: n,
+        lambda n: produce_output.create_grid_graph(n, n, periodic=True, fmt="csr"),
+    ),
+    # sparse models at 100 times the nodes, average degree 10
+    BenchmarkCase(
+        "generate.gnp.csr",
+        lambda n: 100 * n,
+        lambda n: sparse_graphs.gnp_random_graph(n, 10 / (n - 1), seed=1),
+    ),
+    BenchmarkCase(
+        "generate.barabasi_albert.csr",
+        lambda n: 100 * n,
+        lambda n: sparse_graphs.barabasi_albert_graph(n, 5, seed=1),
+    ),
+    # output formats
+    BenchmarkCase(
+        "write.tuple",
+        random_graph,
+        lambda g: _write_to_devnull(graph_io.write_neighbor_lists, g.items()),
+    ),
+    BenchmarkCase(
+        "write.tsv",
+        random_graph,
+        lambda g: _write_to_devnull(
+            functools.partial(graph_io.write_neighbor_lists, line_format="tsv"),
+            g.items(),
+        ),
+    ),
+    BenchmarkCase(
+        "write.binary",
+        random_graph,
+        lambda g: _write_to_devnull(graph_io.write_binary_edges, g.items(), len(g)),
+    ),
+    BenchmarkCase(
+        "write.json",
+        random_graph,
+        lambda g: _write_to_devnull(graph_io.write_json_adjacency, g.items()),
+    ),
+    BenchmarkCase("write.csr_file", random_graph, _write_csr_to_temporary_file),
+    BenchmarkCase(
+        "write.complete.binary",
+        implicit_graphs.CompleteGraph,
+        lambda g: _write_to_devnull(graph_io.write_binary_edges, g.items(), len(g)),
+    ),
+    # parsers
+    BenchmarkCase(
+        "parse.text",
+        edge_text,
+        lambda data: graph_io.read_edge_text(io.BytesIO(data)),
+    ),
+    BenchmarkCase(
+        "parse.binary",
+        edge_binary,
+        lambda data: graph_io.read_binary_edges(io.BytesIO(data)),
+    ),
+    BenchmarkCase(
+        "parse.json",
+        adjacency_json,
+        lambda text: _consume(graph_io.next_node_in_json(io.StringIO(text))),
+    ),
+    # validation steps
+    BenchmarkCase(
+        "validate.connected_components",
+        random_csr,
+        graph_algorithms.connected_components,
+    ),
+    BenchmarkCase(
+        "validate.components.bitset",
+        random_bitset,
+        graph_algorithms.connected_components,
+    ),
+    BenchmarkCase(
+        "validate.undirected_degrees",
+        random_csr,
+        graph_algorithms.undirected_degrees,
+    ),
+    BenchmarkCase(
+        "validate.disjoint_set",
+        edge_binary,
+        lambda data: graph_algorithms.DisjointSet().union_edge_batches(
+            graph_io.open_binary_edge_batches(io.BytesIO(data))[1]
+        ),
+        max_size=1000,
+    ),
+    BenchmarkCase(
+        "validate.degree_counter",
+        random_csr,
+        lambda g: degree_stats.DegreeCounter().add_csr(g),
+    ),
+    BenchmarkCase(
+        "validate.json_schema",
+        adjacency_json,
+        lambda text: validate_json_schema.AdjacencyValidator().validate_stream(
+            io.StringIO(text)
+        ),
+    ),
+    BenchmarkCase(
+        "validate.component_labels",
+        random_csr,
+        lambda g: graph_algorithms.ComponentLabels(len(g)).add_edge_batches(
+            g.edge_batches()
+        ),
+    ),
+    # generation and checks overlapped in one process
+    BenchmarkCase(
+        "pipeline.random",
+        lambda n: n,
+        lambda n: pipeline.run_pipeline("random", n, seed=1),
+    ),
+    BenchmarkCase("render.sample_graph", random_csr, render_graph.sample_graph),
+)
+
+
+# ********** measuring **********
+
+
+def measure(
+    case: BenchmarkCase, number_of_nodes: int, repeat: int = DEFAULT_REPEAT
+) -> dict:
+    """time and peak memory of one case at one size
+
+    Returns:
+        {"seconds": fastest, "median_seconds": ..., "peak_bytes": ...}
+    """
+    argument = case.setup(number_of_nodes)
+
+    # the traced run comes first so the timed runs find warm caches and
+    # memory the allocator has already obtained from the system
+    with memory_profile.TracedPeak() as traced:
+        case.run(argument)
+    peak_bytes = traced.peak_bytes
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.run(argument)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        "seconds": times[0],
+        "median_seconds": times[len(times) // 2],
+        "peak_bytes": peak_bytes,
+    }
+
+
+def _measure_by_name(name: str, number_of_nodes: int, repeat: int) -> dict:
+    """measure; looks the case up by name so it can run in a fresh process"""
+    (case,) = [case for case in BENCHMARK_CASES if case.name == name]
+    return measure(case, number_of_nodes, repeat)
+
+
+def run_benchmarks(
+    sizes=DEFAULT_SIZES,
+    name_filter: str = "",
+    repeat: int = DEFAULT_REPEAT,
+    isolated: bool = True,
+    exact_name: bool = False,
+):
+    """measure every case whose name contains name_filter at every size
+
+    Args:
+        isolated: measure each case and size in a new process. The time of
+            numpy's large allocations depends on what the process freed
+            before (glibc moves its mmap threshold), so sharing a process
+            makes a case's time depend on the cases that ran before it
+        exact_name: only the case named name_filter
+
+    Returns:
+        the results document written by --output
+    """
+    results = {}
+    for case in BENCHMARK_CASES:
+        if name_filter not in case.name or (exact_name and name_filter != case.name):
+            continue
+        for number_of_nodes in sizes:
+            if case.max_size is not None and number_of_nodes > case.max_size:
+                continue
+            key = "%s[%d]" % (case.name, number_of_nodes)
+            if isolated:
+                # a new worker per measurement; max_tasks_per_child would
+                # do the same but needs Python 3.11, and jammy ships 3.10
+                # https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    results[key] = executor.submit(
+                        _measure_by_name, case.name, number_of_nodes, repeat
+                    ).result()
+            else:
+                results[key] = measure(case, number_of_nodes, repeat)
+            print(
+                "%-40s %9.4f s %10.1f MB"
+                % (key, results[key]["seconds"], results[key]["peak_bytes"] / 1e6),
+                flush=True,
+            )
+    return {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor_count": os.cpu_count(),
+        "results": results,
+    }
+
+
+def remeasure(document: dict, keys, repeat: int = DEFAULT_REPEAT, isolated=True):
+    """measure the given cases again and keep the better of the two results
+
+    A single slow run on a busy machine then does not fail a comparison;
+    a real regression shows up in both.
+
+    Args:
+        document: returned by run_benchmarks; updated in place
+        keys: such as "parse.text[1000]"
+    """
+    for key in sorted(keys):
+        name, number_of_nodes = key[:-1].split("[")
+        again = run_benchmarks(
+            (int(number_of_nodes),), name, repeat, isolated, exact_name=True
+        )["results"][key]
+        measured = document["results"][key]
+        for metric in ("seconds", "peak_bytes"):
+            measured[metric] = min(measured[metric], again[metric])
+
+
+def regressions(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD):
+    """the measurements worse than the baseline by more than threshold
+
+    Cases missing from either document are ignored, and so are measurements
+    below MIN_COMPARED_SECONDS or MIN_COMPARED_BYTES.
+
+    Returns:
+        list of human-readable descriptions, each starting with the key of
+        the case, such as "parse.text[1000]"
+    """
+    found = []
+    for key, measured in results["results"].items():
+        expected = baseline["results"].get(key)
+        if expected is None:
+            continue
+        for metric, floor in (
+            ("seconds", MIN_COMPARED_SECONDS),
+            ("peak_bytes", MIN_COMPARED_BYTES),
+        ):
+            if measured[metric] > max(expected[metric] * (1 + threshold), floor):
+                found.append(
+                    "%s %s: %.4g, baseline %.4g (+%.0f%%)"
+                    % (
+                        key,
+                        metric,
+                        measured[metric],
+                        expected[metric],
+                        100 * (measured[metric] / max(expected[metric], 1e-12) - 1),
+                    )
+                )
+    return found
+
+
+if __name__ == "__main__":
+
+    theparser = argparse.ArgumentParser(
+        description="benchmark generators, writers, parsers and validation",
+        allow_abbrev=False,
+    )
+    theparser.add_argument(
+        "--sizes",
+        metavar="nodes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="numbers of nodes to sweep. Default is "
+        + " ".join(map(str, DEFAULT_SIZES)),
+    )
+    theparser.add_argument(
+        "--filter",
+        type=str,
+        default="",
+        help="only cases whose name contains this text, for example parse",
+    )
+    theparser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="timed runs per case; the fastest is recorded. Default is "
+        + str(DEFAULT_REPEAT),
+    )
+    theparser.add_argument(
+        "--in-process",
+        dest="in_process",
+        action="store_true",
+        default=False,
+        help="measure every case in this process instead of a new process \
+        per case and size; faster, but times depend on the order of the cases",
+    )
+    theparser.add_argument(
+        "--output", type=str, default=None, help="write the results to this JSON file"
+    )
+    theparser.add_argument(
+        "--compare",
+        metavar="baseline",
+        type=str,
+        default=None,
+        help="JSON results file to compare against",
+    )
+    theparser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="allowed slowdown or memory growth over the baseline as a fraction. Default is "
+        + str(DEFAULT_THRESHOLD),
+    )
+    theparser.add_argument(
+        "--cacheDir",
+        type=str,
+        default=None,
+        help="keep the random input graphs in this graph cache, so the \
+        process of each case maps them instead of generating them. \
+        Default is $"
+        + graph_cache.CACHE_DIRECTORY_VARIABLE
+        + ", or no cache",
+    )
+    args = theparser.parse_args()
+    if args.cacheDir:
+        # read by graph_cache.open_cache in the process of each case
+        os.environ[graph_cache.CACHE_DIRECTORY_VARIABLE] = args.cacheDir
+
+    document = run_benchmarks(
+        args.sizes, args.filter, args.repeat, isolated=not args.in_process
+    )
+
+    if args.output:
+        with open(args.output, "w") as file_handle:
+            json.dump(document, file_handle, indent=2, sort_keys=True)
+            file_handle.write("\n")
+
+    if args.compare:
+        with open(args.compare) as file_handle:
+            baseline = json.load(file_handle)
+        found = regressions(document, baseline, args.threshold)
+        if found:
+            print("measuring %d cases again" % len(found))
+            remeasure(
+                document,
+                {description.split(" ")[0] for description in found},
+                args.repeat,
+                isolated=not args.in_process,
+            )
+            found = regressions(document, baseline, args.threshold)
+        for description in found:
+            print("regression: " + description, file=sys.stderr)
+        if found:
+            sys.exit(1)
+        print("no regression beyond %.0f%%" % (100 * args.threshold))
+
+# EOF
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+compact "compressed sparse row" (CSR) representation of a graph
+
+the dictionary used elsewhere in this project,
+    {0: [1, 2], 1: [], 2: [0]}
+is stored as two flat integer buffers
+    offsets = [0, 2, 2, 3]
+    indices = [1, 2, 0]
+where the neighbors of node i are indices[offsets[i]:offsets[i+1]]
+
+https://en.wikipedia.org/wiki/Sparse_matrix#Compressed_sparse_row_(CSR,_CRS_or_Yale_format)
+
+each edge costs 4 bytes (int32) instead of a pointer in a list
+plus a boxed Python int
+
+the same layout can live on disk (write_csr_file) and be memory-mapped
+(MappedGraph), so graphs larger than RAM can be queried; little-endian:
+* 24-byte header: magic b"CSRG", uint16 version, uint16 reserved (0),
+  int64 number of nodes, int64 number of edges
+* number of nodes + 1 int64 offsets
+* number of edges int32 indices
+"""
+from array import array  # https://docs.python.org/3/library/array.html
+import logging
+import mmap  # https://docs.python.org/3/library/mmap.html
+import struct  # https://docs.python.org/3/library/struct.html
+import sys
+
+logger = logging.getLogger(__name__)
+
+# https://docs.python.org/3/library/array.html#module-array
+# offsets are 64-bit so a graph may have more than 2**31 edges;
+# node IDs are 32-bit
+OFFSET_TYPECODE = "q"
+INDEX_TYPECODE = "i"
+
+CSR_FILE_MAGIC = b"CSRG"
+CSR_FILE_VERSION = 1
+CSR_FILE_HEADER = struct.Struct("<4sHHqq")
+
+# edges per array yielded by edge_batches, here and in implicit_graphs
+EDGE_BATCH_EDGES = 2**16
+
+
+class CSRGraph:
+    """adjacency of a directed graph stored as offsets and indices buffers
+
+    The buffers may be array.array objects or numpy arrays (int64 offsets,
+    int32 indices); both support len(), slicing and tolist().
+
+    Node IDs are 0 through len(graph)-1.
+    """
+
+    def __init__(self, offsets, indices):
+        """
+        Args:
+            offsets: len(graph)+1 non-decreasing integers, starting at 0 and
+                ending at len(indices)
+            indices: the neighbor IDs of every node, concatenated
+        """
+        if len(offsets) == 0 or offsets[0] != 0:
+            raise ValueError("offsets must start with 0")
+        if offsets[len(offsets) - 1] != len(indices):
+            raise ValueError("last offset must equal the number of indices")
+        self.offsets = offsets
+        self.indices = indices
+
+    @classmethod
+    def from_dict(cls, the_graph: dict) -> "CSRGraph":
+        """build a CSRGraph from the dictionary used by produce_output
+
+        Args:
+            the_graph: a dictionary where each key is a non-negative integer
+                and the value is a list of integers corresponding to
+                nearest-neighbor nodes
+
+        Returns:
+            CSRGraph with one node per ID from 0 through the largest ID seen
+            as a key or a neighbor. IDs that are not keys get no neighbors,
+            so to_dict() round-trips exactly when the keys are 0..n-1
+
+        >>> CSRGraph.from_dict({0: [1, 2], 1: [], 2: [0]}).to_dict()
+        {0: [1, 2], 1: [], 2: [0]}
+        """
+        logger.info("[trace: from_dict]")
+        number_of_nodes = 0
+        for node_id, list_of_nodes in the_graph.items():
+            number_of_nodes = max(number_of_nodes, node_id + 1)
+            if list_of_nodes:
+                number_of_nodes = max(number_of_nodes, max(list_of_nodes) + 1)
+
+        offsets = array(OFFSET_TYPECODE, [0])
+        indices = array(INDEX_TYPECODE)
+        for node_id in range(number_of_nodes):
+            indices.extend(the_graph.get(node_id, ()))
+            offsets.append(len(indices))
+        return cls(offsets, indices)
+
+    @classmethod
+    def from_edge_array(cls, number_of_nodes: int, edges) -> "CSRGraph":
+        """build a CSRGraph from an array of edges, such as the binary reader's
+
+        Edges are grouped by left node with a stable sort, so each node keeps
+        its neighbors in input order.
+
+        Args:
+            number_of_nodes: number of nodes; IDs are 0..number_of_nodes-1
+            edges: numpy integer array of shape (number of edges, 2)
+
+        Returns:
+            CSRGraph backed by numpy buffers
+        """
+        logger.info("[trace: from_edge_array]")
+        import numpy as np
+
+        left_nodes = edges[:, 0]
+        order = np.argsort(left_nodes, kind="stable")
+        offsets = np.zeros(number_of_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(left_nodes, minlength=number_of_nodes), out=offsets[1:])
+        return cls(offsets, edges[order, 1].astype(np.int32))
+
+    def to_dict(self) -> dict:
+        """convert to the dictionary used by produce_output
+
+        Returns:
+            the_graph: a dictionary where each key is a non-negative integer
+            and the value is a list of integers corresponding to
+            nearest-neighbor nodes
+        """
+        logger.info("[trace: to_dict]")
+        neighbors = self.indices.tolist()
+        boundaries = self.offsets.tolist()
+        return {
+            node_id: neighbors[boundaries[node_id] : boundaries[node_id + 1]]
+            for node_id in range(len(self))
+        }
+
+    def __len__(self) -> int:
+        """number of nodes"""
+        return len(self.offsets) - 1
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CSRGraph):
+            return NotImplemented
+        return (
+            self.offsets.tolist() == other.offsets.tolist()
+            and self.indices.tolist() == other.indices.tolist()
+        )
+
+    def __repr__(self) -> str:
+        return "CSRGraph(nodes=%d, edges=%d)" % (len(self), self.number_of_edges())
+
+    def number_of_edges(self) -> int:
+        """number of directed edges"""
+        return len(self.indices)
+
+    def degree(self, node: int) -> int:
+        """number of neighbors of node"""
+        return int(self.offsets[node + 1] - self.offsets[node])
+
+    def neighbors(self, node: int):
+        """neighbors of node, as a slice of the indices buffer"""
+        return self.indices[self.offsets[node] : self.offsets[node + 1]]
+
+    def items(self):
+        """generate (node ID, list of neighbors) like dict.items()
+
+        this lets next_edge_in_graph and other dict consumers read a CSRGraph
+        """
+        for node_id in range(len(self)):
+            yield node_id, self.neighbors(node_id).tolist()
+
+    def edges(self):
+        """generate every edge as a tuple of 2 integers"""
+        for left_node in range(len(self)):
+            for right_node in self.neighbors(left_node).tolist():
+                yield (left_node, right_node)
+
+    def edge_batches(self, batch_edges: int = EDGE_BATCH_EDGES):
+        """generate the edges as numpy arrays, in the same order as edges()
+
+        Args:
+            batch_edges: most edges per array; a node's neighbors are never
+                split, so a node with more neighbors has an array of its own
+
+        Returns:
+            generator of numpy int64 arrays of shape (edges, 2)
+        """
+        import numpy as np
+
+        offsets = np.asarray(self.offsets, dtype=np.int64)
+        indices = np.asarray(self.indices)
+        start = 0
+        while start < len(self):
+            # the last node whose neighbors end within batch_edges
+            stop = int(
+                np.searchsorted(offsets, offsets[start] + batch_edges, side="right")
+            )
+            stop = min(max(stop - 1, start + 1), len(self))
+            left_nodes = np.repeat(
+                np.arange(start, stop, dtype=np.int64),
+                np.diff(offsets[start : stop + 1]),
+            )
+            yield np.column_stack((left_nodes, indices[offsets[start] : offsets[stop]]))
+            start = stop
+
+    def nbytes(self) -> int:
+        """bytes used by the two buffers"""
+        return _buffer_nbytes(self.offsets) + _buffer_nbytes(self.indices)
+
+
+def _buffer_nbytes(buffer) -> int:
+    """size of an array.array or numpy array payload in bytes"""
+    return len(buffer) * buffer.itemsize
+
+
+class MappedGraph(CSRGraph):
+    """a CSRGraph whose buffers are memory-mapped from a file
+
+    Opening is O(1): neighbors and degree read only the pages they touch,
+    so the file may be larger than RAM. The buffers are read-only numpy
+    arrays; the mapping is released when the MappedGraph and every array
+    taken from it have been garbage-collected.
+    """
+
+    def __init__(self, filename: str):
+        """
+        Args:
+            filename: a file written by write_csr_file
+        """
+        logger.info("[trace: MappedGraph]")
+        import numpy as np  # https://numpy.org/doc/stable/reference/generated/numpy.frombuffer.html
+
+        with open(filename, "rb") as file_handle:
+            if file_handle.seek(0, 2) < CSR_FILE_HEADER.size:
+                raise ValueError(filename + " is not a CSR graph file: missing header")
+            buffer = mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, number_of_nodes, number_of_edges = (
+            CSR_FILE_HEADER.unpack_from(buffer)
+        )
+        if magic != CSR_FILE_MAGIC:
+            raise ValueError(filename + " is not a CSR graph file: bad magic")
+        if version != CSR_FILE_VERSION:
+            raise ValueError("unsupported CSR graph file version " + str(version))
+        indices_start = CSR_FILE_HEADER.size + 8 * (number_of_nodes + 1)
+        if len(buffer) < indices_start + 4 * number_of_edges:
+            raise ValueError(filename + " is truncated")
+
+        self.filename = filename
+        super().__init__(
+            np.frombuffer(
+                buffer,
+                dtype="<i8",
+                count=number_of_nodes + 1,
+                offset=CSR_FILE_HEADER.size,
+            ),
+            np.frombuffer(
+                buffer, dtype="<i4", count=number_of_edges, offset=indices_start
+            ),
+        )
+
+    def __repr__(self) -> str:
+        return "MappedGraph(%r, nodes=%d, edges=%d)" % (
+            self.filename,
+            len(self),
+            self.number_of_edges(),
+        )
+
+
+def write_csr_file(neighbor_lists, number_of_nodes: int, filename: str) -> int:
+    """write a graph to disk in the CSR file layout, one node at a time
+
+    Only the offsets (8 bytes per node) are kept in memory; the neighbor
+    IDs go to disk as they arrive. The node count fixes where the indices
+    section starts, so the offsets and header are written at the end.
+
+    Args:
+        neighbor_lists: iterable of (node ID, list of neighbor node IDs) in
+            increasing node order, for example the_graph.items();
+            node IDs that are skipped get no neighbors
+        number_of_nodes: how many nodes in the graph
+        filename: where to write
+
+    Returns:
+        number of edges written
+    """
+    logger.info("[trace: write_csr_file]")
+    offsets = array(OFFSET_TYPECODE, [0])
+    number_of_edges = 0
+    with open(filename, "wb") as out:
+        out.seek(CSR_FILE_HEADER.size + 8 * (number_of_nodes + 1))
+        for node_id, list_of_nodes in neighbor_lists:
+            if node_id < len(offsets) - 1:
+                raise ValueError("neighbor lists must be in increasing node order")
+            # node IDs that were skipped get no neighbors
+            while len(offsets) - 1 < node_id:
+                offsets.append(number_of_edges)
+            indices = array(INDEX_TYPECODE, list_of_nodes)
+            if sys.byteorder == "big":
+                indices.byteswap()
+            out.write(indices.tobytes())
+            number_of_edges += len(indices)
+            offsets.append(number_of_edges)
+        while len(offsets) < number_of_nodes + 1:
+            offsets.append(number_of_edges)
+        if len(offsets) != number_of_nodes + 1:
+            raise ValueError("more neighbor lists than number_of_nodes")
+
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        out.seek(0)
+        out.write(
+            CSR_FILE_HEADER.pack(
+                CSR_FILE_MAGIC, CSR_FILE_VERSION, 0, number_of_nodes, number_of_edges
+            )
+        )
+        out.write(offsets.tobytes())
+    return number_of_edges
+
+
+def write_csr_graph(graph: CSRGraph, filename: str) -> int:
+    """write a CSRGraph to disk in the CSR file layout
+
+    Unlike write_csr_file, the two buffers are written as they are, without
+    a pass over the nodes in Python.
+
+    Args:
+        graph: a CSRGraph, with array.array or numpy buffers
+        filename: where to write
+
+    Returns:
+        number of edges written
+    """
+    logger.info("[trace: write_csr_graph]")
+    import numpy as np  # https://numpy.org/doc/stable/reference/generated/numpy.ascontiguousarray.html
+
+    # array.array buffers of the right type are viewed, not copied
+    offsets = np.ascontiguousarray(graph.offsets, dtype="<i8")
+    indices = np.ascontiguousarray(graph.indices, dtype="<i4")
+    with open(filename, "wb") as out:
+        out.write(
+            CSR_FILE_HEADER.pack(
+                CSR_FILE_MAGIC, CSR_FILE_VERSION, 0, len(graph), len(indices)
+            )
+        )
+        out.write(offsets.data)
+        out.write(indices.data)
+    return len(indices)
+
+
+# EOF
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+degree statistics from a stream of edges
+
+DegreeCounter keeps one in-degree and one out-degree counter per node
+(numpy int64 arrays) and adds each batch of edges with numpy.bincount, so
+a single pass over the edges is enough and nothing is kept per edge.
+
+A histogram h has h[d] = number of nodes with degree d. Minimum, maximum,
+mean and percentiles are read from the histogram, so summarizing costs
+O(max degree) after the counting pass instead of a scan of every node for
+every distinct degree.
+
+https://numpy.org/doc/stable/reference/generated/numpy.bincount.html
+"""
+import logging
+from typing import Dict, NamedTuple, Sequence
+
+logger = logging.getLogger(__name__)
+
+# edges from an iterable of tuples are buffered and counted this many at a time
+COUNT_CHUNK_EDGES = 2**16
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class DegreeSummary(NamedTuple):
+    """statistics of the degrees of a graph"""
+
+    number_of_nodes: int
+    minimum: int
+    maximum: int
+    mean: float
+    # percentile -> smallest degree d such that at least that percent of the
+    # nodes have degree d or less
+    percentiles: Dict[int, int]
+    # numpy int64 array; histogram[d] is the number of nodes with degree d
+    histogram: object
+
+    def __str__(self) -> str:
+        lines = [
+            "%d nodes; degree min %d, max %d, mean %.3f"
+            % (self.number_of_nodes, self.minimum, self.maximum, self.mean),
+            "percentiles: "
+            + ", ".join(
+                "p%d=%d" % (percent, degree)
+                for percent, degree in self.percentiles.items()
+            ),
+        ]
+        for degree in self.histogram.nonzero()[0].tolist():
+            lines.append("%d nodes have degree %d" % (self.histogram[degree], degree))
+        return "\n".join(lines)
+
+
+def summary_from_histogram(
+    histogram, percentiles: Sequence[int] = DEFAULT_PERCENTILES
+) -> DegreeSummary:
+    """summarize a degree histogram
+
+    Args:
+        histogram: integer array where histogram[d] is the number of nodes
+            with degree d
+        percentiles: integers 0 through 100
+
+    Returns:
+        DegreeSummary; minimum, maximum and mean are 0 when there are no nodes
+    """
+    logger.info("[trace: summary_from_histogram]")
+    import numpy as np
+
+    histogram = np.asarray(histogram, dtype=np.int64)
+    degrees_present = np.flatnonzero(histogram)
+    number_of_nodes = int(histogram.sum())
+    if number_of_nodes == 0:
+        return DegreeSummary(0, 0, 0, 0.0, {p: 0 for p in percentiles}, histogram)
+
+    cumulative = np.cumsum(histogram)
+    return DegreeSummary(
+        number_of_nodes=number_of_nodes,
+        minimum=int(degrees_present[0]),
+        maximum=int(degrees_present[-1]),
+        mean=float(np.dot(np.arange(len(histogram)), histogram)) / number_of_nodes,
+        # nearest-rank percentile
+        # https://en.wikipedia.org/wiki/Percentile#The_nearest-rank_method
+        percentiles={
+            percent: int(
+                np.searchsorted(
+                    cumulative, max(1, -(-percent * number_of_nodes // 100))
+                )
+            )
+            for percent in percentiles
+        },
+        histogram=histogram,
+    )
+
+
+def degree_summary(
+    degrees, percentiles: Sequence[int] = DEFAULT_PERCENTILES
+) -> DegreeSummary:
+    """summarize the degree of every node
+
+    Args:
+        degrees: non-negative integer array indexed by node ID, for example
+            graph_algorithms.undirected_degrees(graph)
+        percentiles: integers 0 through 100
+    """
+    import numpy as np
+
+    return summary_from_histogram(
+        np.bincount(np.asarray(degrees, dtype=np.int64)), percentiles
+    )
+
+
+class DegreeCounter:
+    """in-degree and out-degree of every node, counted from a stream of edges
+
+    Memory is 16 bytes per node whatever the number of edges. Node IDs
+    beyond the initial size grow the counters.
+
+    The streaming undirected degree is in-degree plus out-degree: every
+    listed edge counts at both ends and a self-loop counts twice. Unlike
+    graph_algorithms.undirected_degrees, an edge listed in both directions
+    counts twice, because spotting the reverse copy would mean remembering
+    every edge. A source known to list every edge in both directions, such
+    as a lattice or a sparse model, is counted with symmetric=True; its
+    undirected degree is then the out-degree.
+
+    >>> counter = DegreeCounter(3)
+    >>> counter.add_edges([(0, 1), (0, 2), (2, 2)])
+    >>> counter.out_degrees.tolist(), counter.in_degrees.tolist()
+    ([2, 0, 1], [0, 1, 2])
+    """
+
+    def __init__(self, number_of_nodes: int = 0, symmetric: bool = False):
+        """
+        Args:
+            number_of_nodes: node IDs 0..number_of_nodes-1 start with degree 0
+            symmetric: every edge will be listed in both directions; see
+                produce_output.SYMMETRIC_GRAPH_TYPES
+        """
+        import numpy as np
+
+        self._out_counts = np.zeros(number_of_nodes, dtype=np.int64)
+        self._in_counts = np.zeros(number_of_nodes, dtype=np.int64)
+        self.number_of_nodes = number_of_nodes
+        self.symmetric = symmetric
+        self.edges_read = 0
+
+    def __len__(self) -> int:
+        """number of nodes"""
+        return self.number_of_nodes
+
+    @property
+    def out_degrees(self):
+        """numpy int64 array indexed by node ID"""
+        return self._out_counts[: self.number_of_nodes]
+
+    @property
+    def in_degrees(self):
+        """numpy int64 array indexed by node ID"""
+        return self._in_counts[: self.number_of_nodes]
+
+    def undirected_degrees(self):
+        """in- plus out-degree, or out-degree if symmetric; see the class"""
+        if self.symmetric:
+            return self.out_degrees.copy()
+        return self.out_degrees + self.in_degrees
+
+    def _grow(self, number_of_nodes: int) -> None:
+        """make room for node IDs up to number_of_nodes-1"""
+        import numpy as np
+
+        if number_of_nodes > len(self._out_counts):
+            # double, so a stream of ever larger IDs costs amortized O(1)
+            capacity = max(number_of_nodes, 2 * len(self._out_counts))
+            for name in ("_out_counts", "_in_counts"):
+                counts = np.zeros(capacity, dtype=np.int64)
+                counts[: self.number_of_nodes] = getattr(self, name)[
+                    : self.number_of_nodes
+                ]
+                setattr(self, name, counts)
+        self.number_of_nodes = max(self.number_of_nodes, number_of_nodes)
+
+    def add_edge_batch(self, edges) -> None:
+        """count an array of edges
+
+        Args:
+            edges: integer array of shape (edges, 2), such as a batch from
+                graph_io.next_edge_text_batch
+        """
+        import numpy as np
+
+        if len(edges) == 0:
+            return
+        self._grow(int(edges.max()) + 1)
+        size = len(self._out_counts)
+        self._out_counts += np.bincount(edges[:, 0], minlength=size)
+        self._in_counts += np.bincount(edges[:, 1], minlength=size)
+        self.edges_read += len(edges)
+
+    def add_edge_batches(self, batches) -> None:
+        """count every array of edges from an iterable; see add_edge_batch"""
+        for batch in batches:
+            self.add_edge_batch(batch)
+
+    def add_edges(self, edges) -> None:
+        """count edges one tuple at a time, in chunks of COUNT_CHUNK_EDGES
+
+        Args:
+            edges: iterable of tuples of 2 integers, for example
+                produce_output.next_edge_in_graph(the_graph)
+        """
+        from array import array  # https://docs.python.org/3/library/array.html
+        from itertools import chain, islice
+        import numpy as np
+
+        edges = iter(edges)
+        while True:
+            chunk = array("q", chain.from_iterable(islice(edges, COUNT_CHUNK_EDGES)))
+            if not chunk:
+                return
+            self.add_edge_batch(np.frombuffer(chunk, dtype=np.int64).reshape(-1, 2))
+
+    def add_csr(self, graph) -> None:
+        """count every edge of a CSRGraph, including a MappedGraph
+
+        Out-degrees are the differences of the offsets, so only the indices
+        are scanned.
+        """
+        import numpy as np
+
+        offsets = np.asarray(graph.offsets, dtype=np.int64)
+        indices = np.asarray(graph.indices)
+        self._grow(len(graph))
+        size = len(self._out_counts)
+        self._out_counts[: len(graph)] += np.diff(offsets)
+        self._in_counts += np.bincount(indices, minlength=size)[:size]
+        self.edges_read += len(indices)
+
+    def add_node(self, node: int) -> None:
+        """register a node, which may have no edges"""
+        self._grow(node + 1)
+
+    def summaries(
+        self, percentiles: Sequence[int] = DEFAULT_PERCENTILES
+    ) -> Dict[str, DegreeSummary]:
+        """DegreeSummary of the "in", "out" and "undirected" degrees"""
+        return {
+            "in": degree_summary(self.in_degrees, percentiles),
+            "out": degree_summary(self.out_degrees, percentiles),
+            "undirected": degree_summary(self.undirected_degrees(), percentiles),
+        }
+
+
+# EOF
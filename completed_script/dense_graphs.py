@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+adjacency of dense graphs as a packed bit matrix
+
+create_random_graph gives each node about n/2 neighbors. As a dictionary
+every neighbor is a boxed int in a list, about 36 bytes, and even a
+CSRGraph spends 4 bytes per neighbor: a 50000-node random graph takes
+tens of GB as a dictionary and 5 GB as a CSRGraph. BitsetGraph stores
+one bit per ordered pair of nodes, n^2/8 bytes whatever the number of
+edges: 312 MB for 50000 nodes.
+
+Row u is ceil(n/64) uint64 words; bit v of the row (bit v % 64 of word
+v // 64) is set when v is a neighbor of u. So
+
+* has_edge is one word read
+* degrees are popcounts of the rows
+* a breadth-first search takes the union of the rows of the frontier
+  with a bitwise OR, and removes the visited nodes with an AND NOT
+
+A bit per pair costs less than 4 bytes per edge when more than 1 in 32
+pairs are edges; preferred_format gives "bitset" from that density,
+which is how produce_output picks a format for fmt="auto".
+
+BitsetGraph is a read-only mapping like implicit_graphs.ImplicitGraph,
+so graph[node], len(graph) and graph.items() work as for the dictionary.
+A bit matrix has no order and no repeats: neighbors are listed in
+increasing order, and an edge given twice is stored once.
+https://en.wikipedia.org/wiki/Adjacency_matrix
+https://en.wikipedia.org/wiki/Bit_array
+"""
+from collections.abc import Mapping
+import itertools
+import logging
+
+from csr_graph import CSRGraph, EDGE_BATCH_EDGES
+
+logger = logging.getLogger(__name__)
+
+# fraction of the n^2 pairs that are edges above which a bit per pair is
+# smaller than a CSRGraph's 32-bit index per edge
+DENSE_THRESHOLD = 1 / 32
+
+# upper bound on the bits unpacked to one byte each at a time; 16MB
+BLOCK_CELLS = 2**24
+
+WORD_BITS = 64
+
+
+def preferred_format(number_of_nodes: int, number_of_edges: float) -> str:
+    """the smaller of "bitset" and "csr" for a graph of this size
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        number_of_edges: how many neighbor entries, or their expected number
+
+    Returns:
+        "bitset" when the density is at least DENSE_THRESHOLD, else "csr"
+
+    >>> preferred_format(1000, 1000 * 500), preferred_format(1000, 1000 * 5)
+    ('bitset', 'csr')
+    """
+    if number_of_nodes and number_of_edges >= DENSE_THRESHOLD * number_of_nodes**2:
+        return "bitset"
+    return "csr"
+
+
+_popcount_table = None
+
+
+def _popcount(words):
+    """number of set bits of each uint64 word"""
+    import numpy as np  # https://numpy.org/doc/stable/reference/generated/numpy.bitwise_count.html
+
+    if hasattr(np, "bitwise_count"):
+        # numpy 2.0 and later
+        return np.bitwise_count(words)
+    global _popcount_table
+    if _popcount_table is None:
+        _popcount_table = np.array([bin(byte).count("1") for byte in range(256)])
+    octets = np.ascontiguousarray(words, dtype="<u8").view(np.uint8)
+    return _popcount_table[octets].reshape(words.shape + (8,)).sum(axis=-1)
+
+
+class BitsetGraph(Mapping):
+    """adjacency of a directed graph as an n by n bit matrix
+
+    >>> graph = BitsetGraph.from_dict({0: [2, 1], 1: [2], 2: []})
+    >>> graph.has_edge(0, 2), graph.has_edge(2, 0), graph[0]
+    (True, False, [1, 2])
+    """
+
+    def __init__(self, number_of_nodes: int, words=None):
+        """
+        Args:
+            number_of_nodes: node IDs are 0..number_of_nodes-1
+            words: numpy uint64 array of shape (number_of_nodes,
+                ceil(number_of_nodes / 64)), or None for no edges
+        """
+        import numpy as np
+
+        if number_of_nodes < 0:
+            raise ValueError("invalid number of nodes")
+        self.number_of_nodes = number_of_nodes
+        shape = (number_of_nodes, -(-number_of_nodes // WORD_BITS))
+        if words is None:
+            words = np.zeros(shape, dtype=np.uint64)
+        elif words.shape != shape or words.dtype != np.uint64:
+            raise ValueError("words must be uint64 of shape %r" % (shape,))
+        self.words = words
+
+    # ----- construction -----
+
+    @classmethod
+    def from_csr(cls, graph: CSRGraph) -> "BitsetGraph":
+        """the bit matrix of a CSRGraph, including a MappedGraph"""
+        logger.info("[trace: BitsetGraph.from_csr]")
+        import numpy as np
+
+        offsets = np.asarray(graph.offsets, dtype=np.int64)
+        bitset = cls(len(graph))
+        bitset.add_rows(0, np.diff(offsets), np.asarray(graph.indices))
+        return bitset
+
+    @classmethod
+    def from_dict(cls, the_graph) -> "BitsetGraph":
+        """the bit matrix of an adjacency dictionary
+
+        Nodes are numbered as by CSRGraph.from_dict: 0 through the largest
+        ID seen as a key or a neighbor.
+        """
+        logger.info("[trace: BitsetGraph.from_dict]")
+        return cls.from_csr(CSRGraph.from_dict(the_graph))
+
+    @classmethod
+    def from_edges(cls, number_of_nodes: int, edges) -> "BitsetGraph":
+        """the bit matrix of a stream of (left node, right node) tuples
+
+        Args:
+            number_of_nodes: node IDs are 0..number_of_nodes-1
+            edges: iterable of 2-tuples, such as
+                produce_output.next_edge_from_graph_of_size
+        """
+        logger.info("[trace: BitsetGraph.from_edges]")
+        import numpy as np
+
+        bitset = cls(number_of_nodes)
+        edges = iter(edges)
+        while True:
+            batch = list(itertools.islice(edges, EDGE_BATCH_EDGES))
+            if not batch:
+                return bitset
+            bitset.add_edge_batch(np.array(batch, dtype=np.int64))
+
+    @classmethod
+    def from_edge_batches(cls, number_of_nodes: int, batches) -> "BitsetGraph":
+        """the bit matrix of numpy arrays of edges
+
+        Args:
+            number_of_nodes: node IDs are 0..number_of_nodes-1
+            batches: iterable of integer arrays of shape (edges, 2), such as
+                graph_io.open_binary_edge_batches or edge_batches
+        """
+        logger.info("[trace: BitsetGraph.from_edge_batches]")
+        bitset = cls(number_of_nodes)
+        for batch in batches:
+            bitset.add_edge_batch(batch)
+        return bitset
+
+    def add_edge(self, left_node: int, right_node: int) -> None:
+        """set the bit of one edge"""
+        self._check_node(left_node)
+        self._check_node(right_node)
+        self.words[left_node, right_node >> 6] |= self.words.dtype.type(
+            1 << (right_node & 63)
+        )
+
+    def add_edge_batch(self, edges) -> None:
+        """set the bits of a numpy array of edges of shape (edges, 2)"""
+        import numpy as np  # https://numpy.org/doc/stable/reference/generated/numpy.ufunc.at.html
+
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        if len(edges) and (edges.min() < 0 or edges.max() >= self.number_of_nodes):
+            raise ValueError("edge endpoint is not a node of the graph")
+        left_nodes, right_nodes = edges[:, 0], edges[:, 1]
+        # ufunc.at, because several edges of a batch may share a word
+        np.bitwise_or.at(
+            self.words,
+            (left_nodes, right_nodes >> 6),
+            np.left_shift(np.uint64(1), (right_nodes & 63).astype(np.uint64)),
+        )
+
+    def add_rows(self, first_node: int, counts, indices) -> None:
+        """set the bits of consecutive rows given in CSR layout
+
+        Args:
+            first_node: node ID of the first row
+            counts: numpy array, the number of neighbors of each row
+            indices: numpy array, the neighbors of the rows concatenated,
+                as in the chunks of produce_output._numpy_random_rows
+        """
+        import numpy as np
+
+        counts = np.asarray(counts, dtype=np.int64)
+        boundaries = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=boundaries[1:])
+        rows = self._block_rows()
+        for low in range(0, len(counts), rows):
+            high = min(low + rows, len(counts))
+            block = np.zeros((high - low, self.number_of_nodes), dtype=bool)
+            block[
+                np.repeat(np.arange(high - low), counts[low:high]),
+                indices[boundaries[low] : boundaries[high]],
+            ] = True
+            self.words[first_node + low : first_node + high] |= self._pack(block)
+
+    # ----- mapping interface -----
+
+    def __len__(self) -> int:
+        """number of nodes"""
+        return self.number_of_nodes
+
+    def __iter__(self):
+        return iter(range(self.number_of_nodes))
+
+    def __contains__(self, node) -> bool:
+        return isinstance(node, int) and 0 <= node < self.number_of_nodes
+
+    def __getitem__(self, node):
+        if node not in self:
+            raise KeyError(node)
+        return self.neighbors(node).tolist()
+
+    def __eq__(self, other) -> bool:
+        import numpy as np
+
+        if isinstance(other, BitsetGraph):
+            return self.number_of_nodes == other.number_of_nodes and bool(
+                np.array_equal(self.words, other.words)
+            )
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return "BitsetGraph(nodes=%d, edges=%d)" % (
+            self.number_of_nodes,
+            self.number_of_edges(),
+        )
+
+    # ----- queries -----
+
+    def has_edge(self, left_node: int, right_node: int) -> bool:
+        """whether right_node is a neighbor of left_node; False for non-nodes"""
+        if left_node not in self or right_node not in self:
+            return False
+        return bool(
+            (int(self.words[left_node, right_node >> 6]) >> (right_node & 63)) & 1
+        )
+
+    def neighbors(self, node: int):
+        """the neighbors of node in increasing order, as a numpy int64 array"""
+        self._check_node(node)
+        return self.nodes_in(self.words[node])
+
+    def nodes_in(self, row):
+        """the node IDs whose bits are set in a row of words
+
+        Args:
+            row: numpy uint64 array of ceil(n / 64) words, such as a row of
+                words or the result of union_of_rows
+
+        Returns:
+            numpy int64 array, increasing
+        """
+        import numpy as np
+
+        return np.flatnonzero(self._unpack(row[None, :])[0])
+
+    def degree(self, node: int) -> int:
+        """number of neighbors of node"""
+        self._check_node(node)
+        return int(_popcount(self.words[node]).sum())
+
+    def out_degrees(self):
+        """number of neighbors of each node, as a numpy int64 array"""
+        import numpy as np
+
+        return _popcount(self.words).sum(axis=1, dtype=np.int64)
+
+    def in_degrees(self):
+        """number of nodes listing each node as a neighbor, as a numpy int64 array"""
+        import numpy as np
+
+        degrees = np.zeros(self.number_of_nodes, dtype=np.int64)
+        rows = self._block_rows()
+        for low in range(0, self.number_of_nodes, rows):
+            degrees += self._unpack(self.words[low : low + rows]).sum(
+                axis=0, dtype=np.int64
+            )
+        return degrees
+
+    def number_of_edges(self) -> int:
+        """number of set bits; an undirected edge counts twice"""
+        import numpy as np
+
+        return int(_popcount(self.words).sum(dtype=np.int64))
+
+    def nbytes(self) -> int:
+        """bytes used by the bit matrix"""
+        return self.words.nbytes
+
+    def union_of_rows(self, nodes):
+        """the bitwise OR of the rows of nodes: the nodes any of them reach
+
+        Args:
+            nodes: numpy integer array of node IDs
+
+        Returns:
+            numpy uint64 array of ceil(n / 64) words; see nodes_in
+        """
+        import numpy as np
+
+        union = np.zeros(self.words.shape[1], dtype=np.uint64)
+        rows = self._block_rows()
+        for low in range(0, len(nodes), rows):
+            union |= np.bitwise_or.reduce(self.words[nodes[low : low + rows]], axis=0)
+        return union
+
+    def breadth_first_distances(self, source: int):
+        """number of edges on a shortest path from source to each node
+
+        Each level is one union_of_rows of the frontier, so the work is
+        about n^2/64 word operations whatever the number of edges.
+
+        Returns:
+            numpy int64 array indexed by node ID; -1 for unreachable nodes
+        """
+        logger.info("[trace: BitsetGraph.breadth_first_distances]")
+        import numpy as np
+
+        self._check_node(source)
+        distances = np.full(self.number_of_nodes, -1, dtype=np.int64)
+        for level, frontier in enumerate(self._levels(source, self._all_nodes())):
+            distances[frontier] = level
+        return distances
+
+    def connected_components(self):
+        """label every node with the smallest node ID of its connected component
+
+        Edges are read as undirected, as in graph_algorithms.connected_components.
+
+        Returns:
+            numpy int64 array indexed by node ID
+        """
+        logger.info("[trace: BitsetGraph.connected_components]")
+        import numpy as np
+
+        undirected = self.undirected()
+        labels = np.full(self.number_of_nodes, -1, dtype=np.int64)
+        unvisited = self._all_nodes()
+        for node in range(self.number_of_nodes):
+            # the first unlabeled node is the smallest of its component
+            if labels[node] >= 0:
+                continue
+            for frontier in undirected._levels(node, unvisited):
+                labels[frontier] = node
+        return labels
+
+    def _levels(self, source: int, unvisited):
+        """generate the breadth-first levels from source, as node arrays
+
+        Args:
+            unvisited: words of the nodes not yet reached; the reached
+                nodes are cleared in place
+        """
+        import numpy as np
+
+        frontier = np.array([source], dtype=np.int64)
+        unvisited[source >> 6] &= ~np.uint64(1 << (source & 63))
+        while len(frontier):
+            yield frontier
+            reached = self.union_of_rows(frontier) & unvisited
+            unvisited &= ~reached
+            frontier = self.nodes_in(reached)
+
+    # ----- conversion -----
+
+    def transpose(self) -> "BitsetGraph":
+        """the graph with every edge reversed"""
+        logger.info("[trace: BitsetGraph.transpose]")
+        import numpy as np
+
+        transposed = BitsetGraph(self.number_of_nodes)
+        # rows a whole number of words, so each block of rows is a block
+        # of word columns of the result
+        rows = max(WORD_BITS, self._block_rows() // WORD_BITS * WORD_BITS)
+        for low in range(0, self.number_of_nodes, rows):
+            block = self._unpack(self.words[low : low + rows]).T
+            padded = np.zeros(
+                (self.number_of_nodes, -(-block.shape[1] // WORD_BITS) * WORD_BITS),
+                dtype=bool,
+            )
+            padded[:, : block.shape[1]] = block
+            packed = np.packbits(padded, axis=1, bitorder="little")
+            words = packed.view("<u8").astype(np.uint64, copy=False)
+            transposed.words[
+                :, low // WORD_BITS : low // WORD_BITS + words.shape[1]
+            ] = words
+        return transposed
+
+    def undirected(self) -> "BitsetGraph":
+        """the graph with every edge in both directions"""
+        transposed = self.transpose()
+        transposed.words |= self.words
+        return transposed
+
+    def edges(self):
+        """generate every edge as a tuple of 2 integers, in node order"""
+        for left_node in range(self.number_of_nodes):
+            for right_node in self.neighbors(left_node).tolist():
+                yield (left_node, right_node)
+
+    def edge_batches(self, batch_edges: int = EDGE_BATCH_EDGES):
+        """generate the edges as numpy arrays, in the same order as edges()
+
+        Args:
+            batch_edges: the arrays cover batch_edges / n rows at a time, so
+                an array holds at most about batch_edges edges
+
+        Returns:
+            generator of numpy int64 arrays of shape (edges, 2)
+        """
+        import numpy as np
+
+        rows = max(1, batch_edges // max(self.number_of_nodes, 1))
+        for low in range(0, self.number_of_nodes, rows):
+            left_nodes, right_nodes = np.nonzero(
+                self._unpack(self.words[low : low + rows])
+            )
+            yield np.column_stack((left_nodes + low, right_nodes))
+
+    def to_csr(self) -> CSRGraph:
+        """the same edges as a CSRGraph backed by numpy buffers
+
+        Returns:
+            CSRGraph with int64 offsets and int32 indices
+        """
+        logger.info("[trace: BitsetGraph.to_csr]")
+        import numpy as np
+
+        offsets = np.zeros(self.number_of_nodes + 1, dtype=np.int64)
+        np.cumsum(self.out_degrees(), out=offsets[1:])
+        indices = np.empty(offsets[-1], dtype=np.int32)
+        rows = self._block_rows()
+        for low in range(0, self.number_of_nodes, rows):
+            high = min(low + rows, self.number_of_nodes)
+            # nonzero is in row-major order: by row, then by column
+            _, right_nodes = np.nonzero(self._unpack(self.words[low:high]))
+            indices[offsets[low] : offsets[high]] = right_nodes
+        return CSRGraph(offsets, indices)
+
+    def to_dict(self) -> dict:
+        """convert to the dictionary used by produce_output"""
+        logger.info("[trace: BitsetGraph.to_dict]")
+        return {node: self[node] for node in range(self.number_of_nodes)}
+
+    # ----- helpers -----
+
+    def _check_node(self, node: int) -> None:
+        if not 0 <= node < self.number_of_nodes:
+            raise IndexError(
+                "node %d is not in a graph of %d nodes" % (node, self.number_of_nodes)
+            )
+
+    def _block_rows(self) -> int:
+        """rows unpacked at a time to stay within BLOCK_CELLS"""
+        return max(1, BLOCK_CELLS // max(self.number_of_nodes, 1))
+
+    def _all_nodes(self):
+        """words with the bit of every node set"""
+        import numpy as np
+
+        return self._pack(np.ones((1, self.number_of_nodes), dtype=bool))[0]
+
+    def _pack(self, block):
+        """rows of n booleans to rows of words"""
+        import numpy as np  # https://numpy.org/doc/stable/reference/generated/numpy.packbits.html
+
+        packed = np.zeros((len(block), self.words.shape[1] * 8), dtype=np.uint8)
+        packed[:, : -(-self.number_of_nodes // 8)] = np.packbits(
+            block, axis=1, bitorder="little"
+        )
+        # words are little-endian on disk and in the bit numbering
+        return packed.view("<u8").astype(np.uint64, copy=False)
+
+    def _unpack(self, rows):
+        """rows of words to rows of n 0/1 bytes"""
+        import numpy as np
+
+        octets = np.ascontiguousarray(rows, dtype="<u8").view(np.uint8)
+        return np.unpackbits(
+            octets, axis=1, count=self.number_of_nodes, bitorder="little"
+        )
@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+graph checks that run directly on the project's adjacency
+
+convert_to_networkx creates a Python object per node and per edge before
+NetworkX can answer anything. These functions work on the two flat buffers
+of a CSRGraph (see csr_graph.py) with numpy, so the memory is a few bytes
+per edge and the loops run in C.
+
+The graph is treated as undirected, like the nx.Graph built by
+validate_graph.convert_to_networkx: (u, v) and (v, u) are the same edge.
+Every node ID 0..len(graph)-1 is a node, including nodes without edges.
+
+https://en.wikipedia.org/wiki/Component_(graph_theory)
+
+DisjointSet checks connectivity from a stream of edges instead, holding
+only a parent and a rank per node
+https://en.wikipedia.org/wiki/Disjoint-set_data_structure
+"""
+import logging
+from array import array  # https://docs.python.org/3/library/array.html
+from typing import List, NamedTuple
+
+from csr_graph import CSRGraph
+from dense_graphs import BitsetGraph
+
+logger = logging.getLogger(__name__)
+
+# edges converted to Python ints at a time by DisjointSet.union_edge_batches
+UNION_SLICE_EDGES = 2**14
+
+
+def as_csr(graph) -> CSRGraph:
+    """return graph as a CSRGraph
+
+    Args:
+        graph: a CSRGraph (including MappedGraph), an object with a to_csr
+            method such as a BitsetGraph or an implicit_graphs graph, or a
+            dictionary where each key is a non-negative integer and the
+            value is a list of integers corresponding to nearest-neighbor nodes
+
+    Returns:
+        CSRGraph; the same object if graph already is one
+    """
+    if isinstance(graph, CSRGraph):
+        return graph
+    if hasattr(graph, "to_csr"):
+        return graph.to_csr()
+    return CSRGraph.from_dict(graph)
+
+
+def edge_arrays(graph):
+    """the left and right node of every edge as numpy arrays
+
+    Args:
+        graph: a CSRGraph or an adjacency dictionary
+
+    Returns:
+        left_nodes, right_nodes: numpy int64 arrays, one entry per edge
+    """
+    import numpy as np  # https://numpy.org/doc/stable/reference/generated/numpy.repeat.html
+
+    csr = as_csr(graph)
+    # array.array buffers are viewed, not copied
+    offsets = np.asarray(csr.offsets, dtype=np.int64)
+    right_nodes = np.asarray(csr.indices).astype(np.int64)
+    left_nodes = np.repeat(np.arange(len(csr), dtype=np.int64), np.diff(offsets))
+    return left_nodes, right_nodes
+
+
+def out_degrees(graph):
+    """number of neighbors listed for each node
+
+    Args:
+        graph: a CSRGraph, a BitsetGraph or an adjacency dictionary
+
+    Returns:
+        numpy int64 array indexed by node ID
+    """
+    import numpy as np
+
+    if isinstance(graph, BitsetGraph):
+        return graph.out_degrees()
+    return np.diff(np.asarray(as_csr(graph).offsets, dtype=np.int64))
+
+
+def undirected_degrees(graph):
+    """degree of each node when the graph is read as undirected
+
+    Matches nx.Graph.degree of convert_to_networkx: an edge listed in both
+    directions counts once and a self-loop counts twice.
+
+    Args:
+        graph: a CSRGraph or an adjacency dictionary
+
+    Returns:
+        numpy int64 array indexed by node ID
+    """
+    logger.info("[trace: undirected_degrees]")
+    import numpy as np
+
+    csr = as_csr(graph)
+    number_of_nodes = len(csr)
+    left_nodes, right_nodes = edge_arrays(csr)
+    # one key per unordered pair; sorting brings the reverse duplicates together
+    pairs = np.sort(
+        np.minimum(left_nodes, right_nodes) * number_of_nodes
+        + np.maximum(left_nodes, right_nodes)
+    )
+    # a plain sort and compare is much faster than np.unique for large arrays
+    first_of_run = np.ones(len(pairs), dtype=bool)
+    np.not_equal(pairs[1:], pairs[:-1], out=first_of_run[1:])
+    pairs = pairs[first_of_run]
+    low, high = np.divmod(pairs, max(number_of_nodes, 1))
+    return np.bincount(low, minlength=number_of_nodes) + np.bincount(
+        high, minlength=number_of_nodes
+    )
+
+
+def connected_components(graph):
+    """label every node with the smallest node ID of its connected component
+
+    Vectorized union-find: every edge whose endpoints have different
+    labels hooks the larger root under the smaller one (numpy.minimum.at),
+    then pointer jumping flattens the trees. Edges inside a component are
+    dropped after each round, so later rounds only touch the cut edges.
+    A BitsetGraph is searched breadth-first on its bit rows instead, since
+    its edges may not fit in memory as arrays.
+
+    Args:
+        graph: a CSRGraph, a BitsetGraph or an adjacency dictionary
+
+    Returns:
+        numpy int64 array indexed by node ID
+
+    >>> connected_components({0: [1], 1: [], 2: [3], 3: [], 4: []}).tolist()
+    [0, 0, 2, 2, 4]
+    """
+    logger.info("[trace: connected_components]")
+    import numpy as np  # https://numpy.org/doc/stable/reference/generated/numpy.ufunc.at.html
+
+    if isinstance(graph, BitsetGraph):
+        return graph.connected_components()
+    csr = as_csr(graph)
+    return _merge_components(np.arange(len(csr), dtype=np.int64), *edge_arrays(csr))
+
+
+def _merge_components(labels, left_nodes, right_nodes):
+    """the labels of connected_components after adding some edges
+
+    Args:
+        labels: numpy int64 array where every label is a root that labels
+            itself, such as np.arange(number of nodes) or a previous result
+        left_nodes, right_nodes: numpy integer arrays, one entry per edge
+
+    Returns:
+        numpy int64 array indexed by node ID, in the same form as labels
+    """
+    import numpy as np
+
+    while len(left_nodes):
+        left_labels = labels[left_nodes]
+        right_labels = labels[right_nodes]
+        crossing = left_labels != right_labels
+        if not crossing.any():
+            break
+        left_labels = left_labels[crossing]
+        right_labels = right_labels[crossing]
+        # labels are roots here, and every root hooks to a smaller root,
+        # so no cycles can form
+        np.minimum.at(
+            labels,
+            np.maximum(left_labels, right_labels),
+            np.minimum(left_labels, right_labels),
+        )
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        left_nodes = left_nodes[crossing]
+        right_nodes = right_nodes[crossing]
+    return labels
+
+
+def number_of_connected_components(graph) -> int:
+    """how many connected components the undirected graph has
+
+    Args:
+        graph: a CSRGraph, a BitsetGraph or an adjacency dictionary
+
+    Returns:
+        0 for a graph without nodes
+    """
+    import numpy as np
+
+    labels = connected_components(graph)
+    # each component is labeled by its smallest node, which labels itself
+    return int(np.count_nonzero(labels == np.arange(len(labels))))
+
+
+def is_connected(graph) -> bool:
+    """whether the undirected graph has exactly one connected component
+
+    Args:
+        graph: a CSRGraph, a BitsetGraph or an adjacency dictionary
+    """
+    return number_of_connected_components(graph) == 1
+
+
+class ConnectivityReport(NamedTuple):
+    """summary of the connected components of a graph"""
+
+    number_of_nodes: int
+    number_of_components: int
+    largest_component_size: int
+    # for each component other than the largest (up to a limit):
+    # its size and a few of its node IDs
+    stray_components: List[tuple]
+    edges_read: int
+    # True when the edges stopped being read because the graph was connected
+    stopped_early: bool = False
+
+    @property
+    def is_connected(self) -> bool:
+        return self.number_of_components == 1
+
+    def __str__(self) -> str:
+        lines = [
+            "%d nodes in %d connected components; the largest has %d nodes"
+            % (
+                self.number_of_nodes,
+                self.number_of_components,
+                self.largest_component_size,
+            )
+        ]
+        for size, sample in self.stray_components:
+            lines.append(
+                "  component of %d nodes, including %s"
+                % (size, ", ".join(map(str, sample)))
+            )
+        if self.stopped_early:
+            lines.append(
+                "stopped after %d edges because the graph was connected"
+                % self.edges_read
+            )
+        if len(self.stray_components) < self.number_of_components - 1:
+            lines.append(
+                "  and %d more components"
+                % (self.number_of_components - 1 - len(self.stray_components))
+            )
+        return "\n".join(lines)
+
+
+class GraphNotConnectedError(Exception):
+    """raised when a graph that must be connected is not; carries the report"""
+
+    def __init__(self, report: ConnectivityReport):
+        super().__init__("graph is not connected: " + str(report))
+        self.report = report
+
+
+def connectivity_report(
+    labels,
+    samples_per_component: int = 5,
+    max_stray_components: int = 10,
+    edges_read: int = 0,
+    stopped_early: bool = False,
+) -> ConnectivityReport:
+    """summarize a component labeling
+
+    Args:
+        labels: numpy integer array indexed by node ID; nodes in the same
+            component have the same label, a node ID of that component
+        samples_per_component: node IDs listed per stray component
+        max_stray_components: stray components listed
+        edges_read: recorded in the report
+        stopped_early: recorded in the report
+
+    Returns:
+        ConnectivityReport
+    """
+    import numpy as np
+
+    sizes = np.bincount(labels, minlength=len(labels))
+    roots = np.flatnonzero(sizes)
+    stray_components = []
+    if len(roots):
+        largest = int(np.argmax(sizes))
+        # the biggest stray components are the most informative
+        stray_roots = roots[roots != largest]
+        stray_roots = stray_roots[np.argsort(-sizes[stray_roots], kind="stable")]
+        for root in stray_roots[:max_stray_components].tolist():
+            sample = np.flatnonzero(labels == root)[:samples_per_component]
+            stray_components.append((int(sizes[root]), sample.tolist()))
+    return ConnectivityReport(
+        number_of_nodes=len(labels),
+        number_of_components=len(roots),
+        largest_component_size=int(sizes.max()) if len(roots) else 0,
+        stray_components=stray_components,
+        edges_read=edges_read,
+        stopped_early=stopped_early,
+    )
+
+
+def connected_components_report(
+    graph, samples_per_component: int = 5, max_stray_components: int = 10
+) -> ConnectivityReport:
+    """connected components of a whole graph in memory; see connectivity_report
+
+    Args:
+        graph: a CSRGraph or an adjacency dictionary
+        samples_per_component: node IDs listed per stray component
+        max_stray_components: stray components listed
+    """
+    csr = as_csr(graph)
+    return connectivity_report(
+        connected_components(csr),
+        samples_per_component,
+        max_stray_components,
+        edges_read=csr.number_of_edges(),
+    )
+
+
+class DisjointSet:
+    """union-find over node IDs with path halving and union by rank
+
+    parent and rank are array.array buffers, 8 bytes and 1 byte per node,
+    so edges can be consumed from a stream of any length in O(nodes) memory.
+    Node IDs beyond the initial size grow the buffers.
+
+    >>> components = DisjointSet(4)
+    >>> components.union_edges([(0, 1), (2, 3)])
+    2
+    >>> components.number_of_components
+    2
+    """
+
+    def __init__(self, number_of_nodes: int = 0):
+        """
+        Args:
+            number_of_nodes: node IDs 0..number_of_nodes-1 start as singletons
+        """
+        self.parent = array("q", range(number_of_nodes))
+        self.rank = array("B", bytes(number_of_nodes))
+        self.number_of_components = number_of_nodes
+        self.edges_read = 0
+        self.stopped_early = False
+
+    def __len__(self) -> int:
+        """number of nodes"""
+        return len(self.parent)
+
+    def _grow(self, node: int) -> None:
+        """add singleton nodes up to and including node"""
+        added = node + 1 - len(self.parent)
+        self.parent.extend(range(len(self.parent), node + 1))
+        self.rank.extend(bytes(added))
+        self.number_of_components += added
+
+    def find(self, node: int) -> int:
+        """the root of the set containing node"""
+        parent = self.parent
+        while parent[node] != node:
+            # path halving: point every other node at its grandparent
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, left_node: int, right_node: int) -> bool:
+        """merge the sets of two nodes
+
+        Returns:
+            whether they were in different sets
+        """
+        if max(left_node, right_node) >= len(self.parent):
+            self._grow(max(left_node, right_node))
+        left_root = self.find(left_node)
+        right_root = self.find(right_node)
+        if left_root == right_root:
+            return False
+        if self.rank[left_root] < self.rank[right_root]:
+            left_root, right_root = right_root, left_root
+        self.parent[right_root] = left_root
+        if self.rank[left_root] == self.rank[right_root]:
+            self.rank[left_root] += 1
+        self.number_of_components -= 1
+        return True
+
+    def union_edges(self, edges, stop_when_connected: bool = False) -> int:
+        """consume edges one at a time
+
+        Args:
+            edges: iterable of tuples of 2 integers, for example
+                produce_output.next_edge_in_graph(the_graph)
+            stop_when_connected: stop reading as soon as every node is in one
+                set. Only meaningful when the number of nodes is known up front
+
+        Returns:
+            number of merges
+        """
+        merges = 0
+        for left_node, right_node in edges:
+            self.edges_read += 1
+            if self.union(left_node, right_node):
+                merges += 1
+                if stop_when_connected and self.number_of_components == 1:
+                    self.stopped_early = True
+                    break
+        return merges
+
+    def union_edge_batches(self, batches, stop_when_connected: bool = False) -> int:
+        """consume numpy arrays of edges, such as graph_io.next_edge_text_batch
+
+        Args:
+            batches: iterable of integer arrays of shape (edges, 2)
+            stop_when_connected: see union_edges
+
+        Returns:
+            number of merges
+        """
+        merges = 0
+        for batch in batches:
+            # convert a slice at a time so an early exit skips the conversion
+            # of the rest of the batch
+            for start in range(0, len(batch), UNION_SLICE_EDGES):
+                merges += self.union_edges(
+                    batch[start : start + UNION_SLICE_EDGES].tolist(),
+                    stop_when_connected,
+                )
+                if self.stopped_early:
+                    return merges
+        return merges
+
+    def labels(self):
+        """the root of every node, as a numpy int64 array indexed by node ID"""
+        import numpy as np
+
+        return np.array(
+            [self.find(node) for node in range(len(self.parent))], dtype=np.int64
+        )
+
+    def report(
+        self, samples_per_component: int = 5, max_stray_components: int = 10
+    ) -> ConnectivityReport:
+        """summarize the components seen so far; see connectivity_report"""
+        return connectivity_report(
+            self.labels(),
+            samples_per_component,
+            max_stray_components,
+            edges_read=self.edges_read,
+            stopped_early=self.stopped_early,
+        )
+
+
+class ComponentLabels:
+    """connected components from a stream of numpy edge batches
+
+    DisjointSet.union_edge_batches converts every edge to Python ints and
+    merges them one at a time. This applies the vectorized hooking of
+    connected_components to a whole batch at once, keeping the labels
+    flattened between batches: 8 bytes per node, and about one pass of
+    numpy over the batch and the labels per round. The number of nodes is
+    fixed; once they are all in one component a batch is only counted.
+
+    >>> import numpy as np
+    >>> components = ComponentLabels(5)
+    >>> components.add_edge_batch(np.array([[0, 1], [3, 2]]))
+    >>> components.labels.tolist(), components.number_of_components
+    ([0, 0, 2, 2, 4], 3)
+    """
+
+    def __init__(self, number_of_nodes: int):
+        """
+        Args:
+            number_of_nodes: node IDs are 0..number_of_nodes-1
+        """
+        import numpy as np
+
+        # the smallest node ID of each component, as from connected_components
+        self.labels = np.arange(number_of_nodes, dtype=np.int64)
+        self.number_of_components = number_of_nodes
+        self.edges_read = 0
+        self.stopped_early = False
+
+    def __len__(self) -> int:
+        """number of nodes"""
+        return len(self.labels)
+
+    def add_edge_batch(self, edges) -> None:
+        """merge the components joined by an integer array of shape (edges, 2)"""
+        import numpy as np
+
+        self.edges_read += len(edges)
+        if self.number_of_components <= 1:
+            return
+        self.labels = _merge_components(self.labels, edges[:, 0], edges[:, 1])
+        # a component's label is its smallest node, which labels itself
+        self.number_of_components = int(
+            np.count_nonzero(self.labels == np.arange(len(self.labels)))
+        )
+
+    def add_edge_batches(self, batches, stop_when_connected: bool = False) -> None:
+        """consume numpy arrays of edges; see DisjointSet.union_edge_batches"""
+        for batch in batches:
+            self.add_edge_batch(batch)
+            if stop_when_connected and self.number_of_components == 1:
+                self.stopped_early = True
+                return
+
+    def report(
+        self, samples_per_component: int = 5, max_stray_components: int = 10
+    ) -> ConnectivityReport:
+        """summarize the components seen so far; see connectivity_report"""
+        return connectivity_report(
+            self.labels,
+            samples_per_component,
+            max_stray_components,
+            edges_read=self.edges_read,
+            stopped_early=self.stopped_early,
+        )
+
+
+# EOF
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+an on-disk cache of generated graphs, shared by every run on a machine
+
+A graph is stored under the SHA-256 of what determines it: the generator,
+its parameters, the seed, the backend and the versions of the code that
+draws it (produce_output, and numpy or Python for the random streams).
+Any change to one of these is a different file, so an entry never has to
+be invalidated, only evicted.
+
+Entries are CSR files (see csr_graph.py) and a hit is a MappedGraph:
+loading is O(1) and only the pages that are read come from disk.
+Each file is written under a temporary name in the cache directory and
+renamed into place, so a concurrent job sees either the whole file or no
+file. When the files total more than max_bytes, the least recently used
+are removed; a hit marks a file as used by setting its modification time.
+
+The cache directory is given explicitly or by $GRAPH_CACHE_DIR:
+
+    GRAPH_CACHE_DIR=~/.cache/graphs python3 validate_graph.py --numNodes 3000 --seed 1
+    python3 graph_cache.py --cacheDir ~/.cache/graphs
+"""
+import argparse  # https://docs.python.org/3.3/library/argparse.html
+import hashlib  # https://docs.python.org/3/library/hashlib.html
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Optional
+
+from csr_graph import CSRGraph, MappedGraph, CSR_FILE_VERSION, write_csr_graph
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIRECTORY_VARIABLE = "GRAPH_CACHE_DIR"
+MAX_BYTES_VARIABLE = "GRAPH_CACHE_MAX_BYTES"
+DEFAULT_MAX_BYTES = 4 * 2**30
+
+ENTRY_SUFFIX = ".csr"
+TEMPORARY_SUFFIX = ".tmp"
+# a temporary file this old was left by a job that died while writing
+STALE_TEMPORARY_SECONDS = 3600
+
+
+def code_versions(backend: str) -> dict:
+    """versions of the code that decide which graph a seed gives
+
+    Args:
+        backend: "python" or "numpy"; see produce_output.BACKENDS
+
+    Returns:
+        dictionary of name to version string
+    """
+    import produce_output
+
+    versions = {
+        "produce_output": produce_output.__version__,
+        "csr_file": str(CSR_FILE_VERSION),
+    }
+    if backend == "numpy":
+        import numpy as np
+
+        versions["numpy"] = np.__version__
+    else:
+        # the algorithms of the random module may change between releases
+        versions["python"] = "%d.%d" % sys.version_info[:2]
+    return versions
+
+
+def cache_key(generator: str, parameters: dict, seed, backend: str) -> str:
+    """hexadecimal SHA-256 of everything that determines a generated graph
+
+    >>> cache_key("random", {"number_of_nodes": 4}, 1, "python") == cache_key(
+    ...     "random", {"number_of_nodes": 4}, 1, "python")
+    True
+    """
+    document = {
+        "generator": generator,
+        "parameters": parameters,
+        "seed": seed,
+        "backend": backend,
+        "versions": code_versions(backend),
+    }
+    text = json.dumps(document, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _new_file_mode() -> int:
+    """the mode open() gives a new file: 0o666 less the umask"""
+    # the umask can only be read by setting it
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+class GraphCache:
+    """a directory of CSR files named by cache_key, evicted least recently used"""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            directory: where the graphs are stored; created if missing
+            max_bytes: total size of the stored graphs kept after a write
+        """
+        logger.info("[trace: GraphCache.__init__]")
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return "GraphCache(%r, max_bytes=%d)" % (self.directory, self.max_bytes)
+
+    def path(self, key: str) -> str:
+        """filename of the entry for key"""
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key: str) -> Optional[MappedGraph]:
+        """the stored graph, memory-mapped, or None"""
+        logger.info("[trace: GraphCache.get]")
+        filename = self.path(key)
+        try:
+            os.utime(filename)
+            graph = MappedGraph(filename)
+        except FileNotFoundError:
+            # never written, or evicted by another job
+            self.misses += 1
+            return None
+        except ValueError:
+            # cut short by a crash after the rename; written again by put
+            logger.warning("removing unreadable cache entry " + filename)
+            self._remove(filename)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return graph
+
+    def put(self, key: str, graph) -> str:
+        """store a graph, then evict the least recently used entries
+
+        Args:
+            key: from cache_key
+            graph: a CSRGraph or an adjacency dictionary
+
+        Returns:
+            filename of the entry
+        """
+        logger.info("[trace: GraphCache.put]")
+        if isinstance(graph, dict):
+            graph = CSRGraph.from_dict(graph)
+        filename = self.path(key)
+        # same directory, so the rename stays on one file system and is atomic
+        handle, temporary = tempfile.mkstemp(
+            dir=self.directory, prefix=key[:16] + ".", suffix=TEMPORARY_SUFFIX
+        )
+        os.close(handle)
+        try:
+            # mkstemp makes the file private (0o600) and the rename keeps
+            # that mode; a cache shared by every run needs the usual mode
+            os.chmod(temporary, _new_file_mode())
+            write_csr_graph(graph, temporary)
+            os.replace(temporary, filename)
+        except BaseException:
+            self._remove(temporary)
+            raise
+        self.evict(keep=filename)
+        return filename
+
+    def get_or_create(self, key: str, create):
+        """the stored graph, or create() stored and then returned
+
+        Args:
+            key: from cache_key
+            create: function of no arguments returning a CSRGraph or an
+                adjacency dictionary
+
+        Returns:
+            a MappedGraph, or what create returned if it is larger than
+            max_bytes on its own
+        """
+        logger.info("[trace: GraphCache.get_or_create]")
+        graph = self.get(key)
+        if graph is not None:
+            return graph
+        graph = create()
+        filename = self.put(key, graph)
+        try:
+            # the same type as a hit on the next run
+            return MappedGraph(filename)
+        except FileNotFoundError:
+            # already evicted
+            return graph
+
+    def entries(self):
+        """(modification time, size in bytes, filename) of each stored graph"""
+        found = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(ENTRY_SUFFIX):
+                continue
+            try:
+                status = entry.stat()
+            except FileNotFoundError:
+                continue
+            found.append((status.st_mtime, status.st_size, entry.path))
+        return found
+
+    def _remove_stale_temporaries(self) -> None:
+        """remove the temporary files of jobs that died while writing"""
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(TEMPORARY_SUFFIX):
+                continue
+            try:
+                age = time.time() - entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if age > STALE_TEMPORARY_SECONDS:
+                self._remove(entry.path)
+
+    def evict(self, keep: str = None) -> int:
+        """remove the least recently used graphs until max_bytes is respected
+
+        Args:
+            keep: filename removed only if it alone is larger than max_bytes
+
+        Returns:
+            number of graphs removed
+        """
+        logger.info("[trace: GraphCache.evict]")
+        self._remove_stale_temporaries()
+        entries = sorted(self.entries())
+        total_bytes = sum(size for _, size, _ in entries)
+        # the kept file goes last, whatever its time
+        entries.sort(key=lambda entry: entry[2] == keep)
+        removed = 0
+        for _, size, filename in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            # a MappedGraph already open on the file keeps reading it
+            self._remove(filename)
+            total_bytes -= size
+            removed += 1
+        return removed
+
+    def total_bytes(self) -> int:
+        """size of the stored graphs"""
+        return sum(size for _, size, _ in self.entries())
+
+    @staticmethod
+    def _remove(filename: str) -> None:
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
+            # another job removed it first
+            pass
+
+
+def open_cache(directory: str = None) -> Optional[GraphCache]:
+    """the cache in directory, or in $GRAPH_CACHE_DIR
+
+    The size bound is $GRAPH_CACHE_MAX_BYTES, default DEFAULT_MAX_BYTES.
+
+    Returns:
+        a GraphCache, or None when no directory is configured
+    """
+    directory = directory or os.environ.get(CACHE_DIRECTORY_VARIABLE)
+    if not directory:
+        return None
+    max_bytes = int(os.environ.get(MAX_BYTES_VARIABLE, DEFAULT_MAX_BYTES))
+    return GraphCache(directory, max_bytes)
+
+
+def cached_random_graph(
+    number_of_nodes: int, backend: str = "numpy", seed=None, cache=None
+) -> CSRGraph:
+    """produce_output.create_random_graph(..., fmt="csr"), through a cache
+
+    Without a seed every call is a different graph, so nothing is cached.
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        backend: "python" or "numpy"; see produce_output.BACKENDS
+        seed: random seed
+        cache: a GraphCache, or None to always generate
+
+    Returns:
+        a MappedGraph on a hit, otherwise the generated CSRGraph stored
+        and mapped again
+    """
+    logger.info("[trace: cached_random_graph]")
+    import produce_output
+
+    def create():
+        return produce_output.create_random_graph(
+            number_of_nodes, backend, seed, fmt="csr"
+        )
+
+    if cache is None or seed is None:
+        return create()
+    key = cache_key("random", {"number_of_nodes": number_of_nodes}, seed, backend)
+    return cache.get_or_create(key, create)
+
+
+if __name__ == "__main__":
+
+    theparser = argparse.ArgumentParser(
+        description="show or trim the graph cache", allow_abbrev=False
+    )
+    theparser.add_argument(
+        "--cacheDir",
+        type=str,
+        default=None,
+        help="cache directory. Default is $" + CACHE_DIRECTORY_VARIABLE,
+    )
+    theparser.add_argument(
+        "--maxBytes",
+        type=int,
+        default=None,
+        help="evict least recently used graphs down to this many bytes",
+    )
+    theparser.add_argument(
+        "--clear", action="store_true", default=False, help="remove every graph"
+    )
+    args = theparser.parse_args()
+
+    cache = open_cache(args.cacheDir)
+    if cache is None:
+        theparser.error("give --cacheDir or set " + CACHE_DIRECTORY_VARIABLE)
+    if args.clear:
+        args.maxBytes = 0
+    if args.maxBytes is not None:
+        cache.max_bytes = args.maxBytes
+        print("removed %d graphs" % cache.evict())
+    entries = cache.entries()
+    print(
+        "%s: %d graphs, %d bytes"
+        % (cache.directory, len(entries), sum(size for _, size, _ in entries))
+    )
+
+# EOF
@@ -0,0 +1,612 @@
+#!/usr/bin/env python3
+"""
+bulk writers for the edge list of a graph
+
+print(edge_tuple) once per edge spends most of its time in per-call
+overhead (formatting, encoding and a write per edge). These writers format
+all the edges of a node in one string operation and hand large chunks of
+bytes to a binary stream such as sys.stdout.buffer
+
+line formats:
+* "tuple": "(0, 1)" per line; identical to print(edge_tuple)
+* "tsv": "0<TAB>1" per line
+
+binary format ("binary"), little-endian:
+* 24-byte header: magic b"EDGE", uint16 version, uint16 reserved (0),
+  int64 number of nodes, int64 number of edges (-1 if unknown)
+* one int32 pair (left node, right node) per edge
+The reader maps the pairs into a numpy array without per-edge Python objects
+
+JSON adjacency, the same schema as json_schema.py, one node per line:
+    {
+    "0":[1,2],
+    "1":[]
+    }
+The writer emits it node by node and next_node_in_json reads any JSON
+object of this shape node by node, so neither holds the whole document
+"""
+import sys
+import json  # https://docs.python.org/3/library/json.html
+import logging
+import mmap  # https://docs.python.org/3/library/mmap.html
+import struct  # https://docs.python.org/3/library/struct.html
+from array import array  # https://docs.python.org/3/library/array.html
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+LINE_FORMATS = ("tuple", "tsv")
+OUTPUT_FORMATS = LINE_FORMATS + ("binary",)
+
+BINARY_MAGIC = b"EDGE"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sHHqq")
+# written in the header when the edges are streamed to an unseekable output;
+# the reader then takes every pair up to the end of the data
+UNKNOWN_EDGE_COUNT = -1
+
+# characters read per step by next_node_in_json
+READ_CHUNK_CHARS = 2**20
+
+# bytes read per step by read_edge_text; each block is parsed in one numpy call
+READ_BLOCK_BYTES = 2**24
+
+# bytes of text checked for 2 node IDs per line at a time; see
+# _check_two_node_ids_per_line
+CHECK_BLOCK_BYTES = 2**16
+
+# read_edge_text turns the punctuation of both line formats into spaces
+_EDGE_TEXT_PUNCTUATION = bytes.maketrans(b"(),\t", b"    ")
+
+# number of characters to accumulate before each write;
+# 1MB amortizes the write call without holding much memory
+WRITE_CHUNK_CHARS = 2**20
+
+
+def write_neighbor_lists(neighbor_lists, out=None, line_format: str = "tuple") -> int:
+    """write the edges of every node, one edge per line
+
+    Args:
+        neighbor_lists: iterable of (node ID, list of neighbor node IDs),
+            for example the_graph.items()
+        out: binary stream to write to. Default is sys.stdout.buffer
+        line_format: "tuple" or "tsv"; see LINE_FORMATS
+
+    Returns:
+        number of edges written
+
+    >>> import io
+    >>> out = io.BytesIO()
+    >>> write_neighbor_lists({0: [1, 2], 1: [], 2: [0]}.items(), out)
+    3
+    >>> out.getvalue()
+    b'(0, 1)\\n(0, 2)\\n(2, 0)\\n'
+    """
+    logger.info("[trace: write_neighbor_lists]")
+    if line_format == "tuple":
+        begin, separator, end = "(%d, ", ")\n(%d, ", ")\n"
+    elif line_format == "tsv":
+        begin, separator, end = "%d\t", "\n%d\t", "\n"
+    else:
+        raise ValueError("unknown line format " + str(line_format))
+    if out is None:
+        out = sys.stdout.buffer
+
+    number_of_edges = 0
+    pending = []
+    pending_chars = 0
+    for left_node, list_of_nodes in neighbor_lists:
+        if not len(list_of_nodes):
+            continue
+        # all the lines of one node share the left node ID,
+        # so one join over the right node IDs formats them all
+        lines = (
+            begin % left_node
+            + (separator % left_node).join(map(str, list_of_nodes))
+            + end
+        )
+        pending.append(lines)
+        pending_chars += len(lines)
+        number_of_edges += len(list_of_nodes)
+        if pending_chars >= WRITE_CHUNK_CHARS:
+            out.write("".join(pending).encode("ascii"))
+            pending = []
+            pending_chars = 0
+    out.write("".join(pending).encode("ascii"))
+    out.flush()
+    return number_of_edges
+
+
+def write_edges(edges, out=None, line_format: str = "tuple") -> int:
+    """write an iterable of edge tuples, one edge per line
+
+    Use write_neighbor_lists when the edges are grouped by node;
+    it formats many edges per string operation.
+
+    Args:
+        edges: iterable of tuples of 2 integers
+        out: binary stream to write to. Default is sys.stdout.buffer
+        line_format: "tuple" or "tsv"; see LINE_FORMATS
+
+    Returns:
+        number of edges written
+    """
+    logger.info("[trace: write_edges]")
+    return write_neighbor_lists(
+        ((left_node, (right_node,)) for left_node, right_node in edges),
+        out,
+        line_format,
+    )
+
+
+def write_binary_edges(
+    neighbor_lists,
+    number_of_nodes: int,
+    out=None,
+    number_of_edges: int = UNKNOWN_EDGE_COUNT,
+) -> int:
+    """write the edges of every node in the binary format
+
+    Args:
+        neighbor_lists: iterable of (node ID, list of neighbor node IDs),
+            for example the_graph.items()
+        number_of_nodes: recorded in the header
+        out: binary stream to write to. Default is sys.stdout.buffer
+        number_of_edges: recorded in the header. If not known in advance
+            and out is seekable, the header is patched after the last edge
+
+    Returns:
+        number of edges written
+    """
+    logger.info("[trace: write_binary_edges]")
+    if out is None:
+        out = sys.stdout.buffer
+    patch_header = number_of_edges == UNKNOWN_EDGE_COUNT and out.seekable()
+    if patch_header:
+        header_position = out.tell()
+    out.write(
+        BINARY_HEADER.pack(
+            BINARY_MAGIC, BINARY_VERSION, 0, number_of_nodes, number_of_edges
+        )
+    )
+
+    edges_written = 0
+    pending = array("i")
+    for left_node, list_of_nodes in neighbor_lists:
+        count = len(list_of_nodes)
+        if not count:
+            continue
+        # interleave (left, right) pairs with two strided slice assignments
+        pairs = array("i", [left_node]) * (2 * count)
+        pairs[1::2] = array("i", list_of_nodes)
+        pending.extend(pairs)
+        edges_written += count
+        if len(pending) * pending.itemsize >= WRITE_CHUNK_CHARS:
+            _write_little_endian(out, pending)
+            pending = array("i")
+    _write_little_endian(out, pending)
+
+    if number_of_edges not in (UNKNOWN_EDGE_COUNT, edges_written):
+        raise ValueError(
+            "header promised %d edges but %d were written"
+            % (number_of_edges, edges_written)
+        )
+    if patch_header:
+        end_position = out.tell()
+        out.seek(header_position)
+        out.write(
+            BINARY_HEADER.pack(
+                BINARY_MAGIC, BINARY_VERSION, 0, number_of_nodes, edges_written
+            )
+        )
+        out.seek(end_position)
+    out.flush()
+    return edges_written
+
+
+def _write_little_endian(out, values: array) -> None:
+    """write an array of int32 in little-endian byte order"""
+    if sys.byteorder == "big":
+        values.byteswap()
+    out.write(values.tobytes())
+
+
+def is_binary_edge_stream(stream) -> bool:
+    """whether a buffered binary stream starts with the binary edge magic
+
+    Nothing is consumed from the stream, so a text reader can still be used
+    when this returns False.
+
+    Args:
+        stream: a io.BufferedReader, for example sys.stdin.buffer
+    """
+    return stream.peek(len(BINARY_MAGIC))[: len(BINARY_MAGIC)] == BINARY_MAGIC
+
+
+def read_binary_edges(source):
+    """read edges written by write_binary_edges
+
+    A filename is memory-mapped, so the returned array is a view of the
+    page cache. A stream is read into one buffer which numpy then views.
+    Either way no Python object is created per edge.
+
+    Args:
+        source: a filename or a binary stream such as sys.stdin.buffer
+
+    Returns:
+        number_of_nodes: from the header
+        edges: numpy int32 array of shape (number of edges, 2);
+        column 0 is the left node and column 1 is the right node
+    """
+    logger.info("[trace: read_binary_edges]")
+    import numpy as np  # https://numpy.org/doc/stable/reference/generated/numpy.frombuffer.html
+
+    buffer: Union[bytes, mmap.mmap]
+    if isinstance(source, str):
+        with open(source, "rb") as file_handle:
+            # an empty file cannot be mapped; the header check reports it
+            if file_handle.seek(0, 2) == 0:
+                buffer = b""
+            else:
+                buffer = mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        buffer = source.read()
+
+    number_of_nodes, number_of_edges = _unpack_binary_header(buffer)
+    available_edges = (len(buffer) - BINARY_HEADER.size) // 8
+    if number_of_edges == UNKNOWN_EDGE_COUNT:
+        number_of_edges = available_edges
+    elif number_of_edges > available_edges:
+        raise ValueError(
+            "binary edge list is truncated: header says %d edges, found %d"
+            % (number_of_edges, available_edges)
+        )
+    edges = np.frombuffer(
+        buffer, dtype="<i4", count=2 * number_of_edges, offset=BINARY_HEADER.size
+    ).reshape(-1, 2)
+    return number_of_nodes, edges
+
+
+def _unpack_binary_header(buffer):
+    """validate the header of a binary edge list
+
+    Returns:
+        number_of_nodes, number_of_edges
+    """
+    if len(buffer) < BINARY_HEADER.size:
+        raise ValueError("not a binary edge list: missing header")
+    magic, version, _, number_of_nodes, number_of_edges = BINARY_HEADER.unpack_from(
+        buffer
+    )
+    if magic != BINARY_MAGIC:
+        raise ValueError("not a binary edge list: bad magic " + repr(magic))
+    if version != BINARY_VERSION:
+        raise ValueError("unsupported binary edge list version " + str(version))
+    return number_of_nodes, number_of_edges
+
+
+def read_edge_text(stream):
+    """read an edge list in the "tuple" or "tsv" line format
+
+    The stream is read in large blocks cut at a line boundary. Each block
+    has its punctuation translated to spaces and is converted to integers
+    by one numpy.fromstring call, so there is no per-line Python work.
+
+    Args:
+        stream: a binary stream such as sys.stdin.buffer
+
+    Returns:
+        number_of_nodes: one more than the largest node ID seen
+        edges: numpy int32 array of shape (number of edges, 2);
+        column 0 is the left node and column 1 is the right node
+
+    >>> import io
+    >>> number_of_nodes, edges = read_edge_text(io.BytesIO(b"(0, 2)\\n(2, 1)\\n"))
+    >>> number_of_nodes, edges.tolist()
+    (3, [[0, 2], [2, 1]])
+    """
+    logger.info("[trace: read_edge_text]")
+    import numpy as np
+
+    edges = np.concatenate(
+        [np.zeros((0, 2), dtype=np.int32)] + list(next_edge_text_batch(stream))
+    )
+    number_of_nodes = int(edges.max()) + 1 if len(edges) else 0
+    return number_of_nodes, edges
+
+
+def next_edge_text_batch(stream):
+    """generate the edges of a "tuple" or "tsv" edge list one block at a time
+
+    Memory is one block (READ_BLOCK_BYTES) whatever the length of the stream.
+
+    Args:
+        stream: a binary stream such as sys.stdin.buffer
+
+    Returns:
+        generator of numpy int32 arrays of shape (edges in the block, 2)
+    """
+    logger.info("[trace: next_edge_text_batch]")
+    import warnings
+    import numpy as np  # https://numpy.org/doc/stable/reference/generated/numpy.fromstring.html
+
+    remainder = b""
+    lines_before = 0
+    while True:
+        data = stream.read(READ_BLOCK_BYTES)
+        if data:
+            data = remainder + data
+            cut = data.rfind(b"\n") + 1
+            block, remainder = data[:cut], data[cut:]
+        else:
+            block, remainder = remainder, b""
+        block = block.translate(_EDGE_TEXT_PUNCTUATION)
+        if block.strip():
+            with warnings.catch_warnings():
+                # numpy warns, rather than raises, when it stops at unparsable text
+                warnings.simplefilter("error")
+                try:
+                    numbers = np.fromstring(block, dtype=np.int64, sep=" ")
+                except (ValueError, DeprecationWarning) as error:
+                    raise ValueError("malformed edge list: " + str(error)) from None
+            _check_two_node_ids_per_line(block, lines_before)
+            if numbers.min() < 0 or numbers.max() > np.iinfo(np.int32).max:
+                raise ValueError("node IDs must be in 0..2**31-1")
+            yield numbers.astype(np.int32).reshape(-1, 2)
+        lines_before += block.count(b"\n")
+        if not data:
+            break
+
+
+def _check_two_node_ids_per_line(block: bytes, lines_before: int = 0) -> None:
+    """raise ValueError unless every line of block holds 0 or 2 numbers
+
+    numpy.fromstring reads the block as one sequence, so "(0)\\n(1)\\n"
+    would otherwise pair into the edge (0, 1). A number starts where a
+    non-blank byte follows a blank one; listing the starts and the newlines
+    in order of position, the numbers of a line are those between two
+    newlines. The block is checked CHECK_BLOCK_BYTES at a time, so the
+    masks take little memory next to the parsed numbers.
+
+    Args:
+        block: lines with their punctuation already turned into spaces
+        lines_before: lines of the stream before block, for the message
+    """
+    import numpy as np  # https://numpy.org/doc/stable/reference/generated/numpy.flatnonzero.html
+
+    start = 0
+    while start < len(block):
+        # whole lines, unless a single line is longer than CHECK_BLOCK_BYTES
+        stop = block.rfind(b"\n", start, start + CHECK_BLOCK_BYTES) + 1
+        if stop <= start:
+            stop = block.find(b"\n", start) + 1 or len(block)
+        characters = np.frombuffer(
+            block, dtype=np.uint8, count=stop - start, offset=start
+        )
+        blank = characters <= ord(" ")
+        newline = characters == ord("\n")
+        starts = np.empty_like(blank)
+        starts[0] = not blank[0]
+        np.greater(blank[:-1], blank[1:], out=starts[1:])
+        is_newline = newline[np.flatnonzero(starts | newline)]
+        # the last "line" is what follows the last newline, usually nothing
+        boundaries = np.concatenate(
+            (np.array([-1]), np.flatnonzero(is_newline), np.array([len(is_newline)]))
+        )
+        per_line = np.diff(boundaries) - 1
+        bad_lines = np.flatnonzero((per_line != 0) & (per_line != 2))
+        if len(bad_lines):
+            raise ValueError(
+                "malformed edge list: line %d has %d node IDs, not 2"
+                % (lines_before + bad_lines[0] + 1, per_line[bad_lines[0]])
+            )
+        lines_before += len(per_line) - 1
+        start = stop
+
+
+def open_binary_edge_batches(source):
+    """read the header of a binary edge list and stream its edges in blocks
+
+    Unlike read_binary_edges, only one block is in memory at a time, so
+    the input can be larger than RAM even when it is a pipe.
+
+    Args:
+        source: a filename or a binary stream such as sys.stdin.buffer
+
+    Returns:
+        number_of_nodes: from the header
+        batches: generator of numpy int32 arrays of shape (edges, 2)
+    """
+    logger.info("[trace: open_binary_edge_batches]")
+    stream = open(source, "rb") if isinstance(source, str) else source
+    header = stream.read(BINARY_HEADER.size)
+    number_of_nodes, number_of_edges = _unpack_binary_header(header)
+    return number_of_nodes, _next_binary_edge_batch(stream, number_of_edges)
+
+
+def _next_binary_edge_batch(stream, number_of_edges: int):
+    """body of open_binary_edge_batches; the stream is past the header"""
+    import numpy as np
+
+    remaining = number_of_edges
+    leftover = b""
+    while remaining:
+        data = stream.read(READ_BLOCK_BYTES)
+        if not data:
+            if remaining != UNKNOWN_EDGE_COUNT:
+                raise ValueError("binary edge list is truncated")
+            break
+        data = leftover + data
+        usable = len(data) // 8
+        if remaining != UNKNOWN_EDGE_COUNT:
+            usable = min(usable, remaining)
+            remaining -= usable
+        leftover = data[8 * usable :]
+        yield np.frombuffer(data, dtype="<i4", count=2 * usable).reshape(-1, 2)
+
+
+def write_json_adjacency(neighbor_lists, out=None) -> int:
+    """write a graph as a JSON object, one node per line
+
+    Args:
+        neighbor_lists: iterable of (node ID, list of neighbor node IDs),
+            for example the_graph.items()
+        out: binary stream to write to. Default is sys.stdout.buffer
+
+    Returns:
+        number of nodes written
+
+    >>> import io
+    >>> out = io.BytesIO()
+    >>> write_json_adjacency({0: [1, 2], 1: []}.items(), out)
+    2
+    >>> print(out.getvalue().decode(), end="")
+    {
+    "0":[1,2],
+    "1":[]
+    }
+    """
+    logger.info("[trace: write_json_adjacency]")
+    if out is None:
+        out = sys.stdout.buffer
+
+    number_of_nodes = 0
+    pending = ["{"]
+    pending_chars = 0
+    separator = "\n"
+    for node_id, list_of_nodes in neighbor_lists:
+        line = '%s"%d":[%s]' % (separator, node_id, ",".join(map(str, list_of_nodes)))
+        separator = ",\n"
+        pending.append(line)
+        pending_chars += len(line)
+        number_of_nodes += 1
+        if pending_chars >= WRITE_CHUNK_CHARS:
+            out.write("".join(pending).encode("ascii"))
+            pending = []
+            pending_chars = 0
+    pending.append("\n}\n")
+    out.write("".join(pending).encode("ascii"))
+    out.flush()
+    return number_of_nodes
+
+
+def next_node_in_json(source):
+    """generate (node ID, list of neighbors) from a JSON adjacency object
+
+    The document is read in chunks and each member is decoded on its own,
+    so memory is one chunk plus one list of neighbors, whatever the size of
+    the file. Any formatting is accepted, including json.dumps(indent=2).
+
+    Args:
+        source: a filename or a text stream
+
+    Returns:
+        generator of (integer node ID, list of neighbor node IDs)
+
+    >>> import io
+    >>> list(next_node_in_json(io.StringIO('{"0": [1, 2], "1": []}')))
+    [(0, [1, 2]), (1, [])]
+    """
+    logger.info("[trace: next_node_in_json]")
+    for key, value in next_member_in_json(source):
+        if not isinstance(value, list):
+            raise ValueError("expected a JSON object of node ID to list of nodes")
+        yield int(key), value
+
+
+def next_member_in_json(source):
+    """generate (key, value) of each member of a JSON object, as written
+
+    Like next_node_in_json, but the key is the string in the file and the
+    value is whatever it decodes to; for validating the document.
+
+    Args:
+        source: a filename or a text stream
+
+    Returns:
+        generator of (string, decoded JSON value)
+
+    Raises:
+        ValueError: the document is not a JSON object, or has more than
+            whitespace after it
+    """
+    logger.info("[trace: next_member_in_json]")
+    if isinstance(source, str):
+        with open(source) as json_file:
+            yield from next_member_in_json(json_file)
+        return
+
+    decoder = json.JSONDecoder()
+    reader = _JSONChunkReader(source)
+    reader.expect("{")
+    if reader.peek() != "}":
+        while True:
+            key = reader.decode(decoder)
+            if not isinstance(key, str):
+                raise ValueError("expected a string key in the JSON object")
+            reader.expect(":")
+            yield key, reader.decode(decoder)
+            if reader.peek() == "}":
+                break
+            reader.expect(",")
+    reader.expect("}")
+    reader.expect_end()
+
+
+class _JSONChunkReader:
+    """a cursor over a text stream that is read one chunk at a time"""
+
+    def __init__(self, source):
+        self.source = source
+        self.buffer = ""
+        self.position = 0
+        self.at_end = False
+
+    def _read_more(self) -> None:
+        """append the next chunk, dropping what has been consumed"""
+        chunk = self.source.read(max(READ_CHUNK_CHARS, len(self.buffer)))
+        if not chunk:
+            self.at_end = True
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+
+    def peek(self) -> str:
+        """the next non-whitespace character, or "" at the end"""
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in " \t\n\r"
+            ):
+                self.position += 1
+            if self.position < len(self.buffer) or self.at_end:
+                return self.buffer[self.position : self.position + 1]
+            self._read_more()
+
+    def expect(self, character: str) -> None:
+        """consume the next non-whitespace character, which must be character"""
+        found = self.peek()
+        if found != character:
+            raise ValueError("expected %r in JSON, found %r" % (character, found))
+        self.position += 1
+
+    def expect_end(self) -> None:
+        """raise ValueError unless only whitespace is left, as json.load does"""
+        found = self.peek()
+        if found:
+            raise ValueError("extra data after the JSON object: %r" % found)
+
+    def decode(self, decoder):
+        """decode the next JSON value, reading more until it is complete"""
+        self.peek()
+        while True:
+            try:
+                value, self.position = decoder.raw_decode(self.buffer, self.position)
+                return value
+            except json.JSONDecodeError:
+                if self.at_end:
+                    raise
+                # the value may continue past the end of the buffer
+                self._read_more()
+
+
+# EOF
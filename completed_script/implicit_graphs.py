@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+graphs whose neighbors are computed from the node ID instead of stored
+
+create_fully_connected_graph used to hold n lists of n-1 ints, n^2 boxed
+references; at 10000 nodes memory was the bottleneck. The adjacency of a
+ring, a complete graph, a square grid and a hexagonal lattice is a closed
+form of the node ID, so these classes store only the size. They are
+read-only mappings with the same interface as the adjacency dictionary,
+
+    graph[node], len(graph), graph.items(), graph.keys()
+
+so they can be passed to graph_io's writers, write_csr_file,
+CSRGraph.from_dict and next_edge_in_graph as they are. Each neighbor list
+is built when it is asked for; the neighbors of a complete graph are a
+sequence object that stores two integers. dict(graph) materializes.
+
+edge_batches yields the edges as numpy arrays, computed a block of nodes
+at a time, for DisjointSet.union_edge_batches and
+DegreeCounter.add_edge_batches.
+
+Node IDs are 0..len(graph)-1, neighbors are listed in increasing order,
+and the grid and hexagonal lattices list every edge in both directions.
+"""
+from abc import ABC, abstractmethod
+from collections.abc import Mapping, Sequence
+import itertools
+import logging
+import math
+from typing import Optional
+
+from csr_graph import CSRGraph, EDGE_BATCH_EDGES
+
+logger = logging.getLogger(__name__)
+
+
+class ImplicitGraph(Mapping, ABC):
+    """adjacency mapping whose neighbor lists are computed on demand
+
+    Subclasses define neighbors, max_degree and _neighbor_arrays.
+    """
+
+    # the most neighbors any node has; sizes the blocks of edge_batches
+    max_degree = 0
+
+    def __init__(self, number_of_nodes: int):
+        """
+        Args:
+            number_of_nodes: node IDs are 0..number_of_nodes-1
+        """
+        if number_of_nodes < 0:
+            raise ValueError("invalid number of nodes")
+        self.number_of_nodes = number_of_nodes
+
+    def __len__(self) -> int:
+        """number of nodes"""
+        return self.number_of_nodes
+
+    def __iter__(self):
+        return iter(range(self.number_of_nodes))
+
+    def __contains__(self, node) -> bool:
+        return isinstance(node, int) and 0 <= node < self.number_of_nodes
+
+    def __getitem__(self, node):
+        if node not in self:
+            raise KeyError(node)
+        return self.neighbors(node)
+
+    def __repr__(self) -> str:
+        return "%s(nodes=%d)" % (type(self).__name__, self.number_of_nodes)
+
+    @abstractmethod
+    def neighbors(self, node: int):
+        """the node IDs listed for node, in increasing order"""
+
+    def degree(self, node: int) -> int:
+        """number of neighbors listed for node"""
+        return len(self.neighbors(node))
+
+    def number_of_edges(self) -> int:
+        """number of listed edges; an undirected edge counts twice"""
+        return int(self.out_degrees().sum())
+
+    def out_degrees(self):
+        """number of neighbors listed for each node, as a numpy int64 array"""
+        import numpy as np
+
+        degrees = np.zeros(self.number_of_nodes, dtype=np.int64)
+        rows = max(1, EDGE_BATCH_EDGES // max(self.max_degree, 1))
+        for start in range(0, self.number_of_nodes, rows):
+            stop = min(start + rows, self.number_of_nodes)
+            left_nodes, _ = self._neighbor_arrays(start, stop)
+            # the edges of a block are those of its own rows
+            degrees[start:stop] = np.bincount(
+                left_nodes - start, minlength=stop - start
+            )
+        return degrees
+
+    def edges(self):
+        """generate every edge as a tuple of 2 integers, in node order"""
+        for left_node in range(self.number_of_nodes):
+            for right_node in self.neighbors(left_node):
+                yield (left_node, right_node)
+
+    def edge_batches(self, batch_edges: int = EDGE_BATCH_EDGES):
+        """generate the edges as numpy arrays, in the same order as edges()
+
+        Args:
+            batch_edges: about how many edges per array; a node's neighbors
+                are never split, so an array may hold max_degree edges more
+
+        Returns:
+            generator of numpy int64 arrays of shape (edges, 2)
+        """
+        import numpy as np
+
+        rows = max(1, batch_edges // max(self.max_degree, 1))
+        for start in range(0, self.number_of_nodes, rows):
+            left_nodes, right_nodes = self._neighbor_arrays(
+                start, min(start + rows, self.number_of_nodes)
+            )
+            yield np.column_stack((left_nodes, right_nodes))
+
+    def to_csr(self) -> CSRGraph:
+        """materialize as a CSRGraph backed by numpy buffers
+
+        Returns:
+            CSRGraph with int64 offsets and int32 indices
+        """
+        logger.info("[trace: to_csr]")
+        import numpy as np
+
+        # one pass into buffers sized for max_degree neighbors per node;
+        # the unused tail of indices is released at the end, in place
+        offsets = np.zeros(self.number_of_nodes + 1, dtype=np.int64)
+        indices = np.empty(self.number_of_nodes * self.max_degree, dtype=np.int32)
+        position = 0
+        rows = max(1, EDGE_BATCH_EDGES // max(self.max_degree, 1))
+        for start in range(0, self.number_of_nodes, rows):
+            stop = min(start + rows, self.number_of_nodes)
+            left_nodes, right_nodes = self._neighbor_arrays(start, stop)
+            offsets[start + 1 : stop + 1] = np.bincount(
+                left_nodes - start, minlength=stop - start
+            )
+            indices[position : position + len(right_nodes)] = right_nodes
+            position += len(right_nodes)
+        np.cumsum(offsets, out=offsets)
+        indices.resize(position, refcheck=False)
+        return CSRGraph(offsets, indices)
+
+    @abstractmethod
+    def _neighbor_arrays(self, start: int, stop: int):
+        """left and right node of the edges of nodes start..stop-1
+
+        Returns:
+            two numpy int64 arrays, in the order of edges()
+        """
+
+
+class RingGraph(ImplicitGraph):
+    """directed cycle: node i lists only node (i+1) % number_of_nodes
+
+    https://networkx.org/documentation/stable/reference/generated/networkx.generators.classic.cycle_graph.html
+
+    >>> dict(RingGraph(4))
+    {0: [1], 1: [2], 2: [3], 3: [0]}
+    """
+
+    max_degree = 1
+
+    def neighbors(self, node: int):
+        return [(node + 1) % self.number_of_nodes]
+
+    def degree(self, node: int) -> int:
+        return 1
+
+    def number_of_edges(self) -> int:
+        return self.number_of_nodes
+
+    def out_degrees(self):
+        import numpy as np
+
+        return np.ones(self.number_of_nodes, dtype=np.int64)
+
+    def _neighbor_arrays(self, start: int, stop: int):
+        import numpy as np
+
+        left_nodes = np.arange(start, stop, dtype=np.int64)
+        return left_nodes, (left_nodes + 1) % self.number_of_nodes
+
+
+class AllNodesExcept(Sequence):
+    """the node IDs 0..number_of_nodes-1 without one, stored as two integers
+
+    >>> list(AllNodesExcept(4, 1))
+    [0, 2, 3]
+    """
+
+    def __init__(self, number_of_nodes: int, node: int):
+        self.number_of_nodes = number_of_nodes
+        self.node = node
+
+    def __len__(self) -> int:
+        return self.number_of_nodes - 1
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[x] for x in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("neighbor position out of range")
+        return position if position < self.node else position + 1
+
+    def __iter__(self):
+        return itertools.chain(
+            range(self.node), range(self.node + 1, self.number_of_nodes)
+        )
+
+    def __contains__(self, other) -> bool:
+        return other != self.node and other in range(self.number_of_nodes)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple, range, AllNodesExcept)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return "AllNodesExcept(%d, %d)" % (self.number_of_nodes, self.node)
+
+
+class CompleteGraph(ImplicitGraph):
+    """every node lists every other node
+
+    https://networkx.org/documentation/stable/reference/generated/networkx.generators.classic.complete_graph.html
+
+    >>> {node: list(neighbors) for node, neighbors in CompleteGraph(3).items()}
+    {0: [1, 2], 1: [0, 2], 2: [0, 1]}
+    """
+
+    def __init__(self, number_of_nodes: int):
+        super().__init__(number_of_nodes)
+        self.max_degree = max(number_of_nodes - 1, 0)
+
+    def neighbors(self, node: int):
+        return AllNodesExcept(self.number_of_nodes, node)
+
+    def degree(self, node: int) -> int:
+        return self.number_of_nodes - 1
+
+    def number_of_edges(self) -> int:
+        return self.number_of_nodes * max(self.number_of_nodes - 1, 0)
+
+    def out_degrees(self):
+        import numpy as np
+
+        return np.full(self.number_of_nodes, self.max_degree, dtype=np.int64)
+
+    def _neighbor_arrays(self, start: int, stop: int):
+        import numpy as np
+
+        others = self.number_of_nodes - 1
+        left_nodes = np.repeat(np.arange(start, stop, dtype=np.int64), others)
+        # position j of row i is node j, or j+1 once past i itself
+        right_nodes = np.tile(np.arange(others, dtype=np.int64), stop - start)
+        right_nodes += right_nodes >= left_nodes
+        return left_nodes, right_nodes
+
+
+class GridGraph(ImplicitGraph):
+    """square lattice, node i at row i // width and column i % width
+
+    Each node lists the nodes above, left, right and below it that exist.
+    When number_of_nodes is not a multiple of width the last row is partial.
+    With periodic boundaries the last column is joined to the first and the
+    last row to the first, so every node has 4 neighbors (a torus).
+    https://networkx.org/documentation/stable/reference/generated/networkx.generators.lattice.grid_2d_graph.html
+
+    >>> dict(GridGraph(6, width=3))
+    {0: [1, 3], 1: [0, 2, 4], 2: [1, 5], 3: [0, 4], 4: [1, 3, 5], 5: [2, 4]}
+    >>> GridGraph(9, width=3, periodic=True)[0]
+    [1, 2, 3, 6]
+    """
+
+    max_degree = 4
+
+    def __init__(
+        self, number_of_nodes: int, width: Optional[int] = None, periodic=False
+    ):
+        """
+        Args:
+            number_of_nodes: node IDs are 0..number_of_nodes-1
+            width: nodes per row; default is the square root of
+                number_of_nodes, rounded down
+            periodic: join opposite edges of the lattice. Needs whole
+                rows, and at least 3 rows and 3 columns so no two
+                neighbors of a node are the same node
+        """
+        super().__init__(number_of_nodes)
+        if width is None:
+            width = max(math.isqrt(number_of_nodes), 1)
+        if width < 1:
+            raise ValueError("width must be at least 1")
+        self.width = width
+        self.periodic = periodic
+        if periodic and (number_of_nodes % width or min(width, self.rows) < 3):
+            raise ValueError(
+                "periodic boundaries need whole rows and at least 3 rows and columns"
+            )
+
+    @property
+    def rows(self) -> int:
+        """number of rows, counting a partial last row"""
+        return -(-self.number_of_nodes // self.width)
+
+    def __repr__(self) -> str:
+        return "%s(nodes=%d, width=%d%s)" % (
+            type(self).__name__,
+            self.number_of_nodes,
+            self.width,
+            ", periodic=True" if self.periodic else "",
+        )
+
+    def _candidates(self, nodes):
+        """above, left, right and below of each node, and which exist
+
+        Works on ints and on numpy arrays alike.
+        """
+        column = nodes % self.width
+        if self.periodic:
+            row_start = nodes - column
+            candidates = (
+                (nodes - self.width) % self.number_of_nodes,
+                row_start + (column - 1) % self.width,
+                row_start + (column + 1) % self.width,
+                (nodes + self.width) % self.number_of_nodes,
+            )
+            # every candidate exists; a comparison keeps the type of nodes
+            always = column >= 0
+            return candidates, (always, always, always, always)
+        candidates = (
+            nodes - self.width,
+            nodes - 1,
+            nodes + 1,
+            nodes + self.width,
+        )
+        exists = (
+            nodes >= self.width,
+            column > 0,
+            (column < self.width - 1) & (nodes + 1 < self.number_of_nodes),
+            nodes + self.width < self.number_of_nodes,
+        )
+        return candidates, exists
+
+    def neighbors(self, node: int):
+        candidates, exists = self._candidates(node)
+        return sorted(x for x, keep in zip(candidates, exists) if keep)
+
+    def number_of_edges(self) -> int:
+        if self.periodic:
+            return 4 * self.number_of_nodes
+        full_rows, last_row = divmod(self.number_of_nodes, self.width)
+        across = full_rows * (self.width - 1) + max(last_row - 1, 0)
+        down = max(self.number_of_nodes - self.width, 0)
+        # each edge is listed from both ends
+        return 2 * (across + down)
+
+    def _neighbor_arrays(self, start: int, stop: int):
+        import numpy as np
+
+        nodes = np.arange(start, stop, dtype=np.int64)
+        candidates, exists = self._candidates(nodes)
+        # one row per node; missing candidates become number_of_nodes, so
+        # sorting each row puts them last and wrapped neighbors in order
+        candidates = np.where(
+            np.column_stack(exists),
+            np.column_stack(candidates),
+            self.number_of_nodes,
+        )
+        if self.periodic:
+            candidates.sort(axis=1)
+        exists = candidates < self.number_of_nodes
+        left_nodes = np.broadcast_to(nodes[:, None], candidates.shape)
+        # row-major selection keeps the order of edges()
+        return left_nodes[exists], candidates[exists]
+
+
+class HexagonalGraph(GridGraph):
+    """hexagonal (honeycomb) lattice drawn as a brick wall
+
+    Nodes sit on a grid as in GridGraph and list their left and right
+    neighbors; the vertical edges alternate, so node i at (row, column)
+    connects to the node below when row + column is even and to the node
+    above when it is odd. Every node has at most 3 neighbors and each
+    hexagon spans 2 rows and 3 columns. Periodic boundaries also need an
+    even number of rows and of columns, so the alternation continues across
+    the joined edges.
+    https://networkx.org/documentation/stable/reference/generated/networkx.generators.lattice.hexagonal_lattice_graph.html
+
+    >>> dict(HexagonalGraph(6, width=3))
+    {0: [1, 3], 1: [0, 2], 2: [1, 5], 3: [0, 4], 4: [3, 5], 5: [2, 4]}
+    """
+
+    max_degree = 3
+
+    def __init__(
+        self, number_of_nodes: int, width: Optional[int] = None, periodic=False
+    ):
+        super().__init__(number_of_nodes, width, periodic)
+        if periodic and (self.width % 2 or self.rows % 2):
+            raise ValueError(
+                "periodic boundaries need an even number of rows and columns"
+            )
+
+    def number_of_edges(self) -> int:
+        if self.periodic:
+            return 3 * self.number_of_nodes
+        full_rows, last_row = divmod(self.number_of_nodes, self.width)
+        across = full_rows * (self.width - 1) + max(last_row - 1, 0)
+        # node i joins the node below when row + column is even; count
+        # those among the nodes that have a node below
+        above = max(self.number_of_nodes - self.width, 0)
+        full_rows, last_row = divmod(above, self.width)
+        down = full_rows * (self.width // 2) + last_row // 2
+        if self.width % 2:
+            # an odd row has one more even position in even rows
+            down += (full_rows + 1) // 2
+        if full_rows % 2 == 0:
+            down += last_row % 2
+        return 2 * (across + down)
+
+    def _candidates(self, nodes):
+        candidates, exists = super()._candidates(nodes)
+        parity = (nodes // self.width + nodes % self.width) % 2
+        return candidates, (
+            exists[0] & (parity == 1),
+            exists[1],
+            exists[2],
+            exists[3] & (parity == 0),
+        )
+
+
+# name used by --graph -> class
+GRAPH_TYPES = {
+    "ring": RingGraph,
+    "complete": CompleteGraph,
+    "grid": GridGraph,
+    "hexagonal": HexagonalGraph,
+}
+
+
+def create_implicit_graph(
+    graph_type: str, number_of_nodes: int, width: Optional[int] = None, periodic=False
+):
+    """an ImplicitGraph by name
+
+    Args:
+        graph_type: a key of GRAPH_TYPES
+        number_of_nodes: node IDs are 0..number_of_nodes-1
+        width: nodes per row of "grid" and "hexagonal"; ignored otherwise
+        periodic: join the opposite edges of "grid" and "hexagonal"
+
+    Returns:
+        ImplicitGraph
+    """
+    logger.info("[trace: create_implicit_graph]")
+    if graph_type not in GRAPH_TYPES:
+        raise ValueError("graph type must be one of " + ", ".join(GRAPH_TYPES))
+    if graph_type in ("grid", "hexagonal"):
+        return GRAPH_TYPES[graph_type](number_of_nodes, width, periodic)
+    return GRAPH_TYPES[graph_type](number_of_nodes)
+
+
+# EOF
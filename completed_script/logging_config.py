@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+logging configuration for the command-line scripts
+
+Importing a module of this project does not configure logging; a script
+calls configure_logging once, after parsing its arguments. Library users
+and timeit runs therefore pay nothing beyond the logger.isEnabledFor check
+inside each logger.info call, and no logs/ directory is created.
+
+With use_queue=True the calling thread only puts each record on a queue;
+a QueueListener thread formats and writes it to the files.
+https://docs.python.org/3/howto/logging-cookbook.html#dealing-with-handlers-that-block
+"""
+import atexit
+import logging  # https://docs.python.org/3/library/logging.html
+import os
+
+# names accepted by --log-level; OFF writes no log files at all
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL", "OFF")
+
+# maxBytes=10000 = 10kB
+# maxBytes=100000 = 100kB
+# maxBytes=1000000 = 1MB
+# maxBytes=10000000 = 10MB
+LOG_SIZE = 10000000
+# maxBytes=100000000 = 100MB
+
+LOG_FORMAT = "%(asctime)s|%(filename)-13s|%(levelname)-5s|%(lineno)-4d|%(funcName)-20s|%(message)s"
+
+
+def configure_logging(
+    level: str = "INFO", log_directory: str = "logs", use_queue: bool = False
+):
+    """send log records to rotating files in log_directory
+
+    one file per threshold, as before: DEBUG and up, INFO and up, WARNING
+    and up. Call once per process.
+
+    Args:
+        level: one of LOG_LEVELS; records below it are dropped before any
+            formatting. OFF disables logging and creates no files
+        log_directory: created if missing
+        use_queue: write from a background QueueListener thread
+
+    Returns:
+        the started QueueListener, or None. It is stopped at exit, which
+        flushes the records still queued
+    """
+    if level == "OFF":
+        logging.disable(logging.CRITICAL)
+        return None
+
+    # logging.handlers is only needed when logging is configured
+    from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+    import queue  # https://docs.python.org/3/library/queue.html
+
+    if not os.path.exists(log_directory):
+        os.makedirs(log_directory)
+
+    # https://gist.github.com/ibeex/3257877
+    file_handlers: list[logging.Handler] = []
+    for threshold, filename in (
+        (logging.DEBUG, "critical_and_error_and_warning_and_info_and_debug.log"),
+        (logging.INFO, "critical_and_error_and_warning_and_info.log"),
+        (logging.WARNING, "critical_and_error_and_warning.log"),
+    ):
+        handler = RotatingFileHandler(
+            os.path.join(log_directory, filename),
+            maxBytes=LOG_SIZE,
+            backupCount=2,
+        )
+        handler.setLevel(threshold)
+        # https://stackoverflow.com/questions/6290739/python-logging-use-milliseconds-in-time-format/7517430#7517430
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        file_handlers.append(handler)
+
+    listener = None
+    if use_queue:
+        record_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        listener = QueueListener(
+            record_queue, *file_handlers, respect_handler_level=True
+        )
+        listener.start()
+        atexit.register(listener.stop)
+        queue_handler = QueueHandler(record_queue)
+        # the listener's handlers apply LOG_FORMAT; only merge the arguments
+        queue_handler.setFormatter(logging.Formatter("%(message)s"))
+        handlers: list[logging.Handler] = [queue_handler]
+    else:
+        handlers = file_handlers
+
+    # https://docs.python.org/3/howto/logging.html
+    # if the severity level is INFO,
+    # the logger will handle only INFO, WARNING, ERROR, and CRITICAL messages
+    # and will ignore DEBUG messages
+    logging.basicConfig(handlers=handlers, level=getattr(logging, level), force=True)
+
+    # http://matplotlib.1069221.n5.nabble.com/How-to-turn-off-matplotlib-DEBUG-msgs-td48822.html
+    # https://github.com/matplotlib/matplotlib/issues/14523
+    logging.getLogger("matplotlib").setLevel(logging.WARNING)
+    return listener
+
+
+def add_logging_arguments(theparser) -> None:
+    """add --log-level and --log-queue to an argparse.ArgumentParser"""
+    theparser.add_argument(
+        "--log-level",
+        dest="log_level",
+        choices=LOG_LEVELS,
+        default="INFO",
+        help="lowest severity written to the files in logs/. \
+        OFF writes no log files. Default is INFO",
+    )
+    theparser.add_argument(
+        "--log-queue",
+        dest="log_queue",
+        action="store_true",
+        default=False,
+        help="write log files from a background thread",
+    )
+
+
+# EOF
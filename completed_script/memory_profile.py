@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+how many bytes a graph structure occupies, and how many building it needs
+
+sys.getsizeof(G) is only the size of the outermost object. deep_sizeof
+follows the references of dictionaries, lists, tuples, sets, instance
+attributes (so CSRGraph and NetworkX graphs) and array buffers, counting
+every object once by id, so shared neighbor IDs and a numpy view of an
+array already counted add nothing.
+https://docs.python.org/3/library/sys.html#sys.getsizeof
+
+Memory-mapped files, such as the buffers of a MappedGraph, are counted
+apart as mapped bytes: they are pages of the file that the operating
+system loads on demand and may evict, not memory the process allocated.
+
+TracedPeak and measure_peak give the largest amount of memory allocated
+through Python and numpy while a block or a call runs, from tracemalloc.
+https://docs.python.org/3/library/tracemalloc.html
+
+    python3 memory_profile.py --numNodes 1000
+"""
+import argparse  # https://docs.python.org/3.3/library/argparse.html
+import logging
+import mmap
+import os
+import sys
+import tempfile
+import tracemalloc
+import types
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# shared by the whole program, never part of one structure
+_NOT_COUNTED = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+)
+
+REPRESENTATIONS = ("dict", "csr-array", "csr-numpy", "bitset", "mapped", "networkx")
+
+
+class MemorySize(NamedTuple):
+    """what deep_sizeof counted"""
+
+    heap_bytes: int
+    mapped_bytes: int
+
+
+def deep_size(obj) -> MemorySize:
+    """bytes of obj and of everything it references, each object once
+
+    Args:
+        obj: any object; for a graph, the dictionary, CSRGraph or NetworkX
+            graph itself
+
+    Returns:
+        heap_bytes: memory allocated for the objects and their buffers
+        mapped_bytes: length of the memory-mapped files reached
+    """
+    logger.info("[trace: deep_size]")
+    seen = set()
+    heap_bytes = 0
+    mapped_bytes = 0
+    pending = [obj]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, _NOT_COUNTED) or obj is None:
+            continue
+        seen.add(id(obj))
+        # for an array.array, and a numpy array that owns its data, this
+        # includes the buffer; a numpy view is only its header
+        heap_bytes += sys.getsizeof(obj)
+
+        if isinstance(obj, (str, bytes, bytearray, int, float)):
+            continue
+        if isinstance(obj, mmap.mmap):
+            mapped_bytes += len(obj)
+        elif isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pending.extend(obj)
+        elif hasattr(obj, "__array_interface__"):
+            # the array a view was taken from, or the bytes or mmap the
+            # array was read from; its elements are not objects
+            pending.append(getattr(obj, "base", None))
+        elif isinstance(obj, memoryview):
+            pending.append(obj.obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                pending.append(vars(obj))
+            for cls in type(obj).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if hasattr(obj, slot) and slot not in ("__dict__", "__weakref__"):
+                        pending.append(getattr(obj, slot))
+    return MemorySize(heap_bytes, mapped_bytes)
+
+
+def deep_sizeof(obj) -> int:
+    """heap bytes of obj and of everything it references; see deep_size"""
+    return deep_size(obj).heap_bytes
+
+
+def count_nodes_and_edges(graph):
+    """number of nodes, and of edges as the structure stores them
+
+    Args:
+        graph: an adjacency dictionary (edges are list entries, or one per
+            key for a ring's {node: next node}), a CSRGraph, a BitsetGraph
+            or a NetworkX graph
+
+    Returns:
+        number_of_nodes, number_of_edges
+    """
+    if isinstance(graph, dict):
+        return len(graph), sum(
+            len(neighbors) if hasattr(neighbors, "__len__") else 1
+            for neighbors in graph.values()
+        )
+    return len(graph), graph.number_of_edges()
+
+
+class MemoryFootprint(NamedTuple):
+    """memory of one graph structure, per node and per edge"""
+
+    representation: str
+    number_of_nodes: int
+    number_of_edges: int
+    heap_bytes: int
+    mapped_bytes: int
+
+    @property
+    def total_bytes(self) -> int:
+        return self.heap_bytes + self.mapped_bytes
+
+    @property
+    def bytes_per_node(self) -> float:
+        return self.total_bytes / max(self.number_of_nodes, 1)
+
+    @property
+    def bytes_per_edge(self) -> float:
+        return self.total_bytes / max(self.number_of_edges, 1)
+
+    def __str__(self) -> str:
+        return (
+            "%-10s %8d nodes %10d edges %12d heap bytes %12d mapped bytes "
+            "%8.1f B/node %6.1f B/edge"
+            % (
+                self.representation,
+                self.number_of_nodes,
+                self.number_of_edges,
+                self.heap_bytes,
+                self.mapped_bytes,
+                self.bytes_per_node,
+                self.bytes_per_edge,
+            )
+        )
+
+
+def graph_footprint(graph, representation: str = None) -> MemoryFootprint:
+    """deep size of a graph, per node and per edge
+
+    Args:
+        graph: see count_nodes_and_edges
+        representation: label for the report; default is the type name
+
+    Returns:
+        MemoryFootprint
+    """
+    logger.info("[trace: graph_footprint]")
+    number_of_nodes, number_of_edges = count_nodes_and_edges(graph)
+    heap_bytes, mapped_bytes = deep_size(graph)
+    return MemoryFootprint(
+        representation or type(graph).__name__,
+        number_of_nodes,
+        number_of_edges,
+        heap_bytes,
+        mapped_bytes,
+    )
+
+
+class TracedPeak:
+    """peak memory allocated inside a with block, from tracemalloc
+
+        with TracedPeak() as traced:
+            the_graph = create_random_graph(1000)
+        print(traced.peak_bytes, traced.retained_bytes)
+
+    Memory allocated before the block is not counted. tracemalloc is
+    started if it is not running and stopped again at the end; while it
+    runs, allocations are several times slower.
+    """
+
+    def __enter__(self):
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start()
+        self.baseline_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self.peak_bytes = None
+        self.retained_bytes = None
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        if self.started:
+            tracemalloc.stop()
+        # the largest allocation at any moment, and what is still held
+        self.peak_bytes = peak_bytes - self.baseline_bytes
+        self.retained_bytes = current_bytes - self.baseline_bytes
+        return False
+
+
+def measure_peak(function, *args, **kwargs):
+    """call function(*args, **kwargs) under TracedPeak
+
+    Returns:
+        the return value of function, and the TracedPeak with peak_bytes
+        and retained_bytes
+    """
+    logger.info("[trace: measure_peak]")
+    with TracedPeak() as traced:
+        result = function(*args, **kwargs)
+    return result, traced
+
+
+def build_representation(representation: str, the_graph: dict, directory: str):
+    """the same graph in another structure, for comparing footprints
+
+    Args:
+        representation: one of REPRESENTATIONS
+        the_graph: adjacency dictionary with keys 0..n-1
+        directory: where "mapped" writes its CSR file
+
+    Returns:
+        the graph as that structure
+    """
+    logger.info("[trace: build_representation]")
+    from csr_graph import CSRGraph, MappedGraph, write_csr_file
+
+    if representation == "dict":
+        return the_graph
+    if representation == "csr-array":
+        return CSRGraph.from_dict(the_graph)
+    if representation == "csr-numpy":
+        import numpy as np
+
+        csr = CSRGraph.from_dict(the_graph)
+        return CSRGraph(
+            np.asarray(csr.offsets, dtype=np.int64),
+            np.asarray(csr.indices, dtype=np.int32),
+        )
+    if representation == "bitset":
+        from dense_graphs import BitsetGraph
+
+        return BitsetGraph.from_dict(the_graph)
+    if representation == "mapped":
+        filename = os.path.join(directory, "graph.csr")
+        write_csr_file(the_graph.items(), len(the_graph), filename)
+        return MappedGraph(filename)
+    if representation == "networkx":
+        import validate_graph
+
+        return validate_graph.convert_to_networkx(the_graph)
+    raise ValueError("representation must be one of " + ", ".join(REPRESENTATIONS))
+
+
+if __name__ == "__main__":
+
+    theparser = argparse.ArgumentParser(
+        description="compare the memory of the graph structures of this project",
+        allow_abbrev=False,
+    )
+    theparser.add_argument(
+        "--numNodes",
+        metavar="numNodes",
+        type=int,
+        default=1000,
+        help="nodes of the random graph measured. Default is 1000",
+    )
+    theparser.add_argument(
+        "--seed", type=int, default=1, help="seed of the random graph"
+    )
+    theparser.add_argument(
+        "--representations",
+        type=str,
+        default=",".join(REPRESENTATIONS),
+        help="comma-separated subset of " + ", ".join(REPRESENTATIONS),
+    )
+    args = theparser.parse_args()
+
+    import produce_output
+
+    the_graph, generated = measure_peak(
+        produce_output.create_random_graph, args.numNodes, "numpy", args.seed
+    )
+    with tempfile.TemporaryDirectory() as scratch:
+        for representation in args.representations.split(","):
+            if representation == "dict":
+                # the generated dictionary itself, and the cost of generating it
+                graph, traced = the_graph, generated
+            else:
+                graph, traced = measure_peak(
+                    build_representation, representation, the_graph, scratch
+                )
+            print(
+                "%s %12d bytes peak to build"
+                % (graph_footprint(graph, representation), traced.peak_bytes)
+            )
+            del graph
+
+# EOF
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+timing spans for the command-line scripts
+
+    with metrics.span("generate") as this_span:
+        the_graph = create_random_graph(1000)
+        this_span.count(nodes=len(the_graph))
+
+records the wall time, CPU time, peak resident memory and the counted items
+of the block. Until enable() is called, span() returns a shared object whose
+methods do nothing, so an instrumented function costs one global lookup and
+one call per span when metrics are off.
+
+peak_rss_bytes is the high-water mark of the whole process when the span
+ends, from getrusage; comparing consecutive spans shows which one raised it.
+https://docs.python.org/3/library/resource.html#resource.getrusage
+
+    python3 produce_output.py 1000 --metrics-out metrics.json
+"""
+import atexit
+import json  # https://docs.python.org/3/library/json.html
+import sys
+import time  # https://docs.python.org/3/library/time.html#time.perf_counter
+from types import ModuleType
+from typing import Optional
+
+resource: Optional[ModuleType]
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+# the active recorder; None when metrics are disabled
+_recorder = None
+
+
+def peak_rss_bytes():
+    """largest resident set size of this process so far, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _NullSpan:
+    """what span() returns when metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def count(self, **items) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """one timed block; created by span()"""
+
+    def __init__(self, recorder, name: str, items: dict):
+        self.recorder = recorder
+        self.name = name
+        self.items = dict(items)
+
+    def __enter__(self):
+        self.depth = len(self.recorder.open_spans)
+        self.recorder.open_spans.append(self)
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record = {
+            "name": self.name,
+            "depth": self.depth,
+            "wall_seconds": time.perf_counter() - self.wall_start,
+            "cpu_seconds": time.process_time() - self.cpu_start,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "items": self.items,
+        }
+        if record["wall_seconds"] > 0:
+            record["items_per_second"] = {
+                kind: number / record["wall_seconds"]
+                for kind, number in self.items.items()
+            }
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        self.recorder.open_spans.pop()
+        self.recorder.spans.append(record)
+        return False
+
+    def count(self, **items) -> None:
+        """add to the items processed, for example count(edges=1000)"""
+        for kind, number in items.items():
+            self.items[kind] = self.items.get(kind, 0) + number
+
+
+class MetricsRecorder:
+    """the finished spans of this process, in the order they ended"""
+
+    def __init__(self):
+        self.spans = []
+        self.open_spans = []
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+
+    def summary(self) -> dict:
+        """JSON-serializable summary of every span and of the whole run"""
+        return {
+            "command": sys.argv,
+            "total": {
+                "wall_seconds": time.perf_counter() - self.wall_start,
+                "cpu_seconds": time.process_time() - self.cpu_start,
+                "peak_rss_bytes": peak_rss_bytes(),
+            },
+            "spans": self.spans,
+        }
+
+
+def enable(filename=None) -> MetricsRecorder:
+    """start recording spans
+
+    Args:
+        filename: if given, the summary is written there as JSON when the
+            process exits, including through sys.exit
+
+    Returns:
+        the new MetricsRecorder
+    """
+    global _recorder
+    _recorder = MetricsRecorder()
+    if filename:
+        atexit.register(write_summary, filename, _recorder)
+    return _recorder
+
+
+def disable() -> None:
+    """stop recording; span() does nothing again"""
+    global _recorder
+    _recorder = None
+
+
+def is_enabled() -> bool:
+    return _recorder is not None
+
+
+def span(name: str, **items):
+    """context manager timing a block; see the module docstring
+
+    Args:
+        name: what the block does, for example "generate" or "parse"
+        items: initial counts, for example nodes=1000
+    """
+    if _recorder is None:
+        return _NULL_SPAN
+    return Span(_recorder, name, items)
+
+
+def write_summary(filename: str, recorder=None) -> None:
+    """write the summary of recorder (default: the active one) as JSON"""
+    recorder = recorder or _recorder
+    if recorder is None:
+        return
+    with open(filename, "w") as file_handle:
+        json.dump(recorder.summary(), file_handle, indent=2)
+        file_handle.write("\n")
+
+
+def add_metrics_arguments(theparser) -> None:
+    """add --metrics-out to an argparse.ArgumentParser"""
+    theparser.add_argument(
+        "--metrics-out",
+        dest="metrics_out",
+        metavar="filename",
+        type=str,
+        default=None,
+        help="write wall time, CPU time, peak memory and items processed \
+        for each stage of the run to this JSON file",
+    )
+
+
+# EOF
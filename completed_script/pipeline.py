@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+generate a graph and validate it in one process
+
+The workflow of the README,
+
+    python3 produce_output.py 3000 | python3 validate_graph.py --stdin
+
+starts two interpreters, formats every edge as text, pushes it through a
+pipe and parses it back. Here generation and validation are two threads
+of one process, joined by a queue of numpy edge batches:
+
+    python3 pipeline.py 3000 --seed 1
+
+The generating thread puts each batch as it is drawn; the validating
+thread takes them in order and feeds them to a ComponentLabels and a
+DegreeCounter (see graph_algorithms.py and degree_stats.py), which are the
+checks of validate_graph.py --connectivityOnly and --degreesOnly, in one
+pass. The queue holds at most queue_batches batches, so a generator that
+runs ahead waits for the checks (backpressure): memory is a few batches
+plus O(nodes) whatever the number of edges. numpy releases the GIL in its
+loops, so drawing and checking overlap.
+
+The random graph and the implicit graphs are drawn batch by batch; a
+sparse model is drawn whole as a CSRGraph, then queued in batches.
+
+https://docs.python.org/3/library/queue.html
+https://en.wikipedia.org/wiki/Producer%E2%80%93consumer_problem
+"""
+import argparse  # https://docs.python.org/3.3/library/argparse.html
+import logging
+import queue  # https://docs.python.org/3/library/queue.html
+import threading  # https://docs.python.org/3/library/threading.html
+from typing import NamedTuple
+
+import degree_stats
+import graph_algorithms
+import logging_config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# batches waiting in the queue at most; a batch of the numpy random graph
+# is one chunk of rows, about 2**21 edges or 32MB
+QUEUE_BATCHES = 2
+
+# how often a blocked producer checks whether the consumer has gone
+PUT_POLL_SECONDS = 0.1
+
+
+class PipelineResult(NamedTuple):
+    """what the checks found"""
+
+    # the components; report() summarizes them
+    components: graph_algorithms.ComponentLabels
+    # in-, out- and undirected degrees counted from the stream
+    degrees: degree_stats.DegreeCounter
+
+
+def generated_edge_batches(
+    graph_type: str,
+    number_of_nodes: int,
+    seed=None,
+    backend: str = "numpy",
+    parameter=None,
+    width: int = None,
+    periodic=False,
+):
+    """the edges of a graph of produce_output.py --graph, as numpy arrays
+
+    Args:
+        graph_type: one of produce_output.GRAPH_TYPES
+        number_of_nodes: node IDs are 0..number_of_nodes-1
+        seed: optional random seed
+        backend: engine of the "random" graph; see produce_output.BACKENDS
+        parameter: of a sparse model; see sparse_graphs.create_sparse_graph
+        width: nodes per row of "grid" and "hexagonal"
+        periodic: join the opposite edges of "grid" and "hexagonal"
+
+    Returns:
+        generator of numpy int64 arrays of shape (edges, 2)
+    """
+    import implicit_graphs
+    import produce_output
+    import sparse_graphs
+
+    if graph_type == "random":
+        return produce_output.next_edge_batch_from_graph_of_size(
+            number_of_nodes, backend, seed
+        )
+    if graph_type in sparse_graphs.MODELS:
+        return sparse_graphs.create_sparse_graph(
+            graph_type, number_of_nodes, parameter, seed
+        ).edge_batches()
+    return implicit_graphs.create_implicit_graph(
+        graph_type, number_of_nodes, width, periodic
+    ).edge_batches()
+
+
+class _ProducerError:
+    """carries an exception of the producer thread to the consumer"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_END = object()
+
+
+def _put(items: queue.Queue, item, stopping: threading.Event) -> bool:
+    """put item, waiting for room; False if the consumer stopped first"""
+    while not stopping.is_set():
+        try:
+            items.put(item, timeout=PUT_POLL_SECONDS)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def background_batches(batches, queue_batches: int = QUEUE_BATCHES):
+    """iterate batches on a producer thread, at most queue_batches ahead
+
+    Args:
+        batches: iterable of edge arrays; it is only iterated by the
+            producer thread
+        queue_batches: size of the queue between the threads
+
+    Returns:
+        generator of the same arrays in the same order. An exception of
+        the producer is raised here; closing the generator stops the
+        producer at its next batch
+    """
+    logger.info("[trace: background_batches]")
+    if queue_batches < 1:
+        raise ValueError("queue_batches must be at least 1")
+    items = queue.Queue(maxsize=queue_batches)
+    stopping = threading.Event()
+
+    def produce():
+        try:
+            for batch in batches:
+                if not _put(items, batch, stopping):
+                    return
+        except BaseException as error:
+            _put(items, _ProducerError(error), stopping)
+            return
+        _put(items, _END, stopping)
+
+    producer = threading.Thread(target=produce, name="pipeline-producer", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _END:
+                return
+            if isinstance(item, _ProducerError):
+                raise item.error
+            yield item
+    finally:
+        stopping.set()
+        producer.join()
+
+
+def validate_edge_batches(
+    number_of_nodes: int, batches, symmetric: bool = False
+) -> PipelineResult:
+    """run the connectivity and degree checks over a stream of edge arrays
+
+    Args:
+        number_of_nodes: node IDs are 0..number_of_nodes-1
+        batches: iterable of integer arrays of shape (edges, 2)
+        symmetric: every edge is listed in both directions; see
+            degree_stats.DegreeCounter
+
+    Returns:
+        PipelineResult
+    """
+    logger.info("[trace: validate_edge_batches]")
+    components = graph_algorithms.ComponentLabels(number_of_nodes)
+    counter = degree_stats.DegreeCounter(number_of_nodes, symmetric)
+    for batch in batches:
+        components.add_edge_batch(batch)
+        counter.add_edge_batch(batch)
+    return PipelineResult(components, counter)
+
+
+def run_pipeline(
+    graph_type: str,
+    number_of_nodes: int,
+    seed=None,
+    backend: str = "numpy",
+    parameter=None,
+    width: int = None,
+    periodic=False,
+    queue_batches: int = QUEUE_BATCHES,
+    threaded: bool = True,
+) -> PipelineResult:
+    """generate a graph and check it, overlapping the two
+
+    Args:
+        graph_type, number_of_nodes, seed, backend, parameter, width,
+            periodic: see generated_edge_batches
+        queue_batches: see background_batches
+        threaded: False to generate each batch in the validating thread,
+            one after the other; for comparison
+
+    Returns:
+        PipelineResult
+    """
+    logger.info("[trace: run_pipeline]")
+    import produce_output
+
+    batches = generated_edge_batches(
+        graph_type, number_of_nodes, seed, backend, parameter, width, periodic
+    )
+    if threaded:
+        batches = background_batches(batches, queue_batches)
+    return validate_edge_batches(
+        number_of_nodes,
+        batches,
+        symmetric=graph_type in produce_output.SYMMETRIC_GRAPH_TYPES,
+    )
+
+
+if __name__ == "__main__":
+
+    import implicit_graphs
+    import produce_output
+    import sparse_graphs
+
+    theparser = argparse.ArgumentParser(
+        description="generate a graph and validate it in one process",
+        allow_abbrev=False,
+    )
+    theparser.add_argument(
+        "numNodes",
+        metavar="nodes_in_graph",
+        type=int,
+        help="an integer number of nodes",
+    )
+    theparser.add_argument(
+        "--seed",
+        metavar="random_seed",
+        type=int,
+        default=None,
+        help="random seed. If not provided, default to system",
+    )
+    theparser.add_argument(
+        "--backend",
+        choices=produce_output.BACKENDS,
+        default="numpy",
+        help="engine used to draw the random graph. Default is numpy",
+    )
+    theparser.add_argument(
+        "--graph",
+        choices=produce_output.GRAPH_TYPES,
+        default="random",
+        help="kind of graph; see produce_output.py. Default is random",
+    )
+    theparser.add_argument(
+        "--gridWidth",
+        metavar="nodes",
+        type=int,
+        default=None,
+        help="nodes per row of the grid and hexagonal graphs",
+    )
+    theparser.add_argument(
+        "--periodic",
+        action="store_true",
+        default=False,
+        help="join the opposite edges of the grid and hexagonal graphs",
+    )
+    theparser.add_argument(
+        "--probability", metavar="p", type=float, default=None, help="of --graph gnp"
+    )
+    theparser.add_argument(
+        "--numEdges", metavar="edges", type=int, default=None, help="of --graph gnm"
+    )
+    theparser.add_argument(
+        "--edgesPerNode",
+        metavar="edges",
+        type=int,
+        default=None,
+        help="of --graph barabasi-albert",
+    )
+    theparser.add_argument(
+        "--queueBatches",
+        metavar="batches",
+        type=int,
+        default=QUEUE_BATCHES,
+        help="edge batches the generator may run ahead of the checks. \
+        Default is %d"
+        % QUEUE_BATCHES,
+    )
+    theparser.add_argument(
+        "--serial",
+        action="store_true",
+        default=False,
+        help="generate and check in turn, in one thread",
+    )
+    theparser.add_argument(
+        "--samples",
+        metavar="nodes",
+        type=int,
+        default=5,
+        help="node IDs listed per stray component. Default is 5",
+    )
+    logging_config.add_logging_arguments(theparser)
+    metrics.add_metrics_arguments(theparser)
+
+    args = theparser.parse_args()
+
+    logging_config.configure_logging(args.log_level, use_queue=args.log_queue)
+    if args.metrics_out:
+        metrics.enable(args.metrics_out)
+    logger.info("[trace: main]")
+
+    if args.numNodes < 0:
+        theparser.error("invalid number of nodes")
+    if args.queueBatches < 1:
+        theparser.error("--queueBatches must be at least 1")
+    parameter = None
+    if args.graph in sparse_graphs.MODELS:
+        option = produce_output.SPARSE_MODEL_OPTIONS[args.graph]
+        parameter = getattr(args, option)
+        if parameter is None:
+            theparser.error("--graph %s needs --%s" % (args.graph, option))
+    elif args.graph in implicit_graphs.GRAPH_TYPES:
+        try:
+            # checks the shape of the lattices before the threads start
+            implicit_graphs.create_implicit_graph(
+                args.graph, args.numNodes, args.gridWidth, args.periodic
+            )
+        except ValueError as error:
+            theparser.error(str(error))
+
+    with metrics.span("generate+validate", nodes=args.numNodes) as span:
+        try:
+            result = run_pipeline(
+                args.graph,
+                args.numNodes,
+                args.seed,
+                args.backend,
+                parameter,
+                args.gridWidth,
+                args.periodic,
+                args.queueBatches,
+                threaded=not args.serial,
+            )
+        except ValueError as error:
+            theparser.error(str(error))
+        span.count(edges=result.degrees.edges_read)
+
+    report = result.components.report(args.samples)
+    print(report)
+    for kind, summary in result.degrees.summaries().items():
+        print(kind + "-degree")
+        print(summary)
+    if not report.is_connected:
+        raise graph_algorithms.GraphNotConnectedError(report)
+
+# EOF
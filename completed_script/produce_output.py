@@ -14,14 +14,14 @@ this file is also intended as an exemplar for how to use
 """
 import random  # for graph construction; https://docs.python.org/3/library/random.html
 import logging  # https://docs.python.org/3/library/logging.html
-from logging.handlers import RotatingFileHandler
 
 # https://realpython.com/python-logging-source-code/
 import argparse  # https://docs.python.org/3.3/library/argparse.html
 
 # https://realpython.com/command-line-interfaces-python-argparse/
 import os
-import json
+from array import array  # https://docs.python.org/3/library/array.html
+from typing import Any, Optional  # https://docs.python.org/3/library/typing.html
 
 import sys
 # I had been using sys for command-line arguments as per
@@ -36,88 +36,82 @@ import sys
 # https://google.github.io/styleguide/pyguide.html
 
 
+from csr_graph import CSRGraph, OFFSET_TYPECODE, INDEX_TYPECODE, write_csr_file
+import dense_graphs
+import graph_io
+import implicit_graphs
+import logging_config
+import sparse_graphs
+import metrics
+
 # ************ Begin logging configuration ******************
 # logging should be configured once (not per module)
 # other modules can then reference the configuration
+# importing this module does not configure logging; the command-line
+# entry point below calls logging_config.configure_logging
+# ************ end logging configuration ******************
 
+logger = logging.getLogger(__name__)
 
-if not os.path.exists("logs"):
-    os.makedirs("logs")
+# printed by --version; part of the key of graph_cache entries
+__version__ = "0.13"
 
-# https://gist.github.com/ibeex/3257877
+# ********** begin primary functions *****************
 
-# maxBytes=10000 = 10kB
-# maxBytes=100000 = 100kB
-# maxBytes=1000000 = 1MB
-# maxBytes=10000000 = 10MB
-LOG_SIZE = 10000000
-# maxBytes=100000000 = 100MB
-# https://gist.github.com/ibeex/3257877
-handler_debug = RotatingFileHandler(
-    "logs/critical_and_error_and_warning_and_info_and_debug.log",
-    maxBytes=LOG_SIZE,
-    backupCount=2,
-)
-handler_debug.setLevel(logging.DEBUG)
-handler_info = RotatingFileHandler(
-    "logs/critical_and_error_and_warning_and_info.log",
-    maxBytes=LOG_SIZE,
-    backupCount=2,
-)
-handler_info.setLevel(logging.INFO)
-handler_warning = RotatingFileHandler(
-    "logs/critical_and_error_and_warning.log",
-    maxBytes=LOG_SIZE,
-    backupCount=2,
-)
-handler_warning.setLevel(logging.WARNING)
-
-# https://docs.python.org/3/howto/logging.html
-logging.basicConfig(
-    # either (filename + filemode) XOR handlers
-    # filename="test.log", # to save entries to file instead of displaying to stderr
-    # filemode="w", # https://docs.python.org/dev/library/functions.html#filemodes
-    handlers=[handler_debug, handler_info, handler_warning],
-    # if the severity level is INFO,
-    # the logger will handle only INFO, WARNING, ERROR, and CRITICAL messages
-    # and will ignore DEBUG messages
-    level=logging.DEBUG,
-    format="%(asctime)s|%(filename)-13s|%(levelname)-5s|%(lineno)-4d|%(funcName)-20s|%(message)s",
-    # https://stackoverflow.com/questions/6290739/python-logging-use-milliseconds-in-time-format/7517430#7517430
-    # datefmt="%m/%d/%Y %I:%M:%S %f %p", # https://strftime.org/
-)
 
-# https://docs.python.org/3/howto/logging.html
-# if the severity level is INFO,
-#   then the logger will handle only INFO, WARNING, ERROR, and CRITICAL messages
-#        and will ignore DEBUG messages
-# handler.setLevel(logging.INFO)
-# handler.setLevel(logging.DEBUG)
+# which engine create_random_graph uses to draw the random edges
+BACKENDS = ("python", "numpy")
 
-logger = logging.getLogger(__name__)
+# what --graph generates: "random" is create_random_graph, then the
+# implicit_graphs objects, then the sparse_graphs models
+GRAPH_TYPES = (
+    ("random",) + tuple(implicit_graphs.GRAPH_TYPES) + tuple(sparse_graphs.MODELS)
+)
 
-# http://matplotlib.1069221.n5.nabble.com/How-to-turn-off-matplotlib-DEBUG-msgs-td48822.html
-# https://github.com/matplotlib/matplotlib/issues/14523
-logging.getLogger("matplotlib").setLevel(logging.WARNING)
+# the graph types that list every edge in both directions, so that the
+# undirected degree of a node is its out-degree
+SYMMETRIC_GRAPH_TYPES = ("complete", "grid", "hexagonal") + tuple(sparse_graphs.MODELS)
 
-# ************ end logging configuration ******************
+# the option that sets the parameter of each sparse_graphs model
+SPARSE_MODEL_OPTIONS = {
+    "gnp": "probability",
+    "gnm": "numEdges",
+    "barabasi-albert": "edgesPerNode",
+}
 
-logger = logging.getLogger(__name__)
+# what the generators return: "dict" is {node: [neighbors]};
+# "csr" is a CSRGraph backed by two flat integer buffers; "bitset" is a
+# dense_graphs.BitsetGraph, one bit per pair of nodes; "auto" is "bitset"
+# when the graph is dense enough for that to be smaller, otherwise "csr"
+FORMATS = ("dict", "csr", "bitset", "auto")
 
-# ********** begin primary functions *****************
+# upper bound on the number of candidate-neighbor cells the numpy backend
+# holds in memory at once; 2**22 int32 cells is 16MB per chunk of rows
+NUMPY_CHUNK_CELLS = 2**22
 
 
-def create_random_graph(number_of_nodes: int) -> dict:
+def create_random_graph(
+    number_of_nodes: int, backend: str = "python", seed=None, fmt: str = "dict"
+):
     """generate a directed graph based on user input and return a dictionary
 
     data structure of interest
 
     Args:
         number_of_nodes: how many nodes in the graph
+        backend: "python" uses the random module one node at a time;
+            "numpy" draws all the degrees and neighbor samples in batches
+        seed: optional random seed. When not provided, the "python" backend
+            uses the state of the random module and the "numpy" backend
+            draws fresh entropy from the system
+        fmt: see FORMATS. The graph has about n^2/2 edges, so "auto" is
+            "bitset"
 
     Returns:
         the_graph: a dictionary where each key is a non-negative integer and
-        the value is a list of integers corresponding to nearest-neighbor nodes
+        the value is a list of integers corresponding to nearest-neighbor nodes.
+        With fmt="csr" the same adjacency as a CSRGraph; with fmt="bitset"
+        the same edges as a BitsetGraph, neighbors in increasing order
 
         {'0': [],
          '2': [1, 3],
@@ -128,23 +122,464 @@ def create_random_graph(number_of_nodes: int) -> dict:
     {0: [], 1: [2], 2: [1, 3], 3: [2]}
     """
     logger.info("[trace: create_random_graph]")
+    fmt = _resolve_format(fmt, number_of_nodes, number_of_nodes**2 / 2)
+    if backend == "numpy" and fmt == "csr":
+        return _create_random_csr_numpy(number_of_nodes, seed)
+    if fmt == "bitset":
+        return _create_random_bitset(number_of_nodes, backend, seed)
+
     this_graph = {}
+    offsets = array(OFFSET_TYPECODE, [0])
+    indices = array(INDEX_TYPECODE)
+
+    for node_id, edge_list in _random_neighbor_lists(number_of_nodes, backend, seed):
+        # the data struture to store the graph is "for each node, what other nodes are connected?"
+        if fmt == "csr":
+            indices.extend(edge_list)
+            offsets.append(len(indices))
+        else:
+            this_graph[node_id] = edge_list
+    if fmt == "csr":
+        return CSRGraph(offsets, indices)
+    return this_graph
 
+
+def _random_neighbor_lists(number_of_nodes: int, backend: str = "python", seed=None):
+    """generate the neighbor list of each node of a random graph, in node order
+
+    This is the single source of randomness for create_random_graph and
+    next_edge_from_graph_of_size, so the materialized and streamed graphs are
+    identical for the same backend and seed. Only one chunk of rows is held
+    at a time.
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        backend: "python" or "numpy"; see BACKENDS
+        seed: optional random seed; see create_random_graph
+
+    Returns:
+        generator of (node ID, list of neighbor node IDs)
+    """
+    if backend == "python":
+        # the random module itself, or a seeded random.Random
+        py_rng: Any
+        if seed is None:
+            py_rng = random
+        else:
+            py_rng = random.Random(seed)
+        yield from _python_random_rows(py_rng, number_of_nodes)
+    elif backend == "numpy":
+        # numpy is only needed for this backend
+        import numpy as np  # https://numpy.org/doc/stable/reference/random/generator.html
+
+        np_rng = np.random.default_rng(seed)
+        yield from _neighbor_lists_from_chunks(
+            _numpy_random_rows(np_rng, number_of_nodes, 0, number_of_nodes)
+        )
+    else:
+        raise ValueError("unknown backend " + str(backend))
+
+
+def _python_random_rows(rng, number_of_nodes: int):
+    """draw the random neighbor list of each node with the random module
+
+    Args:
+        rng: the random module or a random.Random instance
+        number_of_nodes: how many nodes in the graph
+
+    Returns:
+        generator of (node ID, list of neighbor node IDs)
+    """
     for node_id in range(number_of_nodes):
 
         # for each node, connect to a random number of other nodes
         # https://note.nkmk.me/en/python-random-choice-sample-choices/
-        edge_list = random.sample(
-            range(number_of_nodes), random.choice(range(number_of_nodes))
+        edge_list = rng.sample(
+            range(number_of_nodes), rng.choice(range(number_of_nodes))
         )
 
         # don't let a node connect to itself
         if node_id in edge_list:
             edge_list.remove(node_id)
 
-        # the data struture to store the graph is "for each node, what other nodes are connected?"
-        this_graph[node_id] = edge_list
-    return this_graph
+        yield node_id, edge_list
+
+
+def _create_random_csr_numpy(number_of_nodes: int, seed=None) -> CSRGraph:
+    """numpy engine for create_random_graph(..., fmt="csr")
+
+    Same semantics as the "python" backend: each node picks a degree
+    uniformly from [0, number_of_nodes), then that many distinct nodes,
+    and a pick of itself is dropped. The random streams differ, so the two
+    backends do not produce the same graph for the same seed.
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        seed: optional seed for numpy.random.default_rng
+
+    Returns:
+        the_graph: a CSRGraph backed by numpy buffers
+    """
+    logger.info("[trace: _create_random_csr_numpy]")
+    import numpy as np  # https://numpy.org/doc/stable/reference/random/generator.html
+
+    rng = np.random.default_rng(seed)
+    return _csr_from_chunks(
+        _numpy_random_rows(rng, number_of_nodes, 0, number_of_nodes)
+    )
+
+
+def _create_random_bitset(
+    number_of_nodes: int, backend: str = "python", seed=None
+) -> dense_graphs.BitsetGraph:
+    """engine for create_random_graph(..., fmt="bitset")
+
+    The rows are set as they are drawn, so no other form of the whole graph
+    is held in memory.
+
+    Returns:
+        the_graph: a BitsetGraph with the edges of the other formats
+    """
+    logger.info("[trace: _create_random_bitset]")
+    the_graph = dense_graphs.BitsetGraph(number_of_nodes)
+    if backend == "numpy":
+        import numpy as np
+
+        # the same draws as _create_random_csr_numpy
+        rng = np.random.default_rng(seed)
+        for first_node, counts, indices in _numpy_random_rows(
+            rng, number_of_nodes, 0, number_of_nodes
+        ):
+            the_graph.add_rows(first_node, counts, indices)
+        return the_graph
+    for node_id, edge_list in _random_neighbor_lists(number_of_nodes, backend, seed):
+        the_graph.add_rows(node_id, [len(edge_list)], edge_list)
+    return the_graph
+
+
+def _numpy_random_rows(rng, number_of_nodes: int, start: int, stop: int):
+    """draw the random neighbor lists of nodes start..stop-1 in chunks of rows
+
+    All the degrees are drawn in one call. Each chunk of rows then gets an
+    independent random permutation of range(number_of_nodes) per row (one
+    Generator.permuted call); the first "degree" entries of a row are the
+    sample, minus the node itself.
+
+    Args:
+        rng: a numpy.random.Generator
+        number_of_nodes: how many nodes in the graph
+        start: first node ID to draw
+        stop: one past the last node ID to draw
+
+    Returns:
+        generator of (first node ID of the chunk, neighbor count per row,
+        concatenated int32 neighbor IDs of the chunk)
+    """
+    import numpy as np
+
+    if stop <= start:
+        return
+    degrees = rng.integers(0, number_of_nodes, size=stop - start)
+    rows_per_chunk = max(1, NUMPY_CHUNK_CELLS // number_of_nodes)
+    all_nodes = np.arange(number_of_nodes, dtype=np.int32)
+    for low in range(start, stop, rows_per_chunk):
+        high = min(low + rows_per_chunk, stop)
+        permutations = rng.permuted(
+            np.broadcast_to(all_nodes, (high - low, number_of_nodes)), axis=1
+        )
+        keep = all_nodes < degrees[low - start : high - start, None]
+        keep &= permutations != np.arange(low, high, dtype=np.int32)[:, None]
+        yield low, keep.sum(axis=1), permutations[keep]
+
+
+def create_random_graph_parallel(
+    number_of_nodes: int, workers: int, seed=None, fmt: str = "dict"
+):
+    """generate the random graph of create_random_graph using several processes
+
+    The node range is split into one contiguous shard per worker. Each shard
+    draws from its own numpy Generator seeded by SeedSequence(seed).spawn, so
+    the graph depends only on seed and workers, not on scheduling. It is not
+    the same graph as create_random_graph(..., backend="numpy", seed=seed).
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        workers: number of processes, and of shards
+        seed: optional random seed. If not provided, fresh entropy is drawn
+        fmt: see FORMATS; "auto" is "bitset", as for create_random_graph
+
+    Returns:
+        the_graph: same layout as create_random_graph
+    """
+    logger.info("[trace: create_random_graph_parallel]")
+    fmt = _resolve_format(fmt, number_of_nodes, number_of_nodes**2 / 2)
+    shards = _random_shards(number_of_nodes, workers, seed)
+    if fmt == "csr":
+        return _csr_from_chunks(shards)
+    if fmt == "bitset":
+        the_graph = dense_graphs.BitsetGraph(number_of_nodes)
+        for first_node, counts, indices in shards:
+            the_graph.add_rows(first_node, counts, indices)
+        return the_graph
+    return dict(_neighbor_lists_from_chunks(shards))
+
+
+def _random_shards(number_of_nodes: int, workers: int, seed=None):
+    """draw the shards of create_random_graph_parallel in a process pool
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        workers: number of processes, and of shards
+        seed: optional random seed
+
+    Returns:
+        generator of (first node ID of the shard, neighbor count per node,
+        concatenated int32 neighbor IDs), in node order
+    """
+    import numpy as np  # https://numpy.org/doc/stable/reference/random/parallel.html
+
+    # https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
+    from concurrent.futures import ProcessPoolExecutor
+
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    shard_seeds = np.random.SeedSequence(seed).spawn(workers)
+    boundaries = [number_of_nodes * shard // workers for shard in range(workers + 1)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map returns results in submission order, whichever shard finishes first
+        yield from executor.map(
+            _draw_random_shard,
+            [number_of_nodes] * workers,
+            boundaries[:-1],
+            boundaries[1:],
+            shard_seeds,
+        )
+
+
+def _draw_random_shard(number_of_nodes: int, start: int, stop: int, seed_sequence):
+    """worker-process body of _random_shards; draws nodes start..stop-1
+
+    Returns:
+        (start, neighbor count per node, concatenated int32 neighbor IDs)
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed_sequence)
+    all_counts = [np.zeros(0, dtype=np.int64)]
+    all_indices = [np.zeros(0, dtype=np.int32)]
+    for _, counts, indices in _numpy_random_rows(rng, number_of_nodes, start, stop):
+        all_counts.append(counts)
+        all_indices.append(indices)
+    return start, np.concatenate(all_counts), np.concatenate(all_indices)
+
+
+def create_fully_connected_graph(number_of_nodes: int, fmt: Optional[str] = None):
+    """every node connected to every other node, without storing the edges
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        fmt: None for the implicit graph, else see FORMATS. A complete
+            graph is as dense as a graph gets, so "auto" gives "bitset"
+
+    Returns:
+        implicit_graphs.CompleteGraph; a read-only mapping like the
+        dictionary of create_random_graph whose neighbor lists are computed
+        when read. dict(the_graph) materializes it. With fmt, the graph in
+        that format
+
+    >>> {k: list(v) for k, v in create_fully_connected_graph(4).items()}
+    {0: [1, 2, 3], 1: [0, 2, 3], 2: [0, 1, 3], 3: [0, 1, 2]}
+    """
+    logger.info("[trace: create_fully_connected_graph]")
+    the_graph = implicit_graphs.CompleteGraph(number_of_nodes)
+    if fmt is None:
+        return the_graph
+    return _materialize(the_graph, fmt)
+
+
+def create_ring_graph(number_of_nodes: int, fmt: Optional[str] = None):
+    """node i connected to node i+1, and the last node to node 0
+
+    https://networkx.org/documentation/stable/reference/generated/networkx.generators.classic.cycle_graph.html#networkx.generators.classic.cycle_graph
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        fmt: None for the implicit graph, else see FORMATS
+
+    Returns:
+        implicit_graphs.RingGraph; see create_fully_connected_graph
+
+    >>> dict(create_ring_graph(4))
+    {0: [1], 1: [2], 2: [3], 3: [0]}
+    """
+    logger.info("[trace: create_ring_graph]")
+    the_graph = implicit_graphs.RingGraph(number_of_nodes)
+    if fmt is None:
+        return the_graph
+    return _materialize(the_graph, fmt)
+
+
+def create_grid_graph(width: int, height: int, periodic=False, fmt: str = "dict"):
+    """square lattice of width x height nodes, computed without NetworkX
+
+    https://networkx.org/documentation/stable/reference/generated/networkx.generators.lattice.grid_2d_graph.html
+    Node (row, column) has ID row * width + column and lists the nodes
+    above, left, right and below it; see implicit_graphs.GridGraph.
+
+    Args:
+        width: nodes per row
+        height: number of rows
+        periodic: join the last column to the first and the last row to the
+            first (a torus); needs at least 3 rows and 3 columns
+        fmt: see FORMATS. "csr" takes about 0.3 sec for 2000 x 2000
+            nodes; "dict" then converts it to lists, about 2.7 sec
+
+    Returns:
+        the_graph: same layout as create_random_graph
+
+    >>> create_grid_graph(3, 2)
+    {0: [1, 3], 1: [0, 2, 4], 2: [1, 5], 3: [0, 4], 4: [1, 3, 5], 5: [2, 4]}
+    """
+    logger.info("[trace: create_grid_graph]")
+    return _materialize(implicit_graphs.GridGraph(width * height, width, periodic), fmt)
+
+
+def create_hexagonal_graph(width: int, height: int, periodic=False, fmt: str = "dict"):
+    """hexagonal (honeycomb) lattice of width x height nodes, without NetworkX
+
+    https://networkx.org/documentation/stable/reference/generated/networkx.generators.lattice.hexagonal_lattice_graph.html
+    Nodes are numbered as in create_grid_graph and every node has at most
+    3 neighbors; see implicit_graphs.HexagonalGraph.
+
+    Args:
+        width: nodes per row; each hexagon spans 3 columns and 2 rows
+        height: number of rows
+        periodic: join the opposite edges; needs an even number of rows and
+            of columns
+        fmt: see FORMATS
+
+    Returns:
+        the_graph: same layout as create_random_graph
+
+    >>> create_hexagonal_graph(3, 2)
+    {0: [1, 3], 1: [0, 2], 2: [1, 5], 3: [0, 4], 4: [3, 5], 5: [2, 4]}
+    """
+    logger.info("[trace: create_hexagonal_graph]")
+    return _materialize(
+        implicit_graphs.HexagonalGraph(width * height, width, periodic), fmt
+    )
+
+
+def create_gnp_graph(
+    number_of_nodes: int, probability: float, seed=None, fmt: str = "dict"
+):
+    """Erdős–Rényi random graph: each pair of nodes joined with probability p
+
+    Unlike create_random_graph, the number of edges is p n (n - 1) / 2 on
+    average, and the time is proportional to it; see
+    sparse_graphs.gnp_random_graph.
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        probability: chance of each edge; 10 / number_of_nodes gives an
+            average degree of about 10
+        seed: optional seed for numpy.random.default_rng
+        fmt: see FORMATS
+
+    Returns:
+        the_graph: same layout as create_random_graph, each edge listed by
+        both its nodes
+    """
+    logger.info("[trace: create_gnp_graph]")
+    _check_format(fmt)
+    return _materialize(
+        sparse_graphs.gnp_random_graph(number_of_nodes, probability, seed), fmt
+    )
+
+
+def create_gnm_graph(
+    number_of_nodes: int, number_of_edges: int, seed=None, fmt: str = "dict"
+):
+    """random graph with exactly number_of_edges edges
+
+    See sparse_graphs.gnm_random_graph.
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        number_of_edges: how many edges, each listed by both its nodes
+        seed: optional seed for numpy.random.default_rng
+        fmt: see FORMATS
+
+    Returns:
+        the_graph: same layout as create_random_graph
+    """
+    logger.info("[trace: create_gnm_graph]")
+    _check_format(fmt)
+    return _materialize(
+        sparse_graphs.gnm_random_graph(number_of_nodes, number_of_edges, seed), fmt
+    )
+
+
+def create_barabasi_albert_graph(
+    number_of_nodes: int, edges_per_node: int, seed=None, fmt: str = "dict"
+):
+    """scale-free random graph grown by preferential attachment
+
+    See sparse_graphs.barabasi_albert_graph.
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        edges_per_node: edges from each new node to earlier nodes
+        seed: optional seed for numpy.random.default_rng
+        fmt: see FORMATS
+
+    Returns:
+        the_graph: same layout as create_random_graph
+    """
+    logger.info("[trace: create_barabasi_albert_graph]")
+    _check_format(fmt)
+    return _materialize(
+        sparse_graphs.barabasi_albert_graph(number_of_nodes, edges_per_node, seed),
+        fmt,
+    )
+
+
+def _check_format(fmt: str) -> None:
+    if fmt not in FORMATS:
+        raise ValueError("unknown format " + str(fmt))
+
+
+def _resolve_format(fmt: str, number_of_nodes: int, number_of_edges: float) -> str:
+    """fmt, with "auto" replaced by the smaller of "bitset" and "csr"
+
+    Args:
+        fmt: see FORMATS
+        number_of_nodes: how many nodes in the graph
+        number_of_edges: how many neighbor entries, or their expected number
+    """
+    _check_format(fmt)
+    if fmt == "auto":
+        return dense_graphs.preferred_format(number_of_nodes, number_of_edges)
+    return fmt
+
+
+def _materialize(graph, fmt: str):
+    """the fmt form of an implicit_graphs object or a CSRGraph"""
+    _check_format(fmt)
+    if fmt == "auto":
+        fmt = dense_graphs.preferred_format(len(graph), graph.number_of_edges())
+    if fmt == "bitset" and not isinstance(graph, CSRGraph):
+        # straight from the edges: the CSRGraph of a dense graph is 32 times
+        # the size of its bit matrix
+        return dense_graphs.BitsetGraph.from_edge_batches(
+            len(graph), graph.edge_batches()
+        )
+    csr = graph if isinstance(graph, CSRGraph) else graph.to_csr()
+    if fmt == "csr":
+        return csr
+    if fmt == "bitset":
+        return dense_graphs.BitsetGraph.from_csr(csr)
+    return csr.to_dict()
 
 
 # ********** end primary functions *****************
@@ -173,10 +608,129 @@ def next_edge_in_graph(this_graph: dict):
             yield ((left_node, right_node))
 
 
+def next_edge_from_graph_of_size(num_nodes: int, backend: str = "python", seed=None):
+    """generate every edge in a random graph of size num_nodes
+
+    generator of edges
+    Unlike create_random_graph followed by next_edge_in_graph, the graph is
+    never held in memory: each node's neighbors are drawn when the previous
+    node's edges have been consumed. For the same backend and seed the edges
+    are the same as those of create_random_graph.
+
+    Args:
+        num_nodes: number of nodes in graph
+        backend: "python" or "numpy"; see BACKENDS
+        seed: optional random seed; see create_random_graph
+
+    Returns:
+        tuple of 2 integers. Each integer is the index of a node
+
+    >>> list(next_edge_from_graph_of_size(4, seed=1)) #doctest:+SKIP
+    """
+    logger.info("[trace: next_edge_from_graph_of_size]")
+    for left_node, list_of_nodes in _random_neighbor_lists(num_nodes, backend, seed):
+        for right_node in list_of_nodes:
+            yield ((left_node, right_node))
+
+
+def next_edge_batch_from_graph_of_size(
+    num_nodes: int,
+    backend: str = "python",
+    seed=None,
+    batch_edges: int = implicit_graphs.EDGE_BATCH_EDGES,
+):
+    """generate the edges of a random graph of size num_nodes as numpy arrays
+
+    The edges, in order, are those of next_edge_from_graph_of_size for the
+    same backend and seed, without a Python tuple per edge. The numpy
+    backend yields each chunk of rows as it is drawn (up to
+    NUMPY_CHUNK_CELLS / 2 edges); the python backend gathers rows until
+    there are batch_edges edges.
+
+    Args:
+        num_nodes: number of nodes in graph
+        backend: "python" or "numpy"; see BACKENDS
+        seed: optional random seed; see create_random_graph
+        batch_edges: edges per array of the python backend
+
+    Returns:
+        generator of numpy int64 arrays of shape (edges, 2)
+    """
+    logger.info("[trace: next_edge_batch_from_graph_of_size]")
+    import numpy as np
+
+    if backend == "numpy":
+        rng = np.random.default_rng(seed)
+        for first_node, counts, indices in _numpy_random_rows(
+            rng, num_nodes, 0, num_nodes
+        ):
+            row_nodes = np.repeat(
+                np.arange(first_node, first_node + len(counts), dtype=np.int64),
+                counts,
+            )
+            yield np.column_stack((row_nodes, indices))
+        return
+    left_nodes = array("q")
+    right_nodes = array("q")
+    for node_id, edge_list in _random_neighbor_lists(num_nodes, backend, seed):
+        left_nodes.extend([node_id] * len(edge_list))
+        right_nodes.extend(edge_list)
+        if len(left_nodes) >= batch_edges or node_id == num_nodes - 1:
+            yield np.column_stack(
+                (
+                    np.frombuffer(left_nodes, np.int64),
+                    np.frombuffer(right_nodes, np.int64),
+                )
+            )
+            left_nodes = array("q")
+            right_nodes = array("q")
+
+
+def _neighbor_lists_from_chunks(chunks):
+    """generate (node ID, list of neighbors) from chunks of numpy rows
+
+    Args:
+        chunks: iterable of (first node ID, neighbor count per node,
+            concatenated neighbor IDs), as from _numpy_random_rows
+
+    Returns:
+        generator of (node ID, list of neighbor node IDs)
+    """
+    for first_node, counts, indices in chunks:
+        # convert one row at a time so only one list of Python ints exists
+        position = 0
+        for node_id, count in enumerate(counts.tolist(), start=first_node):
+            yield node_id, indices[position : position + count].tolist()
+            position += count
+
+
+def _csr_from_chunks(chunks) -> CSRGraph:
+    """concatenate chunks of numpy rows into a CSRGraph
+
+    Args:
+        chunks: iterable of (first node ID, neighbor count per node,
+            concatenated neighbor IDs) covering every node in order
+
+    Returns:
+        CSRGraph backed by numpy buffers
+    """
+    import numpy as np
+
+    # the int32 buffers go straight into the CSRGraph; no boxed ints
+    all_counts = [np.zeros(1, dtype=np.int64)]
+    all_indices = [np.zeros(0, dtype=np.int32)]
+    for _, counts, indices in chunks:
+        all_counts.append(counts)
+        all_indices.append(indices)
+    return CSRGraph(
+        np.cumsum(np.concatenate(all_counts), dtype=np.int64),
+        np.concatenate(all_indices),
+    )
+
+
 # ********** end helper functions *****************
 
 if __name__ == "__main__":
-    logger.info("[trace: main]")
     # testing sys.argv isn't needed since argparse is being used
     #    if len(sys.argv)<2: # no command-line arguments
     # print to stdout to enable file-on-disk or piped workflow
@@ -216,10 +770,118 @@ if __name__ == "__main__":
         action="store_true",
         default=False,
         help="create JSON output, with key as node ID \
-        and value a list of nearest neighbors. \
+        and value a list of nearest neighbors, one node per line. \
         If not provided, prints edge tuples",
     )
 
+    # optional argument
+    theparser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="python",
+        help="engine used to draw the random graph. \
+        numpy is much faster for large graphs. Default is python",
+    )
+
+    # optional argument
+    theparser.add_argument(
+        "--graph",
+        choices=GRAPH_TYPES,
+        default="random",
+        help="kind of graph. ring, complete, grid and hexagonal are computed \
+        node by node as they are written, in constant memory; gnp, gnm and \
+        barabasi-albert are sparse random graphs drawn in time proportional \
+        to their edges. Default is random",
+    )
+
+    # optional argument
+    theparser.add_argument(
+        "--gridWidth",
+        metavar="nodes",
+        type=int,
+        default=None,
+        help="nodes per row of the grid and hexagonal graphs. \
+        Default is the square root of the number of nodes",
+    )
+
+    # optional argument
+    theparser.add_argument(
+        "--periodic",
+        action="store_true",
+        default=False,
+        help="join the opposite edges of the grid and hexagonal graphs",
+    )
+
+    # optional argument
+    theparser.add_argument(
+        "--probability",
+        metavar="p",
+        type=float,
+        default=None,
+        help="chance of each edge of --graph gnp",
+    )
+
+    # optional argument
+    theparser.add_argument(
+        "--numEdges",
+        metavar="edges",
+        type=int,
+        default=None,
+        help="number of edges of --graph gnm",
+    )
+
+    # optional argument
+    theparser.add_argument(
+        "--edgesPerNode",
+        metavar="edges",
+        type=int,
+        default=None,
+        help="edges each new node adds in --graph barabasi-albert",
+    )
+
+    # optional argument
+    theparser.add_argument(
+        "--format",
+        choices=graph_io.OUTPUT_FORMATS,
+        default="tuple",
+        help="format of the edge list: tuple is (0, 1) per line, \
+        tsv is tab-separated, binary is packed int32 pairs \
+        (see graph_io.py). Default is tuple",
+    )
+
+    # optional argument
+    theparser.add_argument(
+        "--workers",
+        metavar="processes",
+        type=int,
+        default=None,
+        help="generate the graph in this many processes with the numpy engine. \
+        The graph depends on --seed and --workers",
+    )
+
+    # optional argument
+    theparser.add_argument(
+        "--graphfile",
+        metavar="filename",
+        type=str,
+        default=None,
+        help="write the graph to this file in the memory-mappable CSR \
+        layout (see csr_graph.py) instead of writing to stdout. \
+        The graph is never held in memory",
+    )
+
+    # optional argument
+    theparser.add_argument(
+        "--stream",
+        action="store_true",
+        default=False,
+        help="write edges or JSON as they are generated \
+        instead of first building the whole graph in memory",
+    )
+
+    logging_config.add_logging_arguments(theparser)
+    metrics.add_metrics_arguments(theparser)
+
     # even though this script is under version control in a git repo,
     # the --version is useful for when the code base is provided to
     # a user outside of git
@@ -240,14 +902,31 @@ if __name__ == "__main__":
 
     args = theparser.parse_args()
 
+    logging_config.configure_logging(args.log_level, use_queue=args.log_queue)
+    if args.metrics_out:
+        metrics.enable(args.metrics_out)
+    logger.info("[trace: main]")
+
     # print(args)
 
     if args.version:
-        print("version: 0.1")
+        print("version: " + __version__)
         sys.exit()
     if args.history:
         print("version history")
         print("0.1: exemplar")
+        print("0.2: numpy backend for the random graph")
+        print("0.3: --stream")
+        print("0.4: buffered edge-list writer and --format")
+        print("0.5: --format binary")
+        print("0.6: --graphfile")
+        print("0.7: compact, streamed --json")
+        print("0.8: --workers")
+        print("0.9: --log-level and --log-queue; importing configures no logging")
+        print("0.10: --metrics-out")
+        print("0.11: --graph ring, complete, grid and hexagonal")
+        print("0.12: --periodic")
+        print("0.13: --graph gnp, gnm and barabasi-albert")
         sys.exit()
 
     random.seed(args.seed)
@@ -256,13 +935,99 @@ if __name__ == "__main__":
     if args.numNodes < 0:
         raise Exception("invalid number of nodes")
 
-    the_graph = create_random_graph(args.numNodes)
+    if args.workers is not None and args.workers < 1:
+        theparser.error("--workers must be at least 1")
 
-    # write result to either JSON or stdout
-    if args.json:
-        print(json.dumps(the_graph, indent=2))
+    if args.graph in sparse_graphs.MODELS:
+        option = SPARSE_MODEL_OPTIONS[args.graph]
+        if getattr(args, option) is None:
+            theparser.error("--graph %s needs --%s" % (args.graph, option))
+        with metrics.span("generate", nodes=args.numNodes) as span:
+            try:
+                generated_graph = sparse_graphs.create_sparse_graph(
+                    args.graph, args.numNodes, getattr(args, option), args.seed
+                )
+            except ValueError as error:
+                theparser.error(str(error))
+            span.count(edges=generated_graph.number_of_edges())
+        generated_neighbor_lists = generated_graph.items()
+    elif args.graph != "random":
+        # neighbors are computed as each node is written; nothing is stored
+        try:
+            generated_graph = implicit_graphs.create_implicit_graph(
+                args.graph, args.numNodes, args.gridWidth, args.periodic
+            )
+        except ValueError as error:
+            theparser.error(str(error))
+        generated_neighbor_lists = generated_graph.items()
+    elif args.workers:
+        # shards are written in node order as they arrive
+        generated_neighbor_lists = _neighbor_lists_from_chunks(
+            _random_shards(args.numNodes, args.workers, args.seed)
+        )
+    else:
+        generated_neighbor_lists = _random_neighbor_lists(
+            args.numNodes, args.backend, args.seed
+        )
+
+    if args.graphfile:
+        # generation and writing are interleaved
+        with metrics.span("generate+write_csr_file", nodes=args.numNodes) as span:
+            number_of_edges = write_csr_file(
+                generated_neighbor_lists,
+                args.numNodes,
+                args.graphfile,
+            )
+            span.count(edges=number_of_edges)
+        logger.info("wrote " + str(number_of_edges) + " edges to " + args.graphfile)
+        sys.exit()
+
+    if args.graph != "random":
+        neighbor_lists = generated_neighbor_lists
+        number_of_edges = generated_graph.number_of_edges()
+    elif args.stream:
+        # each node's neighbors are drawn as the previous node is written
+        neighbor_lists = generated_neighbor_lists
+        number_of_edges = graph_io.UNKNOWN_EDGE_COUNT
     else:
-        for edge_tuple in next_edge_in_graph(the_graph):
-            print(edge_tuple)
+        with metrics.span("generate", nodes=args.numNodes) as span:
+            if args.workers:
+                the_graph = create_random_graph_parallel(
+                    args.numNodes, args.workers, args.seed
+                )
+            else:
+                the_graph = create_random_graph(args.numNodes, args.backend, args.seed)
+            neighbor_lists = the_graph.items()
+            number_of_edges = sum(len(x) for x in the_graph.values())
+            span.count(edges=number_of_edges)
+
+    # write result to either JSON or stdout
+    # the reader may stop early (validate_graph.py --earlyExit, head);
+    # https://docs.python.org/3/library/signal.html#note-on-sigpipe
+    # with --stream or an implicit --graph this span includes the generation
+    try:
+        with metrics.span(
+            "generate+serialize"
+            if args.stream or args.graph in implicit_graphs.GRAPH_TYPES
+            else "serialize"
+        ) as span:
+            if args.json:
+                span.count(nodes=graph_io.write_json_adjacency(neighbor_lists))
+            elif args.format == "binary":
+                span.count(
+                    edges=graph_io.write_binary_edges(
+                        neighbor_lists, args.numNodes, number_of_edges=number_of_edges
+                    )
+                )
+            else:
+                span.count(
+                    edges=graph_io.write_neighbor_lists(
+                        neighbor_lists, line_format=args.format
+                    )
+                )
+    except BrokenPipeError:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
 
 # EOF
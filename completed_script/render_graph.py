@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+draw a picture of a graph of any size within a node, edge and time budget
+
+nx.draw(G) uses the spring layout, O(nodes^2) per iteration, and draws
+every node and edge; beyond a few thousand nodes it does not finish.
+create_png instead
+* samples at most node_budget nodes from the CSR buffers, either by
+  snowball sampling (breadth-first from a start node, so the picture shows
+  a connected neighborhood) or as a uniform random node set; the edges
+  between the sampled nodes are kept, thinned to edge_budget
+* picks a layout that costs O(nodes) unless the sample is small: circular
+  for rings, grid coordinates for lattices, spring only for small samples
+* gives up after time_limit seconds instead of stalling the caller
+
+https://en.wikipedia.org/wiki/Snowball_sampling
+https://networkx.org/documentation/stable/reference/drawing.html
+"""
+from collections import deque
+import logging
+import math
+import signal  # https://docs.python.org/3/library/signal.html#signal.setitimer
+
+import graph_algorithms
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NODE_BUDGET = 500
+DEFAULT_EDGE_BUDGET = 5000
+# seconds; 0 means no limit
+DEFAULT_TIME_LIMIT = 60
+
+SAMPLE_METHODS = ("snowball", "induced")
+LAYOUTS = ("auto", "spring", "circular", "grid", "random")
+
+# graph types of produce_output.py --graph that "auto" draws on a grid
+LATTICE_GRAPH_TYPES = ("grid", "hexagonal")
+
+# above this many sampled nodes "auto" does not use the spring layout
+SPRING_LAYOUT_MAX_NODES = 300
+
+
+class RenderTimeoutError(Exception):
+    """raised when drawing takes longer than the time limit"""
+
+
+def snowball_sample(graph, node_budget: int, start: int = 0):
+    """node IDs reached breadth-first from start, following listed edges
+
+    When the reachable nodes run out before the budget, the walk restarts
+    from the smallest node ID not yet sampled.
+
+    Args:
+        graph: a CSRGraph or an adjacency dictionary
+        node_budget: most node IDs to return
+        start: node ID where the walk begins
+
+    Returns:
+        sorted numpy int64 array of node IDs
+    """
+    logger.info("[trace: snowball_sample]")
+    import numpy as np
+
+    csr = graph_algorithms.as_csr(graph)
+    node_budget = min(node_budget, len(csr))
+    sampled = set()
+    frontier = deque()
+    next_restart = 0
+    while len(sampled) < node_budget:
+        if not frontier:
+            if start not in sampled and start < len(csr):
+                node = start
+            else:
+                while next_restart in sampled:
+                    next_restart += 1
+                node = next_restart
+            sampled.add(node)
+            frontier.append(node)
+        node = frontier.popleft()
+        for neighbor in csr.neighbors(node).tolist():
+            if len(sampled) == node_budget:
+                break
+            if neighbor not in sampled:
+                sampled.add(neighbor)
+                frontier.append(neighbor)
+    return np.array(sorted(sampled), dtype=np.int64)
+
+
+def induced_sample(graph, node_budget: int, seed=0):
+    """node IDs chosen uniformly at random without replacement
+
+    Args:
+        graph: a CSRGraph or an adjacency dictionary
+        node_budget: most node IDs to return
+        seed: passed to numpy.random.default_rng
+
+    Returns:
+        sorted numpy int64 array of node IDs
+    """
+    logger.info("[trace: induced_sample]")
+    import numpy as np
+
+    number_of_nodes = len(graph_algorithms.as_csr(graph))
+    rng = np.random.default_rng(seed)
+    return np.sort(
+        rng.choice(number_of_nodes, min(node_budget, number_of_nodes), replace=False)
+    ).astype(np.int64)
+
+
+def edges_among(graph, nodes):
+    """the edges whose two ends are both in nodes
+
+    Only the neighbor lists of the given nodes are read.
+
+    Args:
+        graph: a CSRGraph or an adjacency dictionary
+        nodes: sorted numpy integer array of node IDs
+
+    Returns:
+        numpy int64 array of shape (edges, 2)
+    """
+    import numpy as np
+
+    csr = graph_algorithms.as_csr(graph)
+    blocks = [np.empty((0, 2), dtype=np.int64)]
+    for node in nodes.tolist():
+        neighbors = np.asarray(csr.neighbors(node), dtype=np.int64)
+        # nodes is sorted, so membership is a binary search
+        position = np.minimum(np.searchsorted(nodes, neighbors), len(nodes) - 1)
+        neighbors = neighbors[nodes[position] == neighbors]
+        blocks.append(np.column_stack((np.full(len(neighbors), node), neighbors)))
+    return np.concatenate(blocks)
+
+
+def sample_graph(
+    graph,
+    node_budget: int = DEFAULT_NODE_BUDGET,
+    edge_budget: int = DEFAULT_EDGE_BUDGET,
+    method: str = "snowball",
+    seed=0,
+):
+    """the nodes and edges to draw
+
+    Args:
+        graph: a CSRGraph or an adjacency dictionary
+        node_budget: most nodes kept
+        edge_budget: most edges kept; a uniform random subset beyond that
+        method: one of SAMPLE_METHODS
+        seed: for the random choices
+
+    Returns:
+        nodes, edges: numpy int64 arrays of node IDs and of shape (edges, 2)
+    """
+    logger.info("[trace: sample_graph]")
+    import numpy as np
+
+    if method == "snowball":
+        nodes = snowball_sample(graph, node_budget)
+    elif method == "induced":
+        nodes = induced_sample(graph, node_budget, seed)
+    else:
+        raise ValueError("sample method must be one of " + ", ".join(SAMPLE_METHODS))
+    edges = edges_among(graph, nodes)
+    if len(edges) > edge_budget:
+        rng = np.random.default_rng(seed)
+        edges = edges[np.sort(rng.choice(len(edges), edge_budget, replace=False))]
+    return nodes, edges
+
+
+def choose_layout(graph, number_of_sampled_nodes: int, graph_type=None) -> str:
+    """the "auto" layout: grid for a lattice, circular for a ring, spring
+    for a small sample
+
+    A graph where every node lists exactly one neighbor and is listed by
+    exactly one node is a union of cycles, drawn best as a circle. A
+    lattice cannot be told from its edges cheaply, so it is named by
+    graph_type, as in produce_output.py --graph.
+    """
+    import numpy as np
+
+    if graph_type in LATTICE_GRAPH_TYPES:
+        return "grid"
+
+    csr = graph_algorithms.as_csr(graph)
+    out_degrees = graph_algorithms.out_degrees(csr)
+    if len(csr) and (out_degrees == 1).all():
+        in_degrees = np.bincount(np.asarray(csr.indices), minlength=len(csr))
+        if (in_degrees == 1).all():
+            return "circular"
+    if number_of_sampled_nodes <= SPRING_LAYOUT_MAX_NODES:
+        return "spring"
+    return "circular"
+
+
+def layout_positions(nodes, edges, layout: str, grid_width=None, seed=0) -> dict:
+    """x, y position of every sampled node
+
+    circular and grid place nodes by node ID, so a sample of a ring or a
+    lattice keeps its shape.
+
+    Args:
+        nodes: numpy integer array of node IDs
+        edges: numpy integer array of shape (edges, 2), used by spring
+        layout: one of LAYOUTS other than "auto"
+        grid_width: nodes per row for the grid layout; default is the
+            square root of the largest node ID
+        seed: for the spring and random layouts
+
+    Returns:
+        dictionary from node ID to (x, y)
+    """
+    logger.info("[trace: layout_positions]")
+    import numpy as np
+
+    node_ids = nodes.tolist()
+    if layout == "circular":
+        # angles by node ID, not by rank in the sample
+        angles = 2 * np.pi * nodes / max(int(nodes.max(initial=0)) + 1, 1)
+        return dict(
+            zip(node_ids, zip(np.cos(angles).tolist(), np.sin(angles).tolist()))
+        )
+    if layout == "grid":
+        if grid_width is None:
+            grid_width = max(math.isqrt(int(nodes.max(initial=0))) + 1, 1)
+        rows, columns = np.divmod(nodes, grid_width)
+        return dict(zip(node_ids, zip(columns.tolist(), (-rows).tolist())))
+    if layout == "random":
+        positions = np.random.default_rng(seed).random((len(nodes), 2))
+        return dict(zip(node_ids, map(tuple, positions.tolist())))
+    if layout == "spring":
+        import networkx as nx  # https://networkx.org/documentation/stable/reference/generated/networkx.drawing.layout.spring_layout.html
+
+        G = nx.Graph()
+        G.add_nodes_from(node_ids)
+        G.add_edges_from(edges.tolist())
+        return nx.spring_layout(G, seed=seed)
+    raise ValueError("layout must be one of " + ", ".join(LAYOUTS))
+
+
+def _raise_render_timeout(signal_number, frame):
+    raise RenderTimeoutError("drawing took longer than the time limit")
+
+
+def create_png(
+    graph,
+    filename: str = "output.png",
+    node_budget: int = DEFAULT_NODE_BUDGET,
+    edge_budget: int = DEFAULT_EDGE_BUDGET,
+    method: str = "snowball",
+    layout: str = "auto",
+    grid_width=None,
+    time_limit: float = DEFAULT_TIME_LIMIT,
+    seed=0,
+    graph_type=None,
+):
+    """draw a sample of graph to a PNG file
+
+    Args:
+        graph: a CSRGraph (including MappedGraph) or an adjacency dictionary
+        filename: where to write
+        node_budget: most nodes drawn
+        edge_budget: most edges drawn
+        method: one of SAMPLE_METHODS
+        layout: one of LAYOUTS
+        grid_width: nodes per row for the grid layout
+        time_limit: seconds before RenderTimeoutError; 0 for no limit.
+            Enforced with SIGALRM, so only on Unix in the main thread
+        seed: for sampling and layout
+        graph_type: the kind of graph, if known; see choose_layout
+
+    Returns:
+        nodes, edges: what was drawn; see sample_graph
+
+    Raises:
+        RenderTimeoutError: the PNG was not written in time
+    """
+    logger.info("[trace: create_png]")
+    graph = graph_algorithms.as_csr(graph)
+    use_alarm = time_limit > 0 and hasattr(signal, "setitimer")
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_render_timeout)
+        signal.setitimer(signal.ITIMER_REAL, time_limit)
+    try:
+        nodes, edges = sample_graph(graph, node_budget, edge_budget, method, seed)
+        if layout == "auto":
+            layout = choose_layout(graph, len(nodes), graph_type)
+        positions = layout_positions(nodes, edges, layout, grid_width, seed)
+
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
+        G = nx.Graph()
+        G.add_nodes_from(nodes.tolist())
+        G.add_edges_from(edges.tolist())
+        figure = plt.figure()
+        # smaller markers and no labels when there are many nodes
+        nx.draw(
+            G,
+            positions,
+            node_size=max(300 * min(1, 50 / max(len(nodes), 1)), 5),
+            width=0.5 if len(edges) > 500 else 1.0,
+            with_labels=len(nodes) <= 50,
+        )
+        if len(nodes) < len(graph):
+            # nx.draw fills the figure with its own axes, so title the figure
+            figure.suptitle(
+                "%d of %d nodes, %d edges (%s sample)"
+                % (len(nodes), len(graph), len(edges), method)
+            )
+        plt.savefig(filename)
+        plt.close(figure)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    return nodes, edges
+
+
+# EOF
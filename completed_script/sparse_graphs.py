@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+random graph models with as many edges as asked for, in O(nodes + edges)
+
+create_random_graph gives each node a degree drawn uniformly from
+[0, number of nodes), so a graph has about n^2/2 edges and drawing it is
+quadratic. These models have the sparse graphs of real workloads:
+
+* gnp_random_graph: Erdős–Rényi G(n, p), each pair of nodes joined with
+  probability p. The pairs are numbered and the gaps between chosen pairs
+  are drawn from the geometric distribution, so the time is proportional
+  to the edges chosen, not to the n^2 pairs
+  (Batagelj and Brandes, "Efficient generation of large random networks",
+  Phys. Rev. E 71, 036113, 2005)
+  https://networkx.org/documentation/stable/reference/generated/networkx.generators.random_graphs.fast_gnp_random_graph.html
+* gnm_random_graph: G(n, m), m distinct pairs drawn uniformly
+  https://networkx.org/documentation/stable/reference/generated/networkx.generators.random_graphs.gnm_random_graph.html
+* barabasi_albert_graph: preferential attachment; each new node joins
+  edges_per_node distinct earlier nodes, each drawn from the array of the
+  endpoints of all earlier edges (the "repeated nodes"), so with
+  probability proportional to its degree
+  https://networkx.org/documentation/stable/reference/generated/networkx.generators.random_graphs.barabasi_albert_graph.html
+
+Each returns a CSRGraph backed by numpy buffers, neighbors in increasing
+order; undirected graphs list every edge in both directions, like the
+grid of implicit_graphs. produce_output.create_gnp_graph and the other
+create_ functions give the dictionary.
+"""
+import logging
+import math
+
+from csr_graph import CSRGraph
+
+logger = logging.getLogger(__name__)
+
+# what produce_output.py --graph accepts besides random and implicit_graphs;
+# see create_sparse_graph
+MODELS = ("gnp", "gnm", "barabasi-albert")
+
+
+def gnp_random_graph(
+    number_of_nodes: int, probability: float, seed=None, directed: bool = False
+) -> CSRGraph:
+    """Erdős–Rényi graph: each pair of nodes is an edge with probability p
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        probability: chance of each edge, from 0 to 1
+        seed: optional seed for numpy.random.default_rng
+        directed: each ordered pair (u, v) is drawn on its own instead of
+            each unordered pair {u, v}
+
+    Returns:
+        CSRGraph with about p n (n - 1) neighbor entries either way
+
+    >>> gnp_random_graph(4, 1.0).to_dict()
+    {0: [1, 2, 3], 1: [0, 2, 3], 2: [0, 1, 3], 3: [0, 1, 2]}
+    """
+    logger.info("[trace: gnp_random_graph]")
+    import numpy as np  # https://numpy.org/doc/stable/reference/random/generated/numpy.random.Generator.geometric.html
+
+    _check_number_of_nodes(number_of_nodes)
+    if not 0 <= probability <= 1:
+        raise ValueError("probability must be between 0 and 1")
+    rng = np.random.default_rng(seed)
+    pairs = _number_of_pairs(number_of_nodes, directed)
+    if probability == 0 or pairs == 0:
+        chosen = np.zeros(0, dtype=np.int64)
+    elif probability == 1:
+        chosen = np.arange(pairs, dtype=np.int64)
+    else:
+        chosen = _geometric_positions(rng, pairs, probability)
+    return _csr_from_pair_numbers(number_of_nodes, chosen, directed)
+
+
+def gnm_random_graph(
+    number_of_nodes: int, number_of_edges: int, seed=None, directed: bool = False
+) -> CSRGraph:
+    """graph with number_of_edges edges drawn uniformly among all pairs
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        number_of_edges: how many distinct edges; an undirected edge is
+            listed by both its nodes
+        seed: optional seed for numpy.random.default_rng
+        directed: draw ordered pairs (u, v) instead of unordered {u, v}
+
+    Returns:
+        CSRGraph
+
+    >>> gnm_random_graph(5, 4, seed=1).number_of_edges()
+    8
+    """
+    logger.info("[trace: gnm_random_graph]")
+    import numpy as np  # https://numpy.org/doc/stable/reference/random/generated/numpy.random.Generator.choice.html
+
+    _check_number_of_nodes(number_of_nodes)
+    pairs = _number_of_pairs(number_of_nodes, directed)
+    if not 0 <= number_of_edges <= pairs:
+        raise ValueError("number of edges must be between 0 and %d" % pairs)
+    rng = np.random.default_rng(seed)
+    # without replacement and without the shuffle, numpy draws from a hash
+    # set (or a partial permutation when most pairs are chosen): O(edges)
+    chosen = rng.choice(pairs, size=number_of_edges, replace=False, shuffle=False)
+    return _csr_from_pair_numbers(number_of_nodes, chosen.astype(np.int64), directed)
+
+
+def barabasi_albert_graph(
+    number_of_nodes: int, edges_per_node: int, seed=None
+) -> CSRGraph:
+    """preferential attachment: new nodes join well-connected nodes
+
+    As in NetworkX, the graph starts as a star, node 0 joined to nodes
+    1..edges_per_node; each later node then joins edges_per_node distinct
+    earlier nodes.
+
+    The endpoints of the edges, in order, are the repeated-nodes array:
+    position 2e is the first node of edge e and 2e + 1 the node it joined.
+    A new edge draws a position among those of the edges before its node,
+    so every edge's other node is a pointer to an earlier position. All
+    the pointers are drawn at once and followed with pointer jumping, and
+    the edges of a node that reach the same node are drawn again.
+
+    Args:
+        number_of_nodes: how many nodes in the graph
+        edges_per_node: edges each new node adds; at least 1 and less than
+            number_of_nodes
+        seed: optional seed for numpy.random.default_rng
+
+    Returns:
+        undirected CSRGraph with edges_per_node * (number_of_nodes -
+        edges_per_node) edges, each listed by both its nodes
+
+    >>> barabasi_albert_graph(4, 3).to_dict()
+    {0: [1, 2, 3], 1: [0], 2: [0], 3: [0]}
+    """
+    logger.info("[trace: barabasi_albert_graph]")
+    import numpy as np  # https://numpy.org/doc/stable/reference/random/generated/numpy.random.Generator.integers.html
+
+    if not 1 <= edges_per_node < number_of_nodes:
+        raise ValueError("edges per node must be at least 1 and less than nodes")
+    rng = np.random.default_rng(seed)
+    first_new_edge = edges_per_node
+    sources = np.zeros(edges_per_node * (number_of_nodes - edges_per_node), np.int64)
+    targets = np.empty_like(sources)
+    targets[:first_new_edge] = np.arange(1, edges_per_node + 1)
+    sources[first_new_edge:] = np.repeat(
+        np.arange(edges_per_node + 1, number_of_nodes, dtype=np.int64),
+        edges_per_node,
+    )
+    # positions of the endpoints of the edges added before each new node
+    bounds = 2 * edges_per_node * (sources[first_new_edge:] - edges_per_node)
+    pointers = rng.integers(0, bounds)
+    dependents = _Dependents(pointers, first_new_edge)
+    slots = np.arange(len(pointers))
+    while len(slots):
+        _follow_pointers(pointers, sources, targets, first_new_edge, slots)
+        # the edges of the nodes that have a changed edge
+        rows = np.unique(slots // edges_per_node)
+        slots = (rows[:, None] * edges_per_node + np.arange(edges_per_node)).ravel()
+        repeated = slots[
+            _repeated_in_row(targets[first_new_edge + slots], edges_per_node)
+        ]
+        pointers[repeated] = rng.integers(0, bounds[repeated])
+        dependents.redrawn(repeated)
+        # the node of every edge whose pointer leads through a redrawn edge
+        # has to be found again; repeats are rare, so these are few
+        slots = dependents.closure(repeated)
+    return _undirected_csr(number_of_nodes, sources, targets)
+
+
+def create_sparse_graph(
+    model: str, number_of_nodes: int, parameter, seed=None
+) -> CSRGraph:
+    """a random graph by model name
+
+    Args:
+        model: one of MODELS
+        number_of_nodes: node IDs are 0..number_of_nodes-1
+        parameter: the probability of "gnp", the number of edges of "gnm",
+            the edges per node of "barabasi-albert"
+        seed: optional seed for numpy.random.default_rng
+
+    Returns:
+        CSRGraph
+    """
+    logger.info("[trace: create_sparse_graph]")
+    if model == "gnp":
+        return gnp_random_graph(number_of_nodes, parameter, seed)
+    if model == "gnm":
+        return gnm_random_graph(number_of_nodes, parameter, seed)
+    if model == "barabasi-albert":
+        return barabasi_albert_graph(number_of_nodes, parameter, seed)
+    raise ValueError("model must be one of " + ", ".join(MODELS))
+
+
+# ********** helpers **********
+
+
+def _check_number_of_nodes(number_of_nodes: int) -> None:
+    if number_of_nodes < 0:
+        raise ValueError("invalid number of nodes")
+
+
+def _number_of_pairs(number_of_nodes: int, directed: bool) -> int:
+    """how many edges the complete graph has"""
+    if directed:
+        return number_of_nodes * (number_of_nodes - 1)
+    return number_of_nodes * (number_of_nodes - 1) // 2
+
+
+def _geometric_positions(rng, total: int, probability: float):
+    """increasing positions in [0, total), each present with probability p
+
+    The gap to the next position is geometric; gaps are drawn in blocks a
+    little larger than the number of positions still expected.
+    """
+    import numpy as np
+
+    blocks = []
+    last = -1
+    while True:
+        expected = (total - 1 - last) * probability
+        size = int(expected + 4 * math.sqrt(expected)) + 64
+        block = last + np.cumsum(rng.geometric(probability, size))
+        # the positions increase, so the ones in range are a prefix
+        blocks.append(block[: np.searchsorted(block, total)])
+        if block[-1] >= total:
+            return np.concatenate(blocks)
+        last = int(block[-1])
+
+
+def _csr_from_pair_numbers(number_of_nodes: int, chosen, directed: bool) -> CSRGraph:
+    """the graph of the chosen pair numbers; see _number_of_pairs
+
+    Directed pair k is (u, v) with u = k // (n - 1), skipping v = u, so
+    increasing numbers are already in CSR order. Undirected pair k is
+    {u, v} with u < v and k = v (v - 1) / 2 + u.
+    """
+    import numpy as np
+
+    if directed:
+        sources, remainder = np.divmod(chosen, max(number_of_nodes - 1, 1))
+        targets = remainder + (remainder >= sources)
+        if not np.all(chosen[1:] > chosen[:-1]):
+            order = np.argsort(chosen)
+            sources, targets = sources[order], targets[order]
+        return _csr_from_sorted_edges(number_of_nodes, sources, targets)
+    larger = np.floor((1 + np.sqrt(1 + 8 * chosen.astype(np.float64))) / 2)
+    larger = larger.astype(np.int64)
+    # the square root may be off by one either way for large k
+    larger -= larger * (larger - 1) // 2 > chosen
+    larger += (larger + 1) * larger // 2 <= chosen
+    return _undirected_csr(number_of_nodes, chosen - larger * (larger - 1) // 2, larger)
+
+
+def _undirected_csr(number_of_nodes: int, sources, targets) -> CSRGraph:
+    """CSRGraph listing each edge (u, v) as both u -> v and v -> u
+
+    The edges are sorted as the integers u n + v, one numpy sort.
+    """
+    import numpy as np
+
+    keys = np.concatenate(
+        (sources * number_of_nodes + targets, targets * number_of_nodes + sources)
+    )
+    keys.sort()
+    sources, targets = np.divmod(keys, max(number_of_nodes, 1))
+    return _csr_from_sorted_edges(number_of_nodes, sources, targets)
+
+
+def _csr_from_sorted_edges(number_of_nodes: int, sources, targets) -> CSRGraph:
+    """CSRGraph of edges already sorted by source node"""
+    import numpy as np
+
+    offsets = np.zeros(number_of_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=number_of_nodes), out=offsets[1:])
+    return CSRGraph(offsets, targets.astype(np.int32))
+
+
+def _follow_pointers(pointers, sources, targets, first_new_edge: int, slots):
+    """set targets of the new edges in slots to the node their pointer leads to
+
+    Position 2e holds sources[e]. Position 2e + 1 holds targets[e], known
+    for e < first_new_edge and for the new edges not in slots, and
+    otherwise where the pointer of edge e leads. Every pointer is to an
+    earlier position, so following them ends.
+
+    Args:
+        pointers: position of each new edge, edge first_new_edge first
+        sources, targets: nodes of every edge
+        first_new_edge: number of edges whose targets are not pointers
+        slots: increasing indices into pointers
+    """
+    import numpy as np
+
+    positions = pointers.copy()
+    pending = np.zeros(len(pointers), dtype=bool)
+    pending[slots] = True
+    while len(slots):
+        edges = positions[slots] >> 1
+        odd = (positions[slots] & 1).astype(bool)
+        later = np.maximum(edges - first_new_edge, 0)
+        follow = odd & (edges >= first_new_edge) & pending[later]
+        from_sources = ~odd
+        targets[first_new_edge + slots[from_sources]] = sources[edges[from_sources]]
+        from_targets = odd & ~follow
+        targets[first_new_edge + slots[from_targets]] = targets[edges[from_targets]]
+        pending[slots[~follow]] = False
+        # pointer jumping: take the position the other edge leads to so far
+        positions[slots[follow]] = positions[later[follow]]
+        slots = slots[follow]
+
+
+class _Dependents:
+    """which new edges have a pointer to the target of which other new edge"""
+
+    def __init__(self, pointers, first_new_edge: int):
+        import numpy as np
+
+        self.pointers = pointers
+        self.first_new_edge = first_new_edge
+        parents, children = self._links(np.arange(len(pointers)))
+        order = np.argsort(parents, kind="stable")
+        self.children = children[order]
+        self.offsets = np.zeros(len(pointers) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(parents, minlength=len(pointers)), out=self.offsets[1:])
+        # links of redrawn pointers; the links they had are kept, which
+        # only adds edges that are found again unchanged
+        self.extra_parents = np.zeros(0, dtype=np.int64)
+        self.extra_children = np.zeros(0, dtype=np.int64)
+
+    def _links(self, slots):
+        """(parent, child) for the slots whose pointer is to a new target"""
+        positions = self.pointers[slots]
+        parents = (positions >> 1) - self.first_new_edge
+        linked = (positions & 1).astype(bool) & (parents >= 0)
+        return parents[linked], slots[linked]
+
+    def redrawn(self, slots) -> None:
+        import numpy as np
+
+        parents, children = self._links(slots)
+        self.extra_parents = np.concatenate((self.extra_parents, parents))
+        self.extra_children = np.concatenate((self.extra_children, children))
+
+    def closure(self, slots):
+        """slots and every slot whose pointer leads through one of them"""
+        import numpy as np
+
+        found = [slots]
+        while len(slots):
+            starts = self.offsets[slots]
+            counts = self.offsets[slots + 1] - starts
+            # the concatenated ranges starts[i]:starts[i] + counts[i]
+            within = np.arange(counts.sum()) - np.repeat(
+                np.cumsum(counts) - counts, counts
+            )
+            children = self.children[np.repeat(starts, counts) + within]
+            extra = self.extra_children[np.isin(self.extra_parents, slots)]
+            slots = np.unique(np.concatenate((children, extra)))
+            found.append(slots)
+        return np.unique(np.concatenate(found))
+
+
+def _repeated_in_row(values, row_length: int):
+    """mask of the values equal to one earlier in their row of row_length"""
+    import numpy as np
+
+    rows = values.reshape(-1, row_length)
+    order = np.argsort(rows, axis=1, kind="stable")
+    in_order = np.take_along_axis(rows, order, axis=1)
+    repeated_in_order = np.zeros(rows.shape, dtype=bool)
+    repeated_in_order[:, 1:] = in_order[:, 1:] == in_order[:, :-1]
+    repeated = np.empty_like(repeated_in_order)
+    np.put_along_axis(repeated, order, repeated_in_order, axis=1)
+    return repeated.ravel()
+
+
+# EOF
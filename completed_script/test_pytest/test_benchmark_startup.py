@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import benchmark_startup
+
+
+@pytest.mark.parametrize(
+    "case",
+    benchmark_startup.STARTUP_CASES,
+    ids=lambda case: " ".join(case.arguments),
+)
+def test_no_heavy_imports_at_startup(case):
+    assert benchmark_startup.forbidden_imports(case) == []
+
+
+def test_import_times_are_parsed():
+    times = benchmark_startup.import_times(["-c", "import json"])
+    assert "json" in times
+    self_us, cumulative_us = times["json"]
+    assert 0 <= self_us <= cumulative_us
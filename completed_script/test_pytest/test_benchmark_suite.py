@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+import benchmark_suite
+
+
+def test_every_case_runs():
+    document = benchmark_suite.run_benchmarks(sizes=(30,), repeat=1, isolated=False)
+    assert sorted(document["results"]) == sorted(
+        case.name + "[30]" for case in benchmark_suite.BENCHMARK_CASES
+    )
+    for measured in document["results"].values():
+        assert measured["seconds"] >= 0
+        assert measured["peak_bytes"] >= 0
+
+
+def test_regressions_beyond_threshold():
+    baseline = {
+        "results": {
+            "a[10]": {"seconds": 1.0, "peak_bytes": 10**8},
+            "b[10]": {"seconds": 1.0, "peak_bytes": 10**8},
+            "c[10]": {"seconds": 0.001, "peak_bytes": 10},
+        }
+    }
+    results = {
+        "results": {
+            "a[10]": {"seconds": 1.2, "peak_bytes": 10**8},
+            "b[10]": {"seconds": 1.0, "peak_bytes": 2 * 10**8},
+            # below the noise floor
+            "c[10]": {"seconds": 0.003, "peak_bytes": 1000},
+            "new[10]": {"seconds": 9.0, "peak_bytes": 10**9},
+        }
+    }
+    found = benchmark_suite.regressions(results, baseline, threshold=0.25)
+    assert len(found) == 1 and found[0].startswith("b[10] peak_bytes")
+
+
+def test_isolated_run():
+    document = benchmark_suite.run_benchmarks(sizes=(30,), name_filter="parse.json")
+    assert list(document["results"]) == ["parse.json[30]"]
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import pytest
+
+from csr_graph import CSRGraph
+
+
+def test_round_trip():
+    the_graph = {0: [1, 2], 1: [], 2: [0, 1]}
+    csr = CSRGraph.from_dict(the_graph)
+    assert csr.to_dict() == the_graph
+    assert CSRGraph.from_dict(csr.to_dict()) == csr
+    assert list(csr.neighbors(2)) == [0, 1]
+    assert csr.degree(1) == 0
+    assert list(csr.edges()) == [(0, 1), (0, 2), (2, 0), (2, 1)]
+    assert csr.nbytes() == 4 * 8 + 4 * 4
+
+
+def test_from_dict_fills_missing_nodes():
+    assert CSRGraph.from_dict({0: [3]}).to_dict() == {0: [3], 1: [], 2: [], 3: []}
+
+
+def test_rejects_inconsistent_buffers():
+    with pytest.raises(ValueError):
+        CSRGraph([0, 2], [1])
+
+
+def test_mapped_graph_round_trip(tmp_path):
+    from csr_graph import MappedGraph, write_csr_file
+
+    the_graph = {0: [1, 2], 1: [], 2: [0, 1], 3: [2]}
+    filename = str(tmp_path / "graph.csr")
+    assert write_csr_file(the_graph.items(), 4, filename) == 5
+    mapped = MappedGraph(filename)
+    assert len(mapped) == 4
+    assert mapped.degree(2) == 2
+    assert mapped.neighbors(3).tolist() == [2]
+    assert mapped.to_dict() == the_graph
+    assert mapped == CSRGraph.from_dict(the_graph)
+
+
+def test_write_csr_file_fills_skipped_nodes(tmp_path):
+    from csr_graph import MappedGraph, write_csr_file
+
+    filename = str(tmp_path / "graph.csr")
+    write_csr_file({1: [0], 3: [1]}.items(), 5, filename)
+    assert MappedGraph(filename).to_dict() == {0: [], 1: [0], 2: [], 3: [1], 4: []}
+    with pytest.raises(ValueError):
+        write_csr_file({1: [0], 0: [1]}.items(), 2, filename)
+
+
+def test_mapped_graph_rejects_other_files(tmp_path):
+    from csr_graph import MappedGraph
+
+    filename = tmp_path / "not_a_graph"
+    filename.write_bytes(b"(0, 1)\n" * 10)
+    with pytest.raises(ValueError):
+        MappedGraph(str(filename))
+
+
+def test_write_csr_graph_matches_write_csr_file(tmp_path):
+    import numpy as np
+
+    from csr_graph import MappedGraph, write_csr_file, write_csr_graph
+
+    the_graph = {0: [1, 2], 1: [], 2: [0, 1], 3: [2]}
+    write_csr_file(the_graph.items(), 4, str(tmp_path / "by_node.csr"))
+    csr = CSRGraph.from_dict(the_graph)
+    assert write_csr_graph(csr, str(tmp_path / "array.csr")) == 5
+    numpy_csr = CSRGraph(np.asarray(csr.offsets), np.asarray(csr.indices, np.int64))
+    write_csr_graph(numpy_csr, str(tmp_path / "numpy.csr"))
+    expected = (tmp_path / "by_node.csr").read_bytes()
+    assert (tmp_path / "array.csr").read_bytes() == expected
+    assert (tmp_path / "numpy.csr").read_bytes() == expected
+    mapped = MappedGraph(str(tmp_path / "numpy.csr"))
+    write_csr_graph(mapped, str(tmp_path / "copy.csr"))
+    assert (tmp_path / "copy.csr").read_bytes() == expected
+
+
+def test_edge_batches_keep_each_node_whole():
+    csr = CSRGraph.from_dict({0: [1, 2, 3], 1: [], 2: [0], 3: [1, 2]})
+    batches = [batch.tolist() for batch in csr.edge_batches(batch_edges=2)]
+    assert batches == [[[0, 1], [0, 2], [0, 3]], [[2, 0]], [[3, 1], [3, 2]]]
+    assert list(CSRGraph.from_dict({}).edge_batches()) == []
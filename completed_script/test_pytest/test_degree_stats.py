@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+import degree_stats
+import graph_algorithms
+import produce_output
+from csr_graph import CSRGraph
+
+
+def test_summary_from_degrees():
+    summary = degree_stats.degree_summary([1, 3, 3, 0, 3], percentiles=(0, 50, 100))
+    assert summary.number_of_nodes == 5
+    assert (summary.minimum, summary.maximum) == (0, 3)
+    assert summary.mean == 2.0
+    assert summary.percentiles == {0: 0, 50: 3, 100: 3}
+    assert summary.histogram.tolist() == [1, 1, 0, 3]
+    assert "3 nodes have degree 3" in str(summary)
+
+
+def test_summary_of_no_nodes():
+    summary = degree_stats.degree_summary([])
+    assert summary.number_of_nodes == 0
+    assert summary.maximum == 0
+
+
+def test_counter_grows_with_node_ids():
+    counter = degree_stats.DegreeCounter()
+    counter.add_edge_batch(np.array([[0, 1], [1, 0]]))
+    counter.add_edge_batch(np.array([[7, 7]]))
+    counter.add_node(9)
+    assert counter.out_degrees.tolist() == [1, 1, 0, 0, 0, 0, 0, 1, 0, 0]
+    assert counter.undirected_degrees().tolist() == [2, 2, 0, 0, 0, 0, 0, 2, 0, 0]
+    assert counter.edges_read == 3
+
+
+def test_symmetric_counter_counts_each_edge_once():
+    counter = degree_stats.DegreeCounter(3, symmetric=True)
+    counter.add_edges([(0, 1), (1, 0), (1, 2), (2, 1)])
+    assert counter.undirected_degrees().tolist() == [1, 2, 1]
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_streaming_counts_match_graph(seed, monkeypatch):
+    monkeypatch.setattr(degree_stats, "COUNT_CHUNK_EDGES", 7)
+    the_graph = produce_output.create_random_graph(40, "numpy", seed)
+    csr = CSRGraph.from_dict(the_graph)
+    from_edges = degree_stats.DegreeCounter(len(the_graph))
+    from_edges.add_edges(produce_output.next_edge_in_graph(the_graph))
+    from_csr = degree_stats.DegreeCounter()
+    from_csr.add_csr(csr)
+    in_degrees = np.bincount(np.asarray(csr.indices), minlength=len(csr))
+    for counter in (from_edges, from_csr):
+        assert (
+            counter.out_degrees.tolist() == graph_algorithms.out_degrees(csr).tolist()
+        )
+        assert counter.in_degrees.tolist() == in_degrees.tolist()
+    for kind, summary in from_edges.summaries().items():
+        assert str(summary) == str(from_csr.summaries()[kind])
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+import dense_graphs
+import graph_algorithms
+import implicit_graphs
+import produce_output
+from csr_graph import CSRGraph
+from dense_graphs import BitsetGraph
+
+# 130 nodes: three words per row, the last one partly used
+RANDOM_CSR = produce_output.create_random_graph(130, "numpy", seed=4, fmt="csr")
+
+
+def test_same_edges_as_the_csr_graph():
+    bitset = BitsetGraph.from_csr(RANDOM_CSR)
+    expected = {node: sorted(neighbors) for node, neighbors in RANDOM_CSR.items()}
+    assert bitset.to_dict() == expected
+    assert bitset == expected
+    assert bitset.to_csr() == CSRGraph.from_dict(expected)
+    assert bitset.number_of_edges() == RANDOM_CSR.number_of_edges()
+    assert np.array_equal(
+        bitset.out_degrees(), graph_algorithms.out_degrees(RANDOM_CSR)
+    )
+    assert [bitset.degree(node) for node in bitset] == bitset.out_degrees().tolist()
+    assert bitset.nbytes() == 130 * 3 * 8
+
+
+def test_edges_and_batches_round_trip():
+    bitset = BitsetGraph.from_csr(RANDOM_CSR)
+    edges = list(bitset.edges())
+    batches = list(bitset.edge_batches(batch_edges=1000))
+    assert len(batches) > 1
+    assert [tuple(edge) for batch in batches for edge in batch.tolist()] == edges
+    assert BitsetGraph.from_edges(130, edges) == bitset
+    assert BitsetGraph.from_edge_batches(130, batches) == bitset
+
+
+def test_has_edge_and_repeated_edges():
+    graph = BitsetGraph(70)
+    graph.add_edge(3, 69)
+    graph.add_edge_batch(np.array([[3, 69], [3, 0], [69, 64], [69, 64]]))
+    assert graph.has_edge(3, 69) and graph.has_edge(69, 64)
+    assert not graph.has_edge(69, 3)
+    assert not graph.has_edge(3, 70) and not graph.has_edge(-1, 0)
+    assert graph[3] == [0, 69]
+    assert graph.number_of_edges() == 3
+    with pytest.raises(ValueError):
+        graph.add_edge_batch(np.array([[0, 70]]))
+    with pytest.raises(IndexError):
+        graph.add_edge(70, 0)
+    with pytest.raises(KeyError):
+        graph[70]
+
+
+def test_transpose_and_in_degrees():
+    bitset = BitsetGraph.from_csr(RANDOM_CSR)
+    transposed = bitset.transpose()
+    assert set(transposed.edges()) == {(right, left) for left, right in bitset.edges()}
+    assert np.array_equal(bitset.in_degrees(), transposed.out_degrees())
+    assert transposed.transpose() == bitset
+
+
+def test_breadth_first_distances():
+    path = BitsetGraph.from_dict({0: [1], 1: [2], 2: [0], 3: [0]})
+    assert path.breadth_first_distances(0).tolist() == [0, 1, 2, -1]
+    assert path.breadth_first_distances(3).tolist() == [1, 2, 3, 0]
+
+
+@pytest.mark.parametrize(
+    "graph",
+    [
+        {0: [1], 1: [], 2: [3], 3: [], 4: [], 5: [4]},
+        dict(implicit_graphs.GridGraph(200, width=100)),
+        implicit_graphs.RingGraph(0),
+    ],
+)
+def test_connected_components_match_union_find(graph):
+    bitset = BitsetGraph.from_dict(graph)
+    assert np.array_equal(
+        graph_algorithms.connected_components(bitset),
+        graph_algorithms.connected_components(graph),
+    )
+
+
+def test_preferred_format():
+    assert dense_graphs.preferred_format(64, 128) == "bitset"
+    assert dense_graphs.preferred_format(64, 127) == "csr"
+    assert dense_graphs.preferred_format(0, 0) == "csr"
+
+
+@pytest.mark.parametrize("backend", produce_output.BACKENDS)
+def test_random_bitset_has_the_edges_of_the_other_formats(backend):
+    as_dict = produce_output.create_random_graph(100, backend, seed=2)
+    bitset = produce_output.create_random_graph(100, backend, seed=2, fmt="bitset")
+    assert isinstance(bitset, BitsetGraph)
+    assert bitset == {node: sorted(neighbors) for node, neighbors in as_dict.items()}
+    assert (
+        produce_output.create_random_graph(100, backend, seed=2, fmt="auto") == bitset
+    )
+
+
+def test_auto_format_follows_density():
+    assert isinstance(produce_output.create_grid_graph(20, 20, fmt="auto"), CSRGraph)
+    assert isinstance(produce_output.create_gnp_graph(100, 0.5, 1, "auto"), BitsetGraph)
+    parallel = produce_output.create_random_graph_parallel(100, 2, 1, fmt="bitset")
+    assert parallel == BitsetGraph.from_csr(
+        produce_output.create_random_graph_parallel(100, 2, 1, fmt="csr")
+    )
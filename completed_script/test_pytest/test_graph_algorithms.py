@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import graph_algorithms
+import produce_output
+
+
+def test_components_of_disconnected_graph():
+    the_graph = {0: [1], 1: [0], 2: [], 3: [4], 4: [5], 5: [3], 6: [6]}
+    assert graph_algorithms.connected_components(the_graph).tolist() == [
+        0,
+        0,
+        2,
+        3,
+        3,
+        3,
+        6,
+    ]
+    assert graph_algorithms.number_of_connected_components(the_graph) == 4
+    assert not graph_algorithms.is_connected(the_graph)
+    assert not graph_algorithms.is_connected({})
+
+
+def test_long_path_is_connected():
+    # reversed IDs make the hooking walk the whole path
+    the_graph = {x: [x - 1] for x in range(1, 2000)}
+    the_graph[0] = []
+    assert graph_algorithms.is_connected(the_graph)
+
+
+def test_undirected_degrees_count_reverse_edges_once():
+    the_graph = {0: [1, 2], 1: [0], 2: [2]}
+    assert graph_algorithms.undirected_degrees(the_graph).tolist() == [2, 1, 3]
+    assert graph_algorithms.out_degrees(the_graph).tolist() == [2, 1, 1]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_matches_networkx(seed):
+    nx = pytest.importorskip("networkx")
+    the_graph = produce_output.create_random_graph(40, seed=seed)
+    # thin it out so some seeds give several components
+    the_graph = {k: v[:1] for k, v in the_graph.items()}
+    G = nx.Graph()
+    G.add_nodes_from(the_graph)
+    G.add_edges_from(produce_output.next_edge_in_graph(the_graph))
+    assert graph_algorithms.number_of_connected_components(
+        the_graph
+    ) == nx.number_connected_components(G)
+    assert graph_algorithms.undirected_degrees(the_graph).tolist() == [
+        G.degree(x) for x in range(40)
+    ]
+
+
+def test_disjoint_set_matches_vectorized_components():
+    the_graph = {
+        k: v[:1] for k, v in produce_output.create_random_graph(60, seed=6).items()
+    }
+    components = graph_algorithms.DisjointSet(60)
+    components.union_edges(produce_output.next_edge_in_graph(the_graph))
+    streamed = components.report()
+    in_memory = graph_algorithms.connected_components_report(the_graph)
+    assert streamed.number_of_components == in_memory.number_of_components
+    assert streamed.largest_component_size == in_memory.largest_component_size
+    assert [size for size, _ in streamed.stray_components] == [
+        size for size, _ in in_memory.stray_components
+    ]
+
+
+def test_disjoint_set_grows_and_stops_early():
+    components = graph_algorithms.DisjointSet()
+    components.union_edges([(0, 5)])
+    assert len(components) == 6
+    assert components.number_of_components == 5
+
+    edges = iter([(0, 1), (1, 2), (2, 0), (0, 2)])
+    components = graph_algorithms.DisjointSet(3)
+    components.union_edges(edges, stop_when_connected=True)
+    assert components.stopped_early
+    assert components.edges_read == 2
+    assert list(edges) == [(2, 0), (0, 2)]
+    assert components.report().is_connected
+
+
+def test_report_lists_stray_components():
+    report = graph_algorithms.connected_components_report(
+        {0: [1, 2], 3: [4], 5: []}, samples_per_component=1
+    )
+    assert report.number_of_components == 3
+    assert report.largest_component_size == 3
+    assert report.stray_components == [(2, [3]), (1, [5])]
+    with pytest.raises(graph_algorithms.GraphNotConnectedError) as error:
+        raise graph_algorithms.GraphNotConnectedError(report)
+    assert error.value.report is report
+
+
+def test_component_labels_in_batches_match_connected_components():
+    import numpy as np
+
+    the_graph = {
+        k: v[:1] for k, v in produce_output.create_random_graph(80, seed=7).items()
+    }
+    left_nodes, right_nodes = graph_algorithms.edge_arrays(the_graph)
+    edges = np.column_stack((left_nodes, right_nodes))
+    components = graph_algorithms.ComponentLabels(80)
+    components.add_edge_batches(np.array_split(edges, 7))
+    assert np.array_equal(
+        components.labels, graph_algorithms.connected_components(the_graph)
+    )
+    assert components.report() == graph_algorithms.connected_components_report(
+        the_graph
+    )
+
+    components = graph_algorithms.ComponentLabels(3)
+    batches = iter([np.array([[0, 1], [1, 2]]), np.array([[2, 0]])])
+    components.add_edge_batches(batches, stop_when_connected=True)
+    assert components.stopped_early and components.edges_read == 2
+    assert len(list(batches)) == 1
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import os
+
+import graph_cache
+import produce_output
+from csr_graph import MappedGraph
+
+
+def test_second_call_maps_the_stored_graph(tmp_path):
+    cache = graph_cache.GraphCache(str(tmp_path))
+    first = graph_cache.cached_random_graph(50, "numpy", seed=3, cache=cache)
+    second = graph_cache.cached_random_graph(50, "numpy", seed=3, cache=cache)
+    assert isinstance(second, MappedGraph)
+    assert (cache.hits, cache.misses) == (1, 1)
+    expected = produce_output.create_random_graph(50, "numpy", seed=3, fmt="csr")
+    assert first == second == expected
+    assert os.listdir(str(tmp_path)) == [os.path.basename(second.filename)]
+
+
+def test_key_depends_on_everything_that_decides_the_graph():
+    keys = {
+        graph_cache.cache_key("random", {"number_of_nodes": 10}, 1, "numpy"),
+        graph_cache.cache_key("random", {"number_of_nodes": 10}, 2, "numpy"),
+        graph_cache.cache_key("random", {"number_of_nodes": 10}, 1, "python"),
+        graph_cache.cache_key("random", {"number_of_nodes": 11}, 1, "numpy"),
+        graph_cache.cache_key("ring", {"number_of_nodes": 10}, 1, "numpy"),
+    }
+    assert len(keys) == 5
+
+
+def test_no_seed_is_never_cached(tmp_path):
+    cache = graph_cache.GraphCache(str(tmp_path))
+    graph_cache.cached_random_graph(20, "python", seed=None, cache=cache)
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    cache = graph_cache.GraphCache(str(tmp_path))
+    the_graph = {node: [(node + 1) % 100] for node in range(100)}
+    for key in ("a", "b", "c"):
+        cache.put(key, the_graph)
+    for age, key in enumerate(("b", "a", "c")):
+        os.utime(cache.path(key), (1000 + age, 1000 + age))
+    assert cache.get("b") is not None  # now the most recently used
+    cache.max_bytes = 2 * os.path.getsize(cache.path("a"))
+    assert cache.evict() == 1
+    assert sorted(os.listdir(str(tmp_path))) == ["b.csr", "c.csr"]
+    # a graph larger than the cache is returned but not kept
+    cache.max_bytes = 0
+    assert cache.get_or_create("d", lambda: the_graph) == the_graph
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = graph_cache.GraphCache(str(tmp_path))
+    with open(cache.path("broken"), "wb") as file_handle:
+        file_handle.write(b"CSRG")
+    assert cache.get("broken") is None
+    assert cache.get_or_create("broken", lambda: {0: [0]}).to_dict() == {0: [0]}
+
+
+def test_entries_follow_the_umask(tmp_path):
+    cache = graph_cache.GraphCache(str(tmp_path))
+    previous = os.umask(0o022)
+    try:
+        filename = cache.put("shared", {0: [1], 1: [0]})
+        os.umask(0o077)
+        private = cache.put("private", {0: [1], 1: [0]})
+    finally:
+        os.umask(previous)
+    assert os.stat(filename).st_mode & 0o777 == 0o644
+    assert os.stat(private).st_mode & 0o777 == 0o600
+
+
+def test_open_cache_reads_the_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv(graph_cache.CACHE_DIRECTORY_VARIABLE, raising=False)
+    assert graph_cache.open_cache() is None
+    monkeypatch.setenv(graph_cache.CACHE_DIRECTORY_VARIABLE, str(tmp_path / "cache"))
+    monkeypatch.setenv(graph_cache.MAX_BYTES_VARIABLE, "1000")
+    cache = graph_cache.open_cache()
+    assert cache.max_bytes == 1000 and os.path.isdir(cache.directory)
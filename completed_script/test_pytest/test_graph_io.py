@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import io
+
+import pytest
+
+import graph_io
+import produce_output
+
+
+@pytest.mark.parametrize("line_format", ["tuple", "tsv"])
+def test_edge_writer_matches_print(line_format):
+    the_graph = produce_output.create_random_graph(20, seed=2)
+    expected = "".join(
+        str(edge_tuple) + "\n" if line_format == "tuple" else "%d\t%d\n" % edge_tuple
+        for edge_tuple in produce_output.next_edge_in_graph(the_graph)
+    )
+    out = io.BytesIO()
+    assert graph_io.write_neighbor_lists(the_graph.items(), out, line_format) == len(
+        list(produce_output.next_edge_in_graph(the_graph))
+    )
+    assert out.getvalue().decode() == expected
+    out = io.BytesIO()
+    graph_io.write_edges(produce_output.next_edge_in_graph(the_graph), out, line_format)
+    assert out.getvalue().decode() == expected
+
+
+def test_binary_round_trip_through_file(tmp_path):
+    the_graph = produce_output.create_random_graph(25, seed=5)
+    filename = str(tmp_path / "edges.bin")
+    with open(filename, "wb") as out:
+        # edge count unknown up front: the header is patched on a seekable file
+        number_of_edges = graph_io.write_binary_edges(the_graph.items(), 25, out)
+    number_of_nodes, edges = graph_io.read_binary_edges(filename)
+    assert number_of_nodes == 25
+    assert len(edges) == number_of_edges
+    assert [tuple(x) for x in edges.tolist()] == list(
+        produce_output.next_edge_in_graph(the_graph)
+    )
+    with open(filename, "rb") as source:
+        assert graph_io.is_binary_edge_stream(source)
+        assert graph_io.read_binary_edges(source)[1].tolist() == edges.tolist()
+
+
+def test_binary_csr_from_edge_array():
+    from csr_graph import CSRGraph
+
+    the_graph = {0: [2, 1], 1: [], 2: [0], 3: []}
+    out = io.BytesIO()
+    graph_io.write_binary_edges(the_graph.items(), 4, out, number_of_edges=3)
+    out.seek(0)
+    csr = CSRGraph.from_edge_array(*graph_io.read_binary_edges(out))
+    assert csr.to_dict() == the_graph
+
+
+def test_binary_reader_rejects_text_and_truncation():
+    with pytest.raises(ValueError):
+        graph_io.read_binary_edges(io.BytesIO(b"(0, 1)\n" * 5))
+    out = io.BytesIO()
+    graph_io.write_binary_edges({0: [1]}.items(), 2, out, number_of_edges=1)
+    with pytest.raises(ValueError):
+        graph_io.read_binary_edges(io.BytesIO(out.getvalue()[:-4]))
+
+
+@pytest.mark.parametrize("chunk_chars", [1, 7, 2**20])
+def test_json_round_trip(monkeypatch, chunk_chars):
+    import json
+
+    monkeypatch.setattr(graph_io, "READ_CHUNK_CHARS", chunk_chars)
+    the_graph = produce_output.create_random_graph(30, seed=9)
+    out = io.BytesIO()
+    assert graph_io.write_json_adjacency(the_graph.items(), out) == 30
+    text = out.getvalue().decode()
+    assert json.loads(text) == {str(k): v for k, v in the_graph.items()}
+    assert dict(graph_io.next_node_in_json(io.StringIO(text))) == the_graph
+    # the reader also accepts the previous pretty-printed output
+    pretty = json.dumps(the_graph, indent=2)
+    assert dict(graph_io.next_node_in_json(io.StringIO(pretty))) == the_graph
+
+
+def test_json_reader_empty_and_malformed():
+    assert list(graph_io.next_node_in_json(io.StringIO(" {} "))) == []
+    with pytest.raises(ValueError):
+        list(graph_io.next_node_in_json(io.StringIO('{"0": [1, 2')))
+    with pytest.raises(ValueError):
+        list(graph_io.next_node_in_json(io.StringIO('{"0": 3}')))
+
+
+@pytest.mark.parametrize("line_format", ["tuple", "tsv"])
+def test_edge_text_parser(monkeypatch, line_format):
+    # small blocks so lines are cut across reads and checks
+    monkeypatch.setattr(graph_io, "READ_BLOCK_BYTES", 5)
+    monkeypatch.setattr(graph_io, "CHECK_BLOCK_BYTES", 4)
+    the_graph = produce_output.create_random_graph(30, seed=8)
+    out = io.BytesIO()
+    graph_io.write_neighbor_lists(the_graph.items(), out, line_format)
+    number_of_nodes, edges = graph_io.read_edge_text(io.BytesIO(out.getvalue()))
+    assert number_of_nodes == 1 + max(max(x) for x in map(tuple, edges.tolist()))
+    assert [tuple(x) for x in edges.tolist()] == list(
+        produce_output.next_edge_in_graph(the_graph)
+    )
+
+
+def test_edge_text_parser_edge_cases():
+    assert graph_io.read_edge_text(io.BytesIO(b""))[0] == 0
+    # no trailing newline
+    assert graph_io.read_edge_text(io.BytesIO(b"(3, 4)"))[1].tolist() == [[3, 4]]
+    with pytest.raises(ValueError):
+        graph_io.read_edge_text(io.BytesIO(b"(0, 1)\n(2)\n"))
+    with pytest.raises(ValueError):
+        graph_io.read_edge_text(io.BytesIO(b"(0, x)\n"))
+
+
+@pytest.mark.parametrize(
+    "text, bad_line",
+    [
+        (b"(0)\n(1)\n", 1),
+        (b"(0, 1, 2)\n(3)\n", 1),
+        (b"1\t2\t3\t4\n", 1),
+        (b"(0, 1)\n(2, 3)\n(4)\n(5)", 3),
+    ],
+)
+def test_edge_text_parser_needs_two_ids_per_line(monkeypatch, text, bad_line):
+    # numbers are not paired across lines, nor across blocks
+    monkeypatch.setattr(graph_io, "READ_BLOCK_BYTES", 23)
+    monkeypatch.setattr(graph_io, "CHECK_BLOCK_BYTES", 4)
+    with pytest.raises(ValueError, match="line %d has" % bad_line):
+        graph_io.read_edge_text(io.BytesIO(text))
+
+
+@pytest.mark.parametrize("edge_count_in_header", [True, False])
+def test_binary_edge_batches(monkeypatch, edge_count_in_header):
+    # a block size that is not a multiple of 8 splits pairs across reads
+    monkeypatch.setattr(graph_io, "READ_BLOCK_BYTES", 12)
+    the_graph = produce_output.create_random_graph(15, seed=2)
+    out = io.BytesIO()
+    graph_io.write_binary_edges(the_graph.items(), 15, out)
+    data = out.getvalue()
+    if not edge_count_in_header:
+        # what a write to a pipe looks like
+        data = (
+            graph_io.BINARY_HEADER.pack(
+                graph_io.BINARY_MAGIC,
+                graph_io.BINARY_VERSION,
+                0,
+                15,
+                graph_io.UNKNOWN_EDGE_COUNT,
+            )
+            + data[graph_io.BINARY_HEADER.size :]
+        )
+    number_of_nodes, batches = graph_io.open_binary_edge_batches(io.BytesIO(data))
+    assert number_of_nodes == 15
+    assert [tuple(x) for batch in batches for x in batch.tolist()] == list(
+        produce_output.next_edge_in_graph(the_graph)
+    )
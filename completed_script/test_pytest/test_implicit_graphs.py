@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+import io
+
+import numpy as np
+import pytest
+
+import graph_algorithms
+import graph_io
+import implicit_graphs
+from csr_graph import CSRGraph
+
+ALL_GRAPHS = [
+    implicit_graphs.RingGraph(7),
+    implicit_graphs.CompleteGraph(6),
+    implicit_graphs.GridGraph(11, width=3),
+    implicit_graphs.HexagonalGraph(14, width=4),
+    implicit_graphs.CompleteGraph(1),
+    implicit_graphs.RingGraph(0),
+]
+
+
+@pytest.mark.parametrize("graph", ALL_GRAPHS, ids=repr)
+def test_edges_batches_degrees_and_csr_agree(graph):
+    edges = list(graph.edges())
+    batches = [batch.tolist() for batch in graph.edge_batches(batch_edges=5)]
+    assert [tuple(edge) for batch in batches for edge in batch] == edges
+    assert graph.number_of_edges() == len(edges)
+    assert graph.out_degrees().tolist() == [graph.degree(node) for node in graph]
+    assert graph.to_csr() == CSRGraph.from_dict(
+        {node: list(neighbors) for node, neighbors in graph.items()}
+    )
+
+
+@pytest.mark.parametrize(
+    "graph", [g for g in ALL_GRAPHS if isinstance(g, implicit_graphs.GridGraph)]
+)
+def test_lattices_list_every_edge_both_ways(graph):
+    edges = set(graph.edges())
+    assert edges == {(right, left) for left, right in edges}
+    assert max(graph.out_degrees()) <= graph.max_degree
+
+
+@pytest.mark.parametrize(
+    "cls", [implicit_graphs.GridGraph, implicit_graphs.HexagonalGraph]
+)
+@pytest.mark.parametrize("periodic", [False, True])
+def test_lattice_counts_match_the_listed_edges(cls, periodic, monkeypatch):
+    # blocks of a few rows, so out_degrees adds up several of them
+    monkeypatch.setattr(implicit_graphs, "EDGE_BATCH_EDGES", 7)
+    for number_of_nodes in range(40):
+        for width in range(1, 9):
+            try:
+                graph = cls(number_of_nodes, width, periodic)
+            except ValueError:
+                continue
+            degrees = [graph.degree(node) for node in graph]
+            assert graph.out_degrees().tolist() == degrees
+            assert graph.number_of_edges() == sum(degrees)
+
+
+def test_lattice_counts_do_not_list_the_edges(monkeypatch):
+    def no_listing(*args, **kwargs):
+        raise AssertionError("edges were listed")
+
+    monkeypatch.setattr(implicit_graphs.ImplicitGraph, "edge_batches", no_listing)
+    for cls in (implicit_graphs.GridGraph, implicit_graphs.HexagonalGraph):
+        monkeypatch.setattr(cls, "_neighbor_arrays", no_listing)
+    assert implicit_graphs.GridGraph(2000 * 2000, 2000).number_of_edges() == (
+        2 * 2 * 2000 * 1999
+    )
+    assert (
+        implicit_graphs.GridGraph(2000 * 2000, 2000, periodic=True).number_of_edges()
+        == 4 * 2000 * 2000
+    )
+    assert (
+        implicit_graphs.HexagonalGraph(2000 * 2000, 2000).number_of_edges()
+        == 2 * (2000 * 1999 + 1999 * 1000)
+    )
+
+
+def test_grid_matches_networkx():
+    import networkx as nx
+
+    grid = implicit_graphs.GridGraph(12, width=4)
+    G = nx.convert_node_labels_to_integers(nx.grid_2d_graph(3, 4), ordering="sorted")
+    assert {node: sorted(G[node]) for node in G} == dict(grid)
+
+
+def test_complete_graph_neighbors_are_not_stored():
+    graph = implicit_graphs.CompleteGraph(10**6)
+    neighbors = graph[5]
+    assert len(neighbors) == 10**6 - 1
+    assert (neighbors[4], neighbors[5], neighbors[-1]) == (4, 6, 10**6 - 1)
+    assert 5 not in neighbors and 6 in neighbors
+    assert graph.number_of_edges() == 10**6 * (10**6 - 1)
+
+
+def test_mapping_interface():
+    ring = implicit_graphs.RingGraph(3)
+    assert ring == {0: [1], 1: [2], 2: [0]}
+    assert 3 not in ring and ring.get(3) is None
+    with pytest.raises(KeyError):
+        ring[-1]
+    out = io.BytesIO()
+    assert (
+        graph_io.write_neighbor_lists(implicit_graphs.CompleteGraph(3).items(), out)
+        == 6
+    )
+
+
+def test_complete_graph_is_connected_after_one_node():
+    components = graph_algorithms.DisjointSet(10**5)
+    components.union_edge_batches(
+        implicit_graphs.CompleteGraph(10**5).edge_batches(), stop_when_connected=True
+    )
+    assert components.number_of_components == 1
+    assert components.edges_read == 10**5 - 1
+
+
+def test_create_implicit_graph():
+    grid = implicit_graphs.create_implicit_graph("grid", 16)
+    assert grid.width == 4
+    with pytest.raises(ValueError):
+        implicit_graphs.create_implicit_graph("star", 4)
+    with pytest.raises(ValueError):
+        implicit_graphs.RingGraph(-1)
+    assert np.array_equal(
+        implicit_graphs.create_implicit_graph("ring", 5).out_degrees(), np.ones(5)
+    )
+
+
+@pytest.mark.parametrize(
+    "graph",
+    [
+        implicit_graphs.GridGraph(20, width=5, periodic=True),
+        implicit_graphs.HexagonalGraph(24, width=6, periodic=True),
+    ],
+    ids=repr,
+)
+def test_periodic_lattices_are_regular(graph):
+    test_edges_batches_degrees_and_csr_agree(graph)
+    test_lattices_list_every_edge_both_ways(graph)
+    assert set(graph.out_degrees().tolist()) == {graph.max_degree}
+
+
+def test_periodic_grid_matches_networkx():
+    import networkx as nx
+
+    grid = implicit_graphs.GridGraph(20, width=5, periodic=True)
+    G = nx.convert_node_labels_to_integers(
+        nx.grid_2d_graph(4, 5, periodic=True), ordering="sorted"
+    )
+    assert {node: sorted(G[node]) for node in G} == dict(grid)
+
+
+@pytest.mark.parametrize(
+    "cls, number_of_nodes, width",
+    [
+        (implicit_graphs.GridGraph, 10, 3),
+        (implicit_graphs.GridGraph, 6, 3),
+        (implicit_graphs.HexagonalGraph, 15, 5),
+    ],
+)
+def test_periodic_lattice_needs_a_valid_shape(cls, number_of_nodes, width):
+    with pytest.raises(ValueError):
+        cls(number_of_nodes, width, periodic=True)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import atexit
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+
+import logging_config
+
+SCRIPT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_does_not_configure_logging(tmp_path):
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; sys.path.insert(0, sys.argv[1]); "
+            "import logging, produce_output, validate_graph; "
+            "assert not logging.getLogger().handlers",
+            SCRIPT_DIRECTORY,
+        ],
+        cwd=tmp_path,
+        check=True,
+    )
+    assert not (tmp_path / "logs").exists()
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    for handler in root.handlers:
+        handler.close()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+@pytest.mark.parametrize("use_queue", [False, True])
+def test_files_by_threshold(tmp_path, use_queue, restore_root_logger):
+    listener = logging_config.configure_logging("INFO", str(tmp_path), use_queue)
+    logger = logging.getLogger("test_logging_config")
+    logger.debug("[trace: hidden]")
+    logger.info("[trace: %s]", "shown")
+    logger.warning("a warning")
+    if listener:
+        listener.stop()
+        atexit.unregister(listener.stop)
+
+    def lines(filename):
+        return (tmp_path / filename).read_text().splitlines()
+
+    debug_lines = lines("critical_and_error_and_warning_and_info_and_debug.log")
+    assert [line.split("|")[-1] for line in debug_lines] == [
+        "[trace: shown]",
+        "a warning",
+    ]
+    assert len(lines("critical_and_error_and_warning.log")) == 1
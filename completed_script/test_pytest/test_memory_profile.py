@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import sys
+from array import array
+
+import numpy as np
+
+import memory_profile
+from csr_graph import CSRGraph, MappedGraph, write_csr_file
+
+
+def test_containers_count_every_element_once():
+    shared = [1000, 2000]
+    obj = {"a": shared, "b": shared}
+    expected = (
+        sys.getsizeof(obj)
+        + sys.getsizeof("a")
+        + sys.getsizeof("b")
+        + sys.getsizeof(shared)
+        + sys.getsizeof(1000)
+        + sys.getsizeof(2000)
+    )
+    assert memory_profile.deep_sizeof(obj) == expected
+
+
+def test_numpy_view_counts_its_base_once():
+    base = np.zeros(10000, dtype=np.int64)
+    views = [base[:5000], base[5000:]]
+    assert memory_profile.deep_sizeof(views) < base.nbytes + 1000
+    assert memory_profile.deep_sizeof(views) > base.nbytes
+
+
+def test_csr_buffers_are_counted():
+    graph = CSRGraph(array("q", [0, 2, 3]), array("i", [1, 0, 0]))
+    footprint = memory_profile.graph_footprint(graph)
+    assert (footprint.number_of_nodes, footprint.number_of_edges) == (2, 3)
+    assert footprint.heap_bytes > sys.getsizeof(graph.offsets) + sys.getsizeof(
+        graph.indices
+    )
+    assert footprint.mapped_bytes == 0
+
+
+def test_mapped_graph_counts_the_file_as_mapped(tmp_path):
+    filename = str(tmp_path / "graph.csr")
+    write_csr_file({0: [1], 1: [0], 2: []}.items(), 3, filename)
+    footprint = memory_profile.graph_footprint(MappedGraph(filename))
+    assert footprint.mapped_bytes == 24 + 8 * 4 + 4 * 2
+    assert footprint.heap_bytes < 10000
+
+
+def test_networkx_grid_grows_with_size():
+    import networkx as nx
+
+    small = memory_profile.graph_footprint(nx.grid_graph(dim=(10, 10)))
+    large = memory_profile.graph_footprint(nx.grid_graph(dim=(30, 30)))
+    assert (small.number_of_nodes, small.number_of_edges) == (100, 180)
+    assert 5 * small.heap_bytes < large.heap_bytes < 15 * small.heap_bytes
+
+
+def test_measure_peak_excludes_earlier_memory():
+    earlier = np.ones(2**20)
+    result, traced = memory_profile.measure_peak(np.ones, 2**17)
+    assert len(result) == 2**17
+    assert 2**20 <= traced.peak_bytes < 2**20 + 2**16
+    assert traced.retained_bytes >= 2**20
+    del earlier
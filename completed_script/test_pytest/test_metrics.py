@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import json
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def recorder():
+    yield metrics.enable()
+    metrics.disable()
+
+
+def test_disabled_spans_record_nothing():
+    assert not metrics.is_enabled()
+    with metrics.span("generate", nodes=3) as span:
+        span.count(edges=5)
+    assert span is metrics.span("other")
+
+
+def test_nested_spans_and_items(recorder):
+    with metrics.span("outer", nodes=2) as outer:
+        with metrics.span("inner") as inner:
+            inner.count(edges=3)
+            inner.count(edges=4)
+        outer.count(nodes=1)
+    inner_record, outer_record = recorder.spans
+    assert (inner_record["name"], inner_record["depth"]) == ("inner", 1)
+    assert inner_record["items"] == {"edges": 7}
+    assert outer_record["items"] == {"nodes": 3}
+    assert outer_record["wall_seconds"] >= inner_record["wall_seconds"] >= 0
+
+
+def test_failed_span_is_recorded(recorder):
+    with pytest.raises(ValueError):
+        with metrics.span("parse"):
+            raise ValueError("bad input")
+    assert recorder.spans[0]["error"] == "ValueError"
+
+
+def test_summary_is_json(recorder, tmp_path):
+    with metrics.span("serialize", edges=10):
+        pass
+    filename = tmp_path / "metrics.json"
+    metrics.write_summary(str(filename))
+    summary = json.loads(filename.read_text())
+    assert [span["name"] for span in summary["spans"]] == ["serialize"]
+    assert summary["total"]["wall_seconds"] >= 0
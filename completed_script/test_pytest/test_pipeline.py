@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import degree_stats
+import graph_algorithms
+import implicit_graphs
+import pipeline
+import produce_output
+import sparse_graphs
+
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_checks_match_the_in_memory_graph(threaded):
+    result = pipeline.run_pipeline("random", 400, seed=3, threaded=threaded)
+    the_graph = produce_output.create_random_graph(400, "numpy", seed=3, fmt="csr")
+    assert result.components.report() == graph_algorithms.connected_components_report(
+        the_graph
+    )
+    counter = degree_stats.DegreeCounter(400)
+    counter.add_csr(the_graph)
+    assert np.array_equal(result.degrees.in_degrees, counter.in_degrees)
+    assert np.array_equal(result.degrees.out_degrees, counter.out_degrees)
+
+
+@pytest.mark.parametrize(
+    "graph_type, parameter", [("ring", None), ("gnp", 0.001), ("grid", None)]
+)
+def test_other_graphs_are_reported_as_components(graph_type, parameter):
+    result = pipeline.run_pipeline(graph_type, 2500, seed=1, parameter=parameter)
+    batches = pipeline.generated_edge_batches(
+        graph_type, 2500, seed=1, parameter=parameter
+    )
+    components = graph_algorithms.ComponentLabels(2500)
+    components.add_edge_batches(batches)
+    assert np.array_equal(result.components.labels, components.labels)
+    assert result.components.report().is_connected == (graph_type != "gnp")
+
+
+@pytest.mark.parametrize(
+    "graph_type, parameter", [("grid", None), ("hexagonal", None), ("gnm", 3000)]
+)
+def test_undirected_degrees_of_symmetric_graphs(graph_type, parameter):
+    # these list every edge in both directions; each counts once
+    result = pipeline.run_pipeline(
+        graph_type, 1000, seed=1, parameter=parameter, width=20, periodic=True
+    )
+    if graph_type == "gnm":
+        the_graph = sparse_graphs.create_sparse_graph("gnm", 1000, parameter, 1)
+    else:
+        the_graph = implicit_graphs.create_implicit_graph(graph_type, 1000, 20, True)
+    expected = graph_algorithms.undirected_degrees(the_graph)
+    assert np.array_equal(result.degrees.undirected_degrees(), expected)
+    if graph_type == "grid":
+        assert result.degrees.summaries()["undirected"].maximum == 4
+
+
+def test_producer_waits_for_the_consumer():
+    produced = []
+
+    def batches():
+        for index in range(20):
+            produced.append(index)
+            yield np.array([[index, index]])
+
+    consumed = 0
+    for _ in pipeline.background_batches(batches(), queue_batches=2):
+        consumed += 1
+        time.sleep(0.01)
+        # the queue, plus the batch the producer is waiting to put
+        assert len(produced) <= consumed + 3
+    assert consumed == 20
+
+
+def test_producer_error_reaches_the_consumer():
+    def batches():
+        yield np.zeros((1, 2), dtype=np.int64)
+        raise RuntimeError("generator failed")
+
+    with pytest.raises(RuntimeError, match="generator failed"):
+        list(pipeline.background_batches(batches()))
+
+
+def test_closing_early_stops_the_producer():
+    def endless():
+        while True:
+            yield np.zeros((1, 2), dtype=np.int64)
+
+    threads_before = threading.active_count()
+    consumer = pipeline.background_batches(endless(), queue_batches=1)
+    next(consumer)
+    consumer.close()
+    assert threading.active_count() == threads_before
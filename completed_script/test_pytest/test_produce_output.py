@@ -2,4 +2,121 @@
 
 import pytest
 
+import produce_output
 
+
+@pytest.mark.parametrize("backend", produce_output.BACKENDS)
+def test_random_graph_has_no_self_loops_or_duplicates(backend):
+    the_graph = produce_output.create_random_graph(50, backend, seed=1)
+    assert sorted(the_graph.keys()) == list(range(50))
+    for node_id, neighbors in the_graph.items():
+        assert node_id not in neighbors
+        assert len(set(neighbors)) == len(neighbors)
+        assert all(0 <= x < 50 for x in neighbors)
+
+
+@pytest.mark.parametrize("backend", produce_output.BACKENDS)
+def test_random_graph_is_reproducible_with_seed(backend):
+    assert produce_output.create_random_graph(
+        30, backend, seed=7
+    ) == produce_output.create_random_graph(30, backend, seed=7)
+
+
+@pytest.mark.parametrize("backend", produce_output.BACKENDS)
+def test_random_graph_of_size_zero_and_one(backend):
+    assert produce_output.create_random_graph(0, backend, seed=1) == {}
+    assert produce_output.create_random_graph(1, backend, seed=1) == {0: []}
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        produce_output.create_random_graph(3, "fortran")
+
+
+@pytest.mark.parametrize("backend", produce_output.BACKENDS)
+def test_random_graph_csr_matches_dict(backend):
+    as_dict = produce_output.create_random_graph(40, backend, seed=3)
+    as_csr = produce_output.create_random_graph(40, backend, seed=3, fmt="csr")
+    assert len(as_csr) == 40
+    assert as_csr.to_dict() == as_dict
+    assert as_csr.number_of_edges() == sum(len(v) for v in as_dict.values())
+    assert [as_csr.degree(x) for x in range(40)] == [len(as_dict[x]) for x in range(40)]
+    assert list(as_csr.edges()) == list(produce_output.next_edge_in_graph(as_dict))
+
+
+@pytest.mark.parametrize("backend", produce_output.BACKENDS)
+def test_streamed_edges_match_materialized_graph(backend):
+    the_graph = produce_output.create_random_graph(60, backend, seed=11)
+    assert list(
+        produce_output.next_edge_from_graph_of_size(60, backend, seed=11)
+    ) == list(produce_output.next_edge_in_graph(the_graph))
+
+
+@pytest.mark.parametrize("backend", produce_output.BACKENDS)
+def test_edge_batches_match_streamed_edges(backend):
+    batches = produce_output.next_edge_batch_from_graph_of_size(
+        60, backend, seed=11, batch_edges=100
+    )
+    assert [tuple(edge) for batch in batches for edge in batch.tolist()] == list(
+        produce_output.next_edge_from_graph_of_size(60, backend, seed=11)
+    )
+
+
+def test_parallel_graph_is_reproducible_per_seed_and_workers():
+    the_graph = produce_output.create_random_graph_parallel(50, 3, seed=4)
+    assert the_graph == produce_output.create_random_graph_parallel(50, 3, seed=4)
+    assert sorted(the_graph.keys()) == list(range(50))
+    for node_id, neighbors in the_graph.items():
+        assert node_id not in neighbors
+        assert len(set(neighbors)) == len(neighbors)
+    as_csr = produce_output.create_random_graph_parallel(50, 3, seed=4, fmt="csr")
+    assert as_csr.to_dict() == the_graph
+
+
+@pytest.mark.parametrize("periodic", [False, True])
+def test_grid_and_hexagonal_graphs(periodic):
+    import networkx as nx
+
+    G = nx.convert_node_labels_to_integers(
+        nx.grid_2d_graph(4, 6, periodic=periodic), ordering="sorted"
+    )
+    assert produce_output.create_grid_graph(6, 4, periodic) == {
+        node: sorted(G[node]) for node in G
+    }
+    hexagonal = produce_output.create_hexagonal_graph(6, 4, periodic, fmt="csr")
+    assert hexagonal.to_dict() == produce_output.create_hexagonal_graph(6, 4, periodic)
+    assert hexagonal.number_of_edges() == (72 if periodic else 58)
+
+
+@pytest.mark.parametrize(
+    "create",
+    [produce_output.create_fully_connected_graph, produce_output.create_ring_graph],
+)
+def test_complete_and_ring_graphs_in_every_format(create):
+    from csr_graph import CSRGraph
+    from dense_graphs import BitsetGraph
+
+    implicit = create(70)
+    expected = {node: list(neighbors) for node, neighbors in implicit.items()}
+    assert create(70, fmt="dict") == expected
+    assert create(70, fmt="csr") == CSRGraph.from_dict(expected)
+    assert isinstance(create(70, fmt="bitset"), BitsetGraph)
+    assert create(70, fmt="bitset") == expected
+    # a complete graph is dense, a ring of 70 nodes is not
+    auto = create(70, fmt="auto")
+    assert isinstance(auto, BitsetGraph if len(expected[0]) > 1 else CSRGraph)
+    with pytest.raises(ValueError):
+        create(70, fmt="json")
+
+
+def test_sparse_models_in_both_formats():
+    the_graph = produce_output.create_gnp_graph(100, 0.05, seed=5)
+    assert sorted(the_graph) == list(range(100))
+    assert (
+        produce_output.create_gnp_graph(100, 0.05, 5, fmt="csr").to_dict() == the_graph
+    )
+    assert sum(map(len, produce_output.create_gnm_graph(100, 30, 5).values())) == 60
+    scale_free = produce_output.create_barabasi_albert_graph(100, 2, seed=5)
+    assert sum(map(len, scale_free.values())) == 2 * 2 * 98
+    with pytest.raises(ValueError):
+        produce_output.create_gnm_graph(100, 30, 5, fmt="json")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+import implicit_graphs
+import produce_output
+import render_graph
+from csr_graph import CSRGraph
+
+
+def ring(number_of_nodes):
+    return CSRGraph(
+        np.arange(number_of_nodes + 1, dtype=np.int64),
+        ((np.arange(number_of_nodes) + 1) % number_of_nodes).astype(np.int32),
+    )
+
+
+def test_snowball_follows_edges_and_restarts():
+    the_graph = {0: [1], 1: [0], 2: [3], 3: [], 4: []}
+    assert render_graph.snowball_sample(the_graph, 3).tolist() == [0, 1, 2]
+    assert render_graph.snowball_sample(the_graph, 10).tolist() == [0, 1, 2, 3, 4]
+    assert render_graph.snowball_sample(ring(1000), 5, start=10).tolist() == [
+        10,
+        11,
+        12,
+        13,
+        14,
+    ]
+
+
+def test_sample_keeps_only_edges_among_sampled_nodes():
+    the_graph = produce_output.create_random_graph(200, "numpy", 1, fmt="csr")
+    for method in render_graph.SAMPLE_METHODS:
+        nodes, edges = render_graph.sample_graph(the_graph, 30, 40, method)
+        assert len(nodes) == 30
+        assert len(edges) <= 40
+        assert np.isin(edges, nodes).all()
+
+
+def test_auto_layout_of_ring_is_circular():
+    assert render_graph.choose_layout(ring(10**5), 500) == "circular"
+    assert render_graph.choose_layout({0: [1], 1: [0, 1]}, 2) == "spring"
+
+
+@pytest.mark.parametrize("graph_type", render_graph.LATTICE_GRAPH_TYPES)
+def test_auto_layout_of_lattice_is_grid(graph_type):
+    lattice = implicit_graphs.create_implicit_graph(graph_type, 100, 10)
+    assert render_graph.choose_layout(lattice, 100, graph_type) == "grid"
+    assert render_graph.choose_layout(lattice, 100) == "spring"
+
+
+def test_png_of_large_ring(tmp_path):
+    pytest.importorskip("matplotlib")
+    filename = tmp_path / "ring.png"
+    nodes, edges = render_graph.create_png(ring(10**6), str(filename), node_budget=50)
+    assert len(nodes) == 50
+    assert filename.stat().st_size > 0
+
+
+def test_time_limit(tmp_path):
+    pytest.importorskip("matplotlib")
+    with pytest.raises(render_graph.RenderTimeoutError):
+        render_graph.create_png(
+            produce_output.create_random_graph(2000, "numpy", 1, fmt="csr"),
+            str(tmp_path / "slow.png"),
+            time_limit=1e-6,
+        )
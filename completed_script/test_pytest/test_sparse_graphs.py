@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+import sparse_graphs
+from csr_graph import CSRGraph
+
+
+def edge_keys(graph: CSRGraph):
+    """u n + v of every neighbor entry, checking the lists are simple"""
+    number_of_nodes = len(graph)
+    sources = np.repeat(np.arange(number_of_nodes), np.diff(graph.offsets))
+    targets = np.asarray(graph.indices, dtype=np.int64)
+    assert not np.any(sources == targets)
+    keys = sources * number_of_nodes + targets
+    # sorted neighbor lists without repeats
+    assert np.all(np.diff(keys) > 0)
+    return keys
+
+
+def assert_undirected(graph: CSRGraph):
+    number_of_nodes = len(graph)
+    keys = edge_keys(graph)
+    reversed_keys = (keys % number_of_nodes) * number_of_nodes + keys // number_of_nodes
+    assert np.array_equal(np.sort(reversed_keys), keys)
+
+
+@pytest.mark.parametrize("directed", [False, True])
+def test_gnp_edge_count_is_near_expected(directed):
+    number_of_nodes, probability = 3000, 0.01
+    graph = sparse_graphs.gnp_random_graph(
+        number_of_nodes, probability, seed=1, directed=directed
+    )
+    edge_keys(graph)
+    if not directed:
+        assert_undirected(graph)
+    expected = probability * number_of_nodes * (number_of_nodes - 1)
+    # a binomial count; 5 standard deviations
+    assert abs(graph.number_of_edges() - expected) < 5 * np.sqrt(
+        expected * (2 if not directed else 1)
+    )
+
+
+def test_gnp_extremes():
+    assert sparse_graphs.gnp_random_graph(5, 0.0).number_of_edges() == 0
+    complete = sparse_graphs.gnp_random_graph(6, 1.0, directed=True)
+    assert complete.to_dict() == {
+        node: [other for other in range(6) if other != node] for node in range(6)
+    }
+    assert sparse_graphs.gnp_random_graph(1, 0.5).to_dict() == {0: []}
+    with pytest.raises(ValueError):
+        sparse_graphs.gnp_random_graph(5, 1.5)
+
+
+def test_gnp_every_pair_is_chosen_as_often():
+    # pair numbers map to every pair of a small graph equally often
+    counts = np.zeros((6, 6))
+    for seed in range(300):
+        graph = sparse_graphs.gnp_random_graph(6, 0.5, seed=seed)
+        for node, neighbors in graph.items():
+            counts[node, neighbors] += 1
+    off_diagonal = counts[~np.eye(6, dtype=bool)]
+    assert off_diagonal.min() > 100 and off_diagonal.max() < 200
+
+
+@pytest.mark.parametrize("directed", [False, True])
+def test_gnm_has_exactly_m_edges(directed):
+    graph = sparse_graphs.gnm_random_graph(500, 2000, seed=2, directed=directed)
+    edge_keys(graph)
+    assert graph.number_of_edges() == 2000 * (1 if directed else 2)
+    full = sparse_graphs.gnm_random_graph(8, 28, seed=2)
+    assert full == sparse_graphs.gnp_random_graph(8, 1.0)
+    with pytest.raises(ValueError):
+        sparse_graphs.gnm_random_graph(8, 29)
+
+
+@pytest.mark.parametrize(
+    "number_of_nodes, edges_per_node", [(2000, 1), (2000, 3), (200, 50), (20, 19)]
+)
+def test_barabasi_albert_matches_networkx_shape(number_of_nodes, edges_per_node):
+    import networkx as nx
+
+    graph = sparse_graphs.barabasi_albert_graph(number_of_nodes, edges_per_node, seed=3)
+    assert_undirected(graph)
+    reference = nx.barabasi_albert_graph(number_of_nodes, edges_per_node, seed=3)
+    assert graph.number_of_edges() == 2 * reference.number_of_edges()
+    # each node after the star joins edges_per_node earlier nodes
+    for node, neighbors in graph.items():
+        earlier = sum(1 for other in neighbors if other < node)
+        assert earlier == (
+            0 if node == 0 else 1 if node <= edges_per_node else edges_per_node
+        )
+
+
+def test_barabasi_albert_prefers_well_connected_nodes():
+    graph = sparse_graphs.barabasi_albert_graph(20000, 2, seed=4)
+    degrees = np.diff(graph.offsets)
+    # the first nodes collect far more edges than the last ones
+    assert degrees[:10].mean() > 20 * degrees[-1000:].mean()
+    assert sparse_graphs.barabasi_albert_graph(20000, 2, seed=4) == graph
+    with pytest.raises(ValueError):
+        sparse_graphs.barabasi_albert_graph(5, 5)
+
+
+def test_create_sparse_graph():
+    assert sparse_graphs.create_sparse_graph("gnm", 10, 7, seed=1) == (
+        sparse_graphs.gnm_random_graph(10, 7, seed=1)
+    )
+    with pytest.raises(ValueError):
+        sparse_graphs.create_sparse_graph("watts-strogatz", 10, 2)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import io
+import json
+
+import jsonschema
+import pytest
+
+import graph_io
+import json_schema
+import validate_json_schema
+
+DOCUMENTS = [
+    {"0": [1, 2], "1": [0], "2": [], "/": {"any": "thing"}},
+    {},
+    {"0": [1.5]},
+    {"0": [1.0]},
+    {"0": [True]},
+    {"0": ["1"]},
+    {"0": [[1]]},
+    {"0": 1},
+    {"0": None},
+    {"x": [1]},
+    {"-1": [0]},
+    {"7a": []},
+    [],
+]
+
+
+@pytest.mark.parametrize("document", DOCUMENTS, ids=json.dumps)
+def test_same_verdict_as_jsonschema(document):
+    validator = validate_json_schema.AdjacencyValidator()
+    assert validator.shape is not None
+    expected = jsonschema.Draft4Validator(json_schema.schema).is_valid(document)
+    assert validator.is_valid(document) == expected
+    if isinstance(document, dict):
+        text = json.dumps(document, indent=2)
+        if expected:
+            assert validator.validate_stream(io.StringIO(text)) == len(document)
+        else:
+            with pytest.raises(jsonschema.ValidationError):
+                validator.validate_stream(io.StringIO(text))
+
+
+def test_stream_reads_written_adjacency(tmp_path):
+    filename = str(tmp_path / "graph.json")
+    the_graph = {node: [(node + 1) % 50, (node + 7) % 50] for node in range(50)}
+    with open(filename, "wb") as json_file:
+        graph_io.write_json_adjacency(the_graph.items(), json_file)
+    validator = validate_json_schema.AdjacencyValidator()
+    assert validator.validate_stream(filename) == 50
+    with pytest.raises(ValueError):
+        validator.validate_stream(io.StringIO("[1, 2]"))
+
+
+@pytest.mark.parametrize(
+    "text", ['{"0":[1]}{"1":[2.5]}', '{"0":[1]}\n,', "{} []", '{"0":[1]}}']
+)
+def test_stream_rejects_data_after_the_object(text):
+    with pytest.raises(ValueError, match="extra data"):
+        validate_json_schema.AdjacencyValidator().validate_stream(io.StringIO(text))
+    with pytest.raises(json.JSONDecodeError, match="Extra data"):
+        json.loads(text)
+    # trailing whitespace is fine, as for json.load
+    assert validate_json_schema.AdjacencyValidator().validate_stream(
+        io.StringIO('{"0":[1]} \n\n')
+    )
+
+
+def test_other_schemas_use_the_generic_validator():
+    schema = {"type": "object", "additionalProperties": {"type": "string"}}
+    validator = validate_json_schema.AdjacencyValidator(schema)
+    assert validator.shape is None
+    assert validator.is_valid({"a": "b"}) and not validator.is_valid({"a": 1})
+    with pytest.raises(jsonschema.SchemaError):
+        validate_json_schema.AdjacencyValidator({"type": 5})
+
+
+def test_validate_json_uses_its_arguments():
+    assert validate_json_schema.validate_json({"0": [1]})
+    with pytest.raises(jsonschema.ValidationError):
+        validate_json_schema.validate_json({"0": [1]}, {"maxProperties": 0})
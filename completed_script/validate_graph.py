@@ -4,11 +4,28 @@ either
 * read edge tuples from stdin
      python3 produce_output.py 4 | python3 validate_graph.py --stdin
 or
+* read the binary edge list from stdin; detected from its header
+     python3 produce_output.py 4 --format binary | python3 validate_graph.py --stdin
+or
+* memory-map a graph written by produce_output.py --graphfile
+     python3 validate_graph.py --graphfile graph.csr
+or
+* read a binary edge list from disk
+     python3 validate_graph.py --binaryfile edges.bin
+or
 * read JSON from disk
      python3 validate_graph.py --JSONfilename file.json
 or
 * generate graph using imported function
      python3 validate_graph.py --numNodes 4
+  with --seed and --cacheDir (or $GRAPH_CACHE_DIR) the graph is generated
+  once, then memory-mapped from the cache on later runs
+     python3 validate_graph.py --numNodes 3000 --seed 1 --cacheDir ~/.cache/graphs
+  --graph ring, complete, grid or hexagonal computes the neighbors from the
+  node ID instead of drawing a random graph; with --connectivityOnly and
+  --degreesOnly nothing is stored but the per-node counts
+     python3 validate_graph.py --numNodes 1000000 --graph complete \
+         --connectivityOnly --earlyExit
 
 what about a graph can be checked?
 * least number of edges per node
@@ -16,41 +33,259 @@ what about a graph can be checked?
 * distribution of edges per node
 * number of components in the graph
 
+--connectivityOnly checks only the number of components, streaming the
+edges through a union-find so memory is O(nodes) whatever the number of edges
+     python3 produce_output.py 100000 --stream --format binary | \
+         python3 validate_graph.py --stdin --connectivityOnly --earlyExit
+
+--degreesOnly counts in-, out- and undirected degrees in one pass over the
+edge stream, also in O(nodes) memory
+     python3 produce_output.py 100000 --stream --format binary | \
+         python3 validate_graph.py --stdin --degreesOnly
+
 visualization of graph using graphviz
 * what if the graph is big? sampling
 """
 import sys
-import json
-import networkx as nx  # https://networkx.org/documentation/stable//reference/introduction.html
-import matplotlib.pyplot as plt
 import argparse  # https://docs.python.org/3.3/library/argparse.html
 
 # https://realpython.com/command-line-interfaces-python-argparse/
 
-import produce_output
-import validate_json_schema
+# networkx, matplotlib, numpy and produce_output are imported by the
+# functions that use them, so a run only pays for what it needs;
+# see benchmark_startup.py. Logging is configured by
+# logging_config.configure_logging once the arguments are parsed
+import graph_io
+import graph_algorithms
+import implicit_graphs
+import degree_stats
+import render_graph
+import logging_config
+import metrics
+from csr_graph import CSRGraph, MappedGraph
 
 
 def convert_to_networkx(graph):
     """ """
+    import networkx as nx  # https://networkx.org/documentation/stable//reference/introduction.html
+
     G = nx.Graph()
     for key, list_of_nodes in graph.items():
+        # nodes without edges are still nodes
+        G.add_node(key)
         G.add_edges_from([(key, x) for x in list_of_nodes])
     return G
 
 
-def test_whether_graph_is_connected(G):
-    """ """
-    if not nx.is_connected(G):
-        raise Exception("graph is not connected")
+def test_whether_graph_is_connected(graph, samples_per_component: int = 5):
+    """raise an exception unless the undirected graph has one component
+
+    Args:
+        graph: a CSRGraph or an adjacency dictionary
+        samples_per_component: node IDs listed per stray component
+
+    Raises:
+        graph_algorithms.GraphNotConnectedError: with the component report
+    """
+    report = graph_algorithms.connected_components_report(graph, samples_per_component)
+    if not report.is_connected:
+        raise graph_algorithms.GraphNotConnectedError(report)
 
     return
 
 
-def create_png(G):
-    """ """
-    nx.draw(G)  # default spring_layout
-    plt.savefig("output.png")
+def implicit_graph(args):
+    """the ring, complete, grid or hexagonal graph selected by --graph"""
+    return implicit_graphs.create_implicit_graph(
+        args.graph, args.numNodes, args.gridWidth, args.periodic
+    )
+
+
+def random_graph(args) -> CSRGraph:
+    """the random graph of --numNodes and --seed, through the graph cache
+
+    The cache is that of --cacheDir or $GRAPH_CACHE_DIR; without one, or
+    without --seed, the graph is generated.
+    """
+    import graph_cache
+
+    return graph_cache.cached_random_graph(
+        args.numNodes, "python", args.seed, graph_cache.open_cache(args.cacheDir)
+    )
+
+
+def is_cached(args) -> bool:
+    """whether the random graph of --numNodes comes from the graph cache"""
+    import graph_cache
+
+    return args.seed is not None and graph_cache.open_cache(args.cacheDir) is not None
+
+
+def stream_connectivity(args) -> graph_algorithms.DisjointSet:
+    """feed the edges of the selected input through a union-find
+
+    Edges are read in blocks or one node at a time; the graph is never
+    held in memory. A random graph in the graph cache is read from its
+    mapped file; on a miss it is generated whole and stored.
+
+    Args:
+        args: parsed command-line arguments
+
+    Returns:
+        the DisjointSet after the last edge read
+    """
+    stop = args.earlyExit
+    if args.stdin and graph_io.is_binary_edge_stream(sys.stdin.buffer):
+        args.binaryfile = sys.stdin.buffer
+    if args.binaryfile:
+        number_of_nodes, batches = graph_io.open_binary_edge_batches(args.binaryfile)
+        components = graph_algorithms.DisjointSet(number_of_nodes)
+        components.union_edge_batches(batches, stop)
+    elif args.stdin:
+        # the number of nodes is not known until the end, so no early exit
+        components = graph_algorithms.DisjointSet()
+        components.union_edge_batches(graph_io.next_edge_text_batch(sys.stdin.buffer))
+    elif args.numNodes != -1 and args.graph != "random":
+        components = graph_algorithms.DisjointSet(args.numNodes)
+        components.union_edge_batches(implicit_graph(args).edge_batches(), stop)
+    elif args.numNodes != -1 and is_cached(args):
+        graph = random_graph(args)
+        components = graph_algorithms.DisjointSet(len(graph))
+        components.union_edges(graph.edges(), stop)
+    elif args.numNodes != -1:
+        import produce_output
+
+        components = graph_algorithms.DisjointSet(args.numNodes)
+        components.union_edges(
+            produce_output.next_edge_from_graph_of_size(args.numNodes, seed=args.seed),
+            stop,
+        )
+    elif args.graphfile:
+        graph = MappedGraph(args.graphfile)
+        components = graph_algorithms.DisjointSet(len(graph))
+        components.union_edges(graph.edges(), stop)
+    elif args.JSONfilename:
+        components = graph_algorithms.DisjointSet()
+        for node, list_of_nodes in graph_io.next_node_in_json(args.JSONfilename):
+            components.union(node, node)  # registers nodes without edges
+            components.union_edges((node, x) for x in list_of_nodes)
+    return components
+
+
+def stream_degrees(args) -> degree_stats.DegreeCounter:
+    """count the in- and out-degree of every node of the selected input
+
+    Like stream_connectivity, the graph is never held in memory.
+
+    Args:
+        args: parsed command-line arguments
+
+    Returns:
+        the DegreeCounter after the last edge
+    """
+    if args.stdin and graph_io.is_binary_edge_stream(sys.stdin.buffer):
+        args.binaryfile = sys.stdin.buffer
+    if args.binaryfile:
+        number_of_nodes, batches = graph_io.open_binary_edge_batches(args.binaryfile)
+        counter = degree_stats.DegreeCounter(number_of_nodes)
+        counter.add_edge_batches(batches)
+    elif args.stdin:
+        counter = degree_stats.DegreeCounter()
+        counter.add_edge_batches(graph_io.next_edge_text_batch(sys.stdin.buffer))
+    elif args.numNodes != -1 and args.graph != "random":
+        import produce_output
+
+        counter = degree_stats.DegreeCounter(
+            args.numNodes, symmetric=args.graph in produce_output.SYMMETRIC_GRAPH_TYPES
+        )
+        counter.add_edge_batches(implicit_graph(args).edge_batches())
+    elif args.numNodes != -1 and is_cached(args):
+        counter = degree_stats.DegreeCounter()
+        counter.add_csr(random_graph(args))
+    elif args.numNodes != -1:
+        import produce_output
+
+        counter = degree_stats.DegreeCounter(args.numNodes)
+        counter.add_edges(
+            produce_output.next_edge_from_graph_of_size(args.numNodes, seed=args.seed)
+        )
+    elif args.graphfile:
+        counter = degree_stats.DegreeCounter()
+        counter.add_csr(MappedGraph(args.graphfile))
+    elif args.JSONfilename:
+        counter = degree_stats.DegreeCounter()
+
+        def edges_of_every_node():
+            for node, list_of_nodes in graph_io.next_node_in_json(args.JSONfilename):
+                counter.add_node(node)  # registers nodes without edges
+                yield from ((node, x) for x in list_of_nodes)
+
+        counter.add_edges(edges_of_every_node())
+    return counter
+
+
+def print_degree_summaries(summaries) -> None:
+    """print DegreeSummary objects keyed by the kind of degree"""
+    for kind, summary in summaries.items():
+        print(kind + "-degree")
+        print(summary)
+
+
+def cross_check_with_networkx(graph, degrees) -> None:
+    """compare the native results with NetworkX; slow, for testing
+
+    Args:
+        graph: a CSRGraph or an adjacency dictionary
+        degrees: undirected degree of each node, indexed by node ID
+    """
+    import networkx as nx
+
+    G = convert_to_networkx(graph)
+    if graph_algorithms.is_connected(graph) != (len(G) > 0 and nx.is_connected(G)):
+        raise Exception("connectivity differs from NetworkX")
+    if dict(G.degree()) != {
+        node: degree for node, degree in enumerate(degrees.tolist()) if node in G
+    }:
+        raise Exception("degrees differ from NetworkX")
+
+
+def create_png(graph, args) -> None:
+    """draw a sample of the graph to output.png within the budgets in args
+
+    A drawing that runs out of time is reported and skipped; it does not
+    fail the validation.
+
+    Args:
+        graph: a CSRGraph
+        args: parsed command-line arguments
+    """
+    graph_type = None
+    grid_width = args.gridWidth
+    if args.numNodes != -1:
+        graph_type = args.graph
+        if graph_type in render_graph.LATTICE_GRAPH_TYPES:
+            # the width the lattice was generated with, also when defaulted
+            grid_width = implicit_graph(args).width
+    try:
+        nodes, edges = render_graph.create_png(
+            graph,
+            node_budget=args.pngNodes,
+            edge_budget=args.pngEdges,
+            method=args.pngSample,
+            layout=args.layout,
+            grid_width=grid_width,
+            time_limit=args.renderSeconds,
+            graph_type=graph_type,
+        )
+    except render_graph.RenderTimeoutError:
+        print(
+            "output.png skipped: drawing took longer than %g seconds"
+            % args.renderSeconds,
+            file=sys.stderr,
+        )
+        return
+    if len(nodes) < len(graph):
+        print("output.png shows %d of %d nodes" % (len(nodes), len(graph)))
     return
 
 
@@ -70,54 +305,220 @@ if __name__ == "__main__":
         default=-1,
         help="generate graph using Python API. User provides an integer number of nodes.",
     )
+    theparser.add_argument(
+        "--graph",
+        choices=("random",) + tuple(implicit_graphs.GRAPH_TYPES),
+        default="random",
+        help="kind of graph generated for --numNodes. Default is random",
+    )
+    theparser.add_argument(
+        "--periodic",
+        action="store_true",
+        default=False,
+        help="join the opposite edges of the grid and hexagonal --graph",
+    )
+    theparser.add_argument(
+        "--seed",
+        metavar="random_seed",
+        type=int,
+        default=None,
+        help="random seed of the graph generated for --numNodes. \
+        If not provided, default to system",
+    )
+    theparser.add_argument(
+        "--cacheDir",
+        type=str,
+        default=None,
+        help="with --seed, keep generated random graphs in this directory \
+        and map them from there on the next run (see graph_cache.py). \
+        Default is $GRAPH_CACHE_DIR, or no cache",
+    )
     group.add_argument("--JSONfilename", type=str, help="filename of JSON to parse")
+    group.add_argument(
+        "--binaryfile",
+        type=str,
+        help="filename of a binary edge list written by produce_output.py --format binary",
+    )
+    group.add_argument(
+        "--graphfile",
+        type=str,
+        help="filename of a CSR graph written by produce_output.py --graphfile",
+    )
     # https://stackoverflow.com/a/15008806/1164295
     group.add_argument(
         "--stdin",
         action="store_true",
         default=False,
-        help="read edge tuples from stdin",
+        help="read edge tuples, TSV edges or a binary edge list from stdin",
+    )
+
+    # https://stackoverflow.com/a/15008806/1164295
+    theparser.add_argument(
+        "--networkx",
+        action="store_true",
+        default=False,
+        help="also compute connectivity and degrees with NetworkX and \
+        fail if they differ. Slow; for testing",
+    )
+    theparser.add_argument(
+        "--connectivityOnly",
+        action="store_true",
+        default=False,
+        help="only count connected components, streaming the edges \
+        through a union-find in O(nodes) memory",
+    )
+    theparser.add_argument(
+        "--earlyExit",
+        action="store_true",
+        default=False,
+        help="with --connectivityOnly, stop reading edges as soon as \
+        the graph is connected. Not available for text on stdin",
+    )
+    theparser.add_argument(
+        "--degreesOnly",
+        action="store_true",
+        default=False,
+        help="only count in-, out- and undirected degrees, streaming the \
+        edges in O(nodes) memory. An edge listed in both directions in a \
+        file or on stdin counts twice toward the undirected degree",
+    )
+    theparser.add_argument(
+        "--no-png",
+        dest="no_png",
+        action="store_true",
+        default=False,
+        help="do not draw output.png",
+    )
+    theparser.add_argument(
+        "--pngNodes",
+        metavar="N",
+        type=int,
+        default=render_graph.DEFAULT_NODE_BUDGET,
+        help="most nodes drawn in output.png; larger graphs are sampled. Default is "
+        + str(render_graph.DEFAULT_NODE_BUDGET),
+    )
+    theparser.add_argument(
+        "--pngEdges",
+        metavar="M",
+        type=int,
+        default=render_graph.DEFAULT_EDGE_BUDGET,
+        help="most edges drawn in output.png. Default is "
+        + str(render_graph.DEFAULT_EDGE_BUDGET),
+    )
+    theparser.add_argument(
+        "--pngSample",
+        choices=render_graph.SAMPLE_METHODS,
+        default="snowball",
+        help="snowball: breadth-first from node 0; induced: uniform random nodes",
+    )
+    theparser.add_argument(
+        "--layout",
+        choices=render_graph.LAYOUTS,
+        default="auto",
+        help="auto uses circular for rings and spring for small samples",
+    )
+    theparser.add_argument(
+        "--gridWidth",
+        type=int,
+        default=None,
+        help="nodes per row for --layout grid, \
+        and of the grid and hexagonal --graph",
     )
+    theparser.add_argument(
+        "--renderSeconds",
+        type=float,
+        default=render_graph.DEFAULT_TIME_LIMIT,
+        help="give up drawing output.png after this many seconds; 0 for no limit. Default is "
+        + str(render_graph.DEFAULT_TIME_LIMIT),
+    )
+    theparser.add_argument(
+        "--samples",
+        metavar="K",
+        type=int,
+        default=5,
+        help="node IDs listed for each component that is not the largest. Default is 5",
+    )
+    logging_config.add_logging_arguments(theparser)
+    metrics.add_metrics_arguments(theparser)
 
     args = theparser.parse_args()
 
-    if args.stdin:
-        graph = {}
-        for line in sys.stdin:
-            # print(line)
-            line_as_list = line.strip().replace("(", "").replace(")", "").split(", ")
-            # print(line_as_list)
-            try:
-                graph[int(line_as_list[0])].append(int(line_as_list[1]))
-            except KeyError:
-                graph[int(line_as_list[0])] = [int(line_as_list[1])]
-    elif args.numNodes != -1:
-        graph = produce_output.create_random_graph(args.numNodes)
-    elif args.JSONfilename:
-        with open(args.JSONfilename) as json_file:
-            graph = json.load(json_file)
-        graph = {int(k): v for k, v in graph.items()}
+    logging_config.configure_logging(args.log_level, use_queue=args.log_queue)
+    if args.metrics_out:
+        metrics.enable(args.metrics_out)
 
-    # print(graph)
-    G = convert_to_networkx(graph)
+    if args.numNodes != -1 and args.graph != "random":
+        try:
+            # checks the shape of the lattices before any edge is read
+            implicit_graph(args)
+        except ValueError as error:
+            theparser.error(str(error))
 
-    test_whether_graph_is_connected(G)
+    if args.degreesOnly:
+        # reading and counting are interleaved
+        with metrics.span("parse+validate.degrees") as span:
+            counter = stream_degrees(args)
+            span.count(nodes=len(counter), edges=counter.edges_read)
+        print_degree_summaries(counter.summaries())
+        sys.exit()
 
-    # https://stackoverflow.com/a/47451934/1164295
-    dict_of_node_and_degree = {}
-    for node, val in G.degree():
-        dict_of_node_and_degree[node] = val
+    if args.connectivityOnly:
+        with metrics.span("parse+validate.connectivity") as span:
+            components = stream_connectivity(args)
+            report = components.report(args.samples)
+            span.count(nodes=len(components), edges=components.edges_read)
+        print(report)
+        if not report.is_connected:
+            raise graph_algorithms.GraphNotConnectedError(report)
+        sys.exit()
 
-    print("key=node ID; value = degree")
-    print(dict_of_node_and_degree)
+    with metrics.span("generate" if args.numNodes != -1 else "parse") as span:
+        if args.stdin and graph_io.is_binary_edge_stream(sys.stdin.buffer):
+            graph = CSRGraph.from_edge_array(
+                *graph_io.read_binary_edges(sys.stdin.buffer)
+            )
+        elif args.stdin:
+            graph = CSRGraph.from_edge_array(*graph_io.read_edge_text(sys.stdin.buffer))
+        elif args.numNodes != -1 and args.graph != "random":
+            graph = implicit_graph(args).to_csr()
+        elif args.numNodes != -1:
+            graph = random_graph(args)
+        elif args.binaryfile:
+            graph = CSRGraph.from_edge_array(
+                *graph_io.read_binary_edges(args.binaryfile)
+            )
+        elif args.graphfile:
+            graph = MappedGraph(args.graphfile)
+        elif args.JSONfilename:
+            graph = dict(graph_io.next_node_in_json(args.JSONfilename))
+        span.count(nodes=len(graph))
 
-    for degree in set(dict_of_node_and_degree.values()):
-        print(
-            sum(x == degree for x in dict_of_node_and_degree.values()),
-            "nodes have degree",
-            degree,
-        )
+    # print(graph)
+    with metrics.span("convert") as span:
+        graph = graph_algorithms.as_csr(graph)
+        span.count(nodes=len(graph), edges=graph.number_of_edges())
+
+    with metrics.span("validate.connectivity", edges=graph.number_of_edges()):
+        test_whether_graph_is_connected(graph, args.samples)
+
+    with metrics.span("validate.degrees", edges=graph.number_of_edges()):
+        degrees = graph_algorithms.undirected_degrees(graph)
+        counter = degree_stats.DegreeCounter()
+        counter.add_csr(graph)
+        summaries = {
+            "in": degree_stats.degree_summary(counter.in_degrees),
+            "out": degree_stats.degree_summary(counter.out_degrees),
+            # an edge listed in both directions counts once, as in NetworkX
+            "undirected": degree_stats.degree_summary(degrees),
+        }
+    if args.networkx:
+        with metrics.span("validate.networkx", edges=graph.number_of_edges()):
+            cross_check_with_networkx(graph, degrees)
+
+    print_degree_summaries(summaries)
 
-    create_png(G)
+    if not args.no_png:
+        with metrics.span("render"):
+            create_png(graph, args)
 
 # EOF